@@ -1,13 +1,15 @@
 import scrapy
 import pandas as pd
-import time
 
 class MauritiusRealEstateSpider(scrapy.Spider):
     name = 'mauritius_realestate_ref'
     allowed_domains = ['lexpressproperty.com']
-    max_retries = 10
 
     custom_settings = {
+        # Rate limiting (429/520) is retried by BackoffMiddleware without blocking the reactor
+        'RETRY_HTTP_CODES': [500, 502, 503, 504, 522, 524, 408],
+        'DOWNLOADER_MIDDLEWARES': {'middlewares.BackoffMiddleware': 590},
+        'BACKOFF_HTTP_CODES': [429],
         'DOWNLOAD_DELAY': 10,  # Example delay, adjust as needed
         'AUTOTHROTTLE_ENABLED': True,
         'AUTOTHROTTLE_START_DELAY': 1,
@@ -32,7 +34,7 @@ class MauritiusRealEstateSpider(scrapy.Spider):
                 callback=self.parse_details, 
                 errback=self.errback, 
                 headers=headers,  # Include headers with User-Agent
-                meta={'index': index, 'retry_count': 0}
+                meta={'index': index}
             )
 
     def parse_details(self, response):
@@ -45,30 +47,12 @@ class MauritiusRealEstateSpider(scrapy.Spider):
             self.df.at[index, 'ref'] = ref
 
     def errback(self, failure):
-        request = failure.request
-        index = request.meta['index']
-        retry_count = request.meta['retry_count']
+        index = failure.request.meta['index']
 
         if hasattr(failure, 'value') and hasattr(failure.value, 'response') and failure.value.response is not None:
             response = failure.value.response
-            if response.status == 429:
-                if retry_count < self.max_retries:
-                    retry_count += 1
-                    self.logger.warning(f'Rate limit reached. Retrying {retry_count}/{self.max_retries} for index {index}.')
-                    time.sleep(60)  # Add a longer delay before retrying
-                    return scrapy.Request(
-                        url=request.url, 
-                        callback=self.parse_details, 
-                        errback=self.errback, 
-                        dont_filter=True,
-                        headers=request.headers,  # Include original headers
-                        meta={'index': index, 'retry_count': retry_count}
-                    )
-                else:
-                    self.logger.error(f'Max retries reached for index {index}. Skipping.')
-            else:
-                self.logger.error(f'Non-retryable error encountered for index {index}. Status code: {response.status}.')
-                self.logger.error(f'Error message: {failure.getErrorMessage()}')
+            self.logger.error(f'Non-retryable error encountered for index {index}. Status code: {response.status}.')
+            self.logger.error(f'Error message: {failure.getErrorMessage()}')
         else:
             self.logger.error(f'Unknown error encountered for index {index}. Skipping.')
 
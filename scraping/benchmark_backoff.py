@@ -0,0 +1,126 @@
+"""
+Measure crawl throughput against a local rate limited HTTP server.
+
+    python benchmark_backoff.py --pages 200 --rate 20
+    python benchmark_backoff.py --pages 200 --rate 20 --mode sleep   # old time.sleep() behaviour
+
+The server answers at most --rate requests per second and returns 429 with
+Retry-After: 1 for the rest.
+"""
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import scrapy
+from scrapy.crawler import CrawlerProcess
+from scrapy.spidermiddlewares.httperror import HttpError
+
+
+class RateLimitedHandler(BaseHTTPRequestHandler):
+    rate = 10.0
+    lock = threading.Lock()
+    tokens = 0.0
+    updated = time.monotonic()
+    served = 0
+    limited = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            now = time.monotonic()
+            cls.tokens = min(cls.rate, cls.tokens + (now - cls.updated) * cls.rate)
+            cls.updated = now
+            allowed = cls.tokens >= 1
+            if allowed:
+                cls.tokens -= 1
+                cls.served += 1
+            else:
+                cls.limited += 1
+
+        if allowed:
+            body = f'<html><body><p>{self.path}</p></body></html>'.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_response(429)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BenchmarkSpider(scrapy.Spider):
+    name = 'backoff_benchmark'
+
+    def __init__(self, base_url, pages, mode, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.base_url = base_url
+        self.pages = pages
+        self.mode = mode
+        self.parsed = 0
+
+    def start_requests(self):
+        for page in range(self.pages):
+            yield scrapy.Request(f'{self.base_url}/page/{page}', callback=self.parse, errback=self.errback, dont_filter=True)
+
+    def parse(self, response):
+        self.parsed += 1
+
+    def errback(self, failure):
+        if self.mode == 'sleep' and failure.check(HttpError) and failure.value.response.status == 429:
+            # What the spiders used to do: block the whole reactor, then retry
+            time.sleep(1)
+            yield failure.request.replace(dont_filter=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=20.0, help='Requests per second the mock server accepts')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--mode', choices=['backoff', 'sleep'], default='backoff')
+    args = parser.parse_args()
+
+    RateLimitedHandler.rate = args.rate
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RateLimitedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    settings = {
+        'LOG_LEVEL': 'WARNING',
+        'CONCURRENT_REQUESTS': args.concurrency,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': args.concurrency,
+        'RETRY_HTTP_CODES': [500, 502, 503, 504, 522, 524, 408],
+        'AUTOTHROTTLE_ENABLED': True,
+        'AUTOTHROTTLE_START_DELAY': 0,
+        'AUTOTHROTTLE_TARGET_CONCURRENCY': float(args.concurrency),
+        'BACKOFF_BASE_DELAY': 0.5,
+        'BACKOFF_MAX_RETRIES': 50,
+    }
+    if args.mode == 'backoff':
+        settings['DOWNLOADER_MIDDLEWARES'] = {'middlewares.BackoffMiddleware': 590}
+
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(BenchmarkSpider)
+    process.crawl(crawler, base_url=f'http://127.0.0.1:{server.server_port}', pages=args.pages, mode=args.mode)
+    start = time.perf_counter()
+    process.start()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    stats = crawler.stats.get_stats()
+    print(f'mode:            {args.mode}')
+    print(f'pages parsed:    {crawler.spider.parsed}/{args.pages}')
+    print(f'elapsed:         {elapsed:.1f}s ({crawler.spider.parsed / elapsed:.1f} pages/s, server limit {args.rate:g}/s)')
+    print(f'429 responses:   {RateLimitedHandler.limited}')
+    print(f"backoff events:  {stats.get('backoff/events', 0)}")
+    print(f"backoff delay:   {stats.get('backoff/delay_total', 0):.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,40 +1,72 @@
 import scrapy
 from scrapy.crawler import CrawlerProcess
 import pandas as pd
-import time
 from scrapy.spidermiddlewares.httperror import HttpError
+import argparse
 import os
 import csv
+import re
+from django_db import run_in_thread, setup_django
+
+
+def parse_price(price):
+    digits = re.sub(r'[^\d]', '', price or '')
+    return int(digits) if digits else None
+
+
+def load_known_listings():
+    """details_link -> (ref, price) for every unsold property in the database."""
+    setup_django()
+    from properties.models import Property
+    return {
+        details_link: (ref, int(price))
+        for details_link, ref, price in Property.objects.filter(sold=False).values_list('details_link', 'ref', 'price').iterator(chunk_size=5000)
+    }
+
 
 class MauritiusRealEstateSpider(scrapy.Spider):
     name = 'mauritius_realestate'
     allowed_domains = ['lexpressproperty.com']
     base_url = 'https://www.lexpressproperty.com/en/buy-mauritius/all/?currency=MUR&filters%5Binterior_unit%5D%5Beq%5D=m2&filters%5Bland_unit%5D%5Beq%5D=m2&p='
     max_page = 1000  # Specify the maximum number of pages to scrape
-    max_retries = 10  # Max retries for 429 errors
+    debug_csv = 'test_new_db.csv'  # Optional CSV copy of the scraped items
 
     custom_settings = {
         'RETRY_TIMES': 8,
-        'RETRY_HTTP_CODES': [429],
+        # Rate limiting (429/520) is retried by BackoffMiddleware without blocking the reactor
+        'RETRY_HTTP_CODES': [500, 502, 503, 504, 522, 524, 408],
+        'DOWNLOADER_MIDDLEWARES': {'middlewares.BackoffMiddleware': 590},
+        'BACKOFF_HTTP_CODES': [429, 520],
         'DOWNLOAD_DELAY': 2,
         'AUTOTHROTTLE_ENABLED': True,
         'AUTOTHROTTLE_START_DELAY': 1,
         'AUTOTHROTTLE_MAX_DELAY': 60,
         'AUTOTHROTTLE_TARGET_CONCURRENCY': 1.0,
         'AUTOTHROTTLE_DEBUG': True,
-        'FEED_FORMAT': 'csv',
-        'FEED_URI': 'test_new_db.csv',  # Path to save the final data
     }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, incremental=False, stop_after=3, csv_only=False, **kwargs):
         super().__init__(*args, **kwargs)
-        self.existing_refs = self.load_existing_refs()
+        # The database pipeline upserts, so refs from a previous CSV run only matter without it
+        self.existing_refs = self.load_existing_refs() if str(csv_only).lower() in ('1', 'true', 'yes') else set()
+        # Incremental mode: only fetch detail pages for new or repriced listings, and stop
+        # paginating after stop_after consecutive pages with nothing new
+        self.incremental = str(incremental).lower() in ('1', 'true', 'yes')
+        self.stop_after = int(stop_after)
+        self.unchanged_pages = 0
+        self.seen_unchanged = set()
+        self.known_listings = run_in_thread(load_known_listings) if self.incremental else {}
+        if self.incremental:
+            self.logger.info(f'Incremental crawl: {len(self.known_listings)} known listings, stopping after {self.stop_after} unchanged pages')
+            if str(csv_only).lower() in ('1', 'true', 'yes'):
+                # Listings past the early stop are not in the CSV but may still be listed
+                self.logger.warning('Incremental CSV: import it with import_properties --no-mark-sold')
 
     def load_existing_refs(self):
         """Load existing refs from the CSV file into a set."""
         refs = set()
-        if os.path.exists(self.custom_settings['FEED_URI']):
-            with open(self.custom_settings['FEED_URI'], newline='') as csvfile:
+        if os.path.exists(self.debug_csv):
+            with open(self.debug_csv, newline='') as csvfile:
                 reader = csv.DictReader(csvfile)
                 for row in reader:
                     if 'ref' in row and row['ref']:
@@ -44,23 +76,23 @@ class MauritiusRealEstateSpider(scrapy.Spider):
 
     def start_requests(self):
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        
+
+        if self.incremental:
+            # Pages are requested one after another so the crawl can stop early
+            yield scrapy.Request(url=f'{self.base_url}1', callback=self.parse, errback=self.errback, dont_filter=True, headers=headers, meta={'page': 1})
+            return
+
         for page_number in range(1, self.max_page + 1):
             yield scrapy.Request(url=f'{self.base_url}{page_number}', callback=self.parse, errback=self.errback, dont_filter=True, headers=headers)
 
     def parse(self, response):
-        if response.status == 429:
-            self.logger.warning('Rate limit reached. Sleeping for 60 seconds...')
-            time.sleep(60)
-            yield scrapy.Request(url=response.url, callback=self.parse, errback=self.errback, dont_filter=True)
-            return
-
         properties = response.css('div.card-body')
         if not properties:
             self.logger.warning(f'No properties found on page: {response.url}')
         else:
             self.logger.info(f'Found {len(properties)} properties on page: {response.url}')
 
+        changed = 0
         for property in properties:
             title = property.css('h2.h3.mb-1 a::text').get()
             location = property.css('address a::text').get()
@@ -75,6 +107,12 @@ class MauritiusRealEstateSpider(scrapy.Spider):
 
             details_link_full = response.urljoin(details_link)
 
+            known = self.known_listings.get(details_link_full)
+            if known is not None and known[1] == parse_price(price):
+                self.seen_unchanged.add(known[0])
+                continue
+            changed += 1
+
             yield scrapy.Request(details_link_full, callback=self.parse_details, errback=self.errback, meta={
                 'title': title,
                 'location': location,
@@ -86,9 +124,17 @@ class MauritiusRealEstateSpider(scrapy.Spider):
                 'contact_phone': contact_phone,
                 'contact_email': contact_email,
                 'contact_whatsapp': contact_whatsapp,
-                'retry_count': 0
             })
 
+        if self.incremental:
+            self.unchanged_pages = 0 if changed else self.unchanged_pages + 1
+            page = response.meta.get('page', 1)
+            if not properties or self.unchanged_pages >= self.stop_after or page >= self.max_page:
+                self.logger.info(f'Stopping incremental crawl at page {page} ({self.unchanged_pages} consecutive unchanged pages)')
+                return
+            yield scrapy.Request(url=f'{self.base_url}{page + 1}', callback=self.parse, errback=self.errback, dont_filter=True, headers=response.request.headers, meta={'page': page + 1})
+            return
+
         # Handle pagination via next page links if available
         next_page = response.css('li.pagination-next a::attr(href)').get()
         if next_page is not None:
@@ -106,7 +152,6 @@ class MauritiusRealEstateSpider(scrapy.Spider):
         contact_phone = response.meta['contact_phone']
         contact_email = response.meta['contact_email']
         contact_whatsapp = response.meta['contact_whatsapp']
-        retry_count = response.meta['retry_count']
 
         # Extract additional property details from the details page
         land_surface = response.css('dt:contains("Land surface") + dd::text').get()
@@ -158,40 +203,40 @@ class MauritiusRealEstateSpider(scrapy.Spider):
                 'ref': ref
             }
         else:
-            self.logger.info(f'Skipping property with ref {ref} as it is already in the CSV.')
+            self.logger.info(f'Skipping property with ref {ref} as it was already scraped.')
 
     def errback(self, failure):
         request = failure.request
-        retry_count = request.meta.get('retry_count', 0)
 
         if failure.check(HttpError):
             response = failure.value.response
-            if response.status in [429, 520]:
-                if retry_count < self.max_retries:
-                    retry_count += 1
-                    self.logger.warning(f'HTTP error {response.status} encountered. Retrying {retry_count}/{self.max_retries} for URL: {request.url}')
-                    time.sleep(10)  # Add a longer delay before retrying
-                    new_meta = request.meta.copy()
-                    new_meta['retry_count'] = retry_count
-                    yield scrapy.Request(
-                        url=request.url, 
-                        callback=self.parse_details, 
-                        errback=self.errback, 
-                        dont_filter=True,
-                        headers=request.headers,  # Include original headers
-                        meta=new_meta
-                    )
-                else:
-                    self.logger.error(f'Max retries reached for URL: {request.url}. Skipping.')
-            else:
-                self.logger.error(f'HTTP error encountered: {response.status} for URL: {request.url}. Error message: {failure.getErrorMessage()}')
+            self.logger.error(f'HTTP error encountered: {response.status} for URL: {request.url}. Error message: {failure.getErrorMessage()}')
         else:
             self.logger.error(f'Unknown error encountered for URL: {request.url}. Error message: {failure.getErrorMessage()}')
 
     def closed(self, reason):
+        if self.seen_unchanged:
+            # Only left over without the database pipeline (--csv-only): the pipeline
+            # records and clears them before its sold pass
+            from properties.ingest import touch_listings
+            touched = run_in_thread(touch_listings, self.seen_unchanged)
+            self.logger.info(f'Skipped {len(self.seen_unchanged)} unchanged listings, marked {touched} as seen')
         self.logger.info(f'Spider closed: {reason}')
 
 if __name__ == "__main__":
-    process = CrawlerProcess()
-    process.crawl(MauritiusRealEstateSpider)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--incremental', action='store_true', help='Skip detail pages of listings already in the database at the same price')
+    parser.add_argument('--stop-after', type=int, default=3, help='Incremental mode: stop after this many consecutive pages with no new or repriced listings')
+    parser.add_argument('--debug-csv', action='store_true', help=f'Also write the scraped items to {MauritiusRealEstateSpider.debug_csv}')
+    parser.add_argument('--csv-only', action='store_true', help='Only write the CSV, for the remove_duplicates.py / import_properties flow')
+    args = parser.parse_args()
+
+    settings = {}
+    if not args.csv_only:
+        settings['ITEM_PIPELINES'] = {'pipelines.DatabasePipeline': 300}
+    if args.debug_csv or args.csv_only:
+        settings['FEEDS'] = {MauritiusRealEstateSpider.debug_csv: {'format': 'csv'}}
+
+    process = CrawlerProcess(settings)
+    process.crawl(MauritiusRealEstateSpider, incremental=args.incremental, stop_after=args.stop_after, csv_only=args.csv_only)
     process.start()
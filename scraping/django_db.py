@@ -0,0 +1,21 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'web app', 'backend', 'real_estate_project')
+
+
+def setup_django():
+    """Make the backend's models importable from the scrapers."""
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    import django
+    django.setup()
+
+
+def run_in_thread(func, *args):
+    # Django refuses synchronous queries from a thread running an event loop, which is
+    # the case inside Scrapy's asyncio reactor
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(func, *args).result()
@@ -1,7 +1,6 @@
 # spiders/mauritius_realestate_spider.py
 
 import scrapy
-import time
 from scrapy.utils.response import get_meta_refresh
 from scrapy.spidermiddlewares.httperror import HttpError
 from twisted.internet.error import DNSLookupError
@@ -12,11 +11,13 @@ class MauritiusRealEstateSpider(scrapy.Spider):
     allowed_domains = ['lexpressproperty.com']
     base_url = 'https://www.lexpressproperty.com/en/buy-mauritius/all/?currency=MUR&filters%5Binterior_unit%5D%5Beq%5D=m2&filters%5Bland_unit%5D%5Beq%5D=m2&p='
     max_page = 1000  # Specify the maximum number of pages to scrape
-    retry_count = 0  # Counter to track retries
 
     custom_settings = {
         'RETRY_TIMES': 8,
-        'RETRY_HTTP_CODES': [429],
+        # Rate limiting (429/520) is retried by BackoffMiddleware without blocking the reactor
+        'RETRY_HTTP_CODES': [500, 502, 503, 504, 522, 524, 408],
+        'DOWNLOADER_MIDDLEWARES': {'middlewares.BackoffMiddleware': 590},
+        'BACKOFF_HTTP_CODES': [429, 520],
         'DOWNLOAD_DELAY': 8,
         'AUTOTHROTTLE_ENABLED': True,
         'AUTOTHROTTLE_START_DELAY': 1,
@@ -30,13 +31,6 @@ class MauritiusRealEstateSpider(scrapy.Spider):
             yield scrapy.Request(url=f'{self.base_url}{page_number}', callback=self.parse, errback=self.errback, dont_filter=True)
 
     def parse(self, response):
-        if response.status == 429:
-            self.logger.warning('Rate limit reached. Sleeping for 60 seconds...')
-            time.sleep(60)
-            self.retry_count += 1
-            yield scrapy.Request(url=response.url, callback=self.parse, errback=self.errback, dont_filter=True)
-            return
-
         properties = response.css('div.card-body')
         if not properties:
             self.logger.warning(f'No properties found on page: {response.url}')
@@ -134,8 +128,4 @@ class MauritiusRealEstateSpider(scrapy.Spider):
     def errback(self, failure):
         if failure.check(HttpError):
             response = failure.value.response
-            if response.status == 429:
-                self.logger.warning('Rate limit reached. Sleeping for 60 seconds...')
-                time.sleep(60)
-                self.retry_count += 1
-                yield scrapy.Request(url=response.url, callback=self.parse, errback=self.errback, dont_filter=True)
+            self.logger.error(f'HTTP error {response.status} for URL: {response.url}')
@@ -0,0 +1,123 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import reactor
+from twisted.internet.task import deferLater
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.decode('latin-1') if isinstance(value, bytes) else value
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - (time.time() if now is None else now))
+
+
+class BackoffMiddleware:
+    """
+    Per-domain backoff for rate limited responses (429/520 by default).
+
+    A rate limited response is retried after Retry-After, or after an exponential delay
+    with full jitter, and every other request to the same domain waits until that
+    cool-down ends. Only requests for the throttled domain are held back; the reactor
+    and other domains keep running. The cool-down is also applied to the downloader
+    slot delay, which AutoThrottle then keeps as its starting point and only lowers
+    again on successful responses.
+
+    Settings: BACKOFF_ENABLED, BACKOFF_HTTP_CODES, BACKOFF_BASE_DELAY, BACKOFF_MAX_DELAY,
+    BACKOFF_MAX_RETRIES. Stats: backoff/events, backoff/delay_total, backoff/gave_up
+    and backoff/status/<code>.
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool('BACKOFF_ENABLED', True):
+            raise NotConfigured
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.http_codes = set(settings.getlist('BACKOFF_HTTP_CODES', [429, 520]))
+        self.base_delay = settings.getfloat('BACKOFF_BASE_DELAY', 5.0)
+        self.max_delay = settings.getfloat('BACKOFF_MAX_DELAY', 300.0)
+        self.max_retries = settings.getint('BACKOFF_MAX_RETRIES', 10)
+        self.levels = {}  # domain -> consecutive rate limited responses
+        self.cooldown_until = {}  # domain -> monotonic time requests may resume
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(crawler)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_request(self, request, spider):
+        wait = self.cooldown_until.get(self.domain(request), 0) - time.monotonic()
+        if wait > 0:
+            # Returning a Deferred parks this request only; the download continues once it fires
+            return deferLater(reactor, wait, lambda: None)
+        return None
+
+    def process_response(self, request, response, spider):
+        domain = self.domain(request)
+        if response.status not in self.http_codes:
+            if 200 <= response.status < 300:
+                self.levels.pop(domain, None)
+            return response
+
+        retries = request.meta.get('backoff_retries', 0)
+        if retries >= self.max_retries:
+            self.stats.inc_value('backoff/gave_up')
+            spider.logger.error(f'Giving up on {request.url} after {retries} rate limited retries')
+            return response
+
+        level = self.levels.get(domain, 0)
+        self.levels[domain] = level + 1
+        delay = parse_retry_after(response.headers.get('Retry-After'))
+        if delay is None:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** level))
+        delay = min(delay, self.max_delay)
+
+        self.cooldown_until[domain] = max(self.cooldown_until.get(domain, 0), time.monotonic() + delay)
+        self.slow_down_slot(request, delay)
+
+        self.stats.inc_value('backoff/events')
+        self.stats.inc_value(f'backoff/status/{response.status}')
+        self.stats.inc_value('backoff/delay_total', delay)
+        spider.logger.warning(f'HTTP {response.status} from {domain}, backing off {delay:.1f}s (retry {retries + 1}/{self.max_retries})')
+
+        retry = request.replace(dont_filter=True)
+        retry.meta['backoff_retries'] = retries + 1
+        return retry
+
+    def slow_down_slot(self, request, delay):
+        downloader = self.crawler.engine.downloader
+        get_slot_key = getattr(downloader, 'get_slot_key', None) or getattr(downloader, '_get_slot_key')
+        try:
+            key = get_slot_key(request)
+        except TypeError:  # Scrapy < 2.11 also takes the spider
+            key = get_slot_key(request, None)
+        slot = downloader.slots.get(key)
+        if slot is not None:
+            max_delay = self.crawler.settings.getfloat('AUTOTHROTTLE_MAX_DELAY', self.max_delay)
+            slot.delay = min(max(slot.delay, delay), max_delay)
+
+    def spider_closed(self, spider):
+        events = self.stats.get_value('backoff/events', 0)
+        if events:
+            spider.logger.info(
+                f"Backoff: {events} rate limited responses, {self.stats.get_value('backoff/delay_total', 0):.1f}s total delay, "
+                f"{self.stats.get_value('backoff/gave_up', 0)} requests given up"
+            )
+
+    @staticmethod
+    def domain(request):
+        return urlparse(request.url).netloc
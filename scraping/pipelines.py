@@ -0,0 +1,85 @@
+import resource
+import threading
+import time
+
+from django_db import run_in_thread, setup_django
+from twisted.internet.threads import deferToThread
+
+
+class DatabasePipeline:
+    """
+    Cleans scraped listings and upserts them straight into the Django database.
+
+    Replaces the spider -> CSV -> remove_duplicates.py -> extract_type_csv.py ->
+    import_properties chain: items go through the same clean_row/upsert_properties code
+    as import_properties and are written in batches of DATABASE_PIPELINE_BATCH_SIZE from a
+    worker thread, so the reactor keeps crawling while a batch is stored.
+    """
+
+    def __init__(self, batch_size, stats):
+        self.batch_size = batch_size
+        self.stats = stats
+        self.buffer = []
+        self.lock = threading.Lock()  # one batch at a time, so new agencies are created once
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings.getint('DATABASE_PIPELINE_BATCH_SIZE', 500), crawler.stats)
+
+    def open_spider(self, spider):
+        setup_django()
+        from django.utils import timezone
+        from properties.ingest import clean_row
+        self.clean_row = clean_row
+        self.started = time.perf_counter()
+        self.now = timezone.now()
+
+    def process_item(self, item, spider):
+        row = self.clean_row(dict(item))
+        if row is None:
+            self.stats.inc_value('database/skipped')
+            return item
+        self.buffer.append(row)
+        if len(self.buffer) < self.batch_size:
+            return item
+        batch, self.buffer = self.buffer, []
+        return deferToThread(self.store, batch).addCallback(lambda _: item)
+
+    def store(self, rows):
+        from properties.ingest import upsert_properties
+        with self.lock:
+            inserted, updated, price_changes = upsert_properties(rows, now=self.now)
+        self.stats.inc_value('database/inserted', inserted)
+        self.stats.inc_value('database/updated', updated)
+        self.stats.inc_value('database/price_changes', price_changes)
+
+    def close_spider(self, spider):
+        from django.db import transaction
+        from properties.ingest import finalize_import, touch_listings
+
+        def finish():
+            if self.buffer:
+                self.store(self.buffer)
+                self.buffer = []
+            with transaction.atomic():
+                # Listings an incremental crawl skipped as unchanged count as seen; record
+                # them before finalize_import looks for unseen ones
+                seen_unchanged = getattr(spider, 'seen_unchanged', set())
+                touched = touch_listings(seen_unchanged, now=self.now)
+                seen_unchanged.clear()
+                # An incremental crawl stops early, so listings it missed may still be listed
+                return touched, finalize_import(self.now, mark_sold=not getattr(spider, 'incremental', False))
+
+        touched, marked_sold = run_in_thread(finish)
+        elapsed = time.perf_counter() - self.started
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stats.set_value('database/touched', touched)
+        self.stats.set_value('database/marked_sold', marked_sold)
+        self.stats.set_value('database/elapsed_seconds', round(elapsed, 1))
+        self.stats.set_value('database/peak_memory_mb', round(peak_mb))
+        spider.logger.info(
+            f"Database pipeline: {self.stats.get_value('database/inserted', 0)} inserted, "
+            f"{self.stats.get_value('database/updated', 0)} updated, "
+            f"{self.stats.get_value('database/price_changes', 0)} price changes, {touched} unchanged, {marked_sold} marked as sold, "
+            f"{self.stats.get_value('database/skipped', 0)} skipped in {elapsed:.0f}s (peak memory {peak_mb:.0f} MB)"
+        )
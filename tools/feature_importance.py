@@ -7,38 +7,16 @@ from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 import numpy as np
+from snapshot import load_properties
 
-# Load the CSV data
-df = pd.read_csv("real_estate_listings_modified.csv")
-
-# Function to extract type from title
-def extract_type(title):
-    if isinstance(title, str):
-        return title.split(' - ')[0]
-    return "Unknown"
-
-# Apply the function to create the 'type' column
-df['type'] = df['title'].apply(extract_type)
-
-# Function to clean and convert price to numeric
-def clean_price(price):
-    try:
-        return float(price.replace('Rs', '').replace(',', '').strip())
-    except:
-        return None
-
-# Apply the cleaning function to the price column
-df['price'] = df['price'].apply(clean_price)
-
-# Extract numerical values for land and interior surfaces, handling errors
-df['land_surface'] = pd.to_numeric(df['land_surface'].str.extract('(\d+.\d+)')[0], errors='coerce')
-df['interior_surface'] = pd.to_numeric(df['interior_surface'].str.extract('(\d+.\d+)')[0], errors='coerce')
+# Load the cleaned, typed snapshot written by `python manage.py export_snapshot`
+df = load_properties()
 
 # Convert swimming_pool column to dummy variables
 df = pd.get_dummies(df, columns=['swimming_pool'], prefix='pool')
 
 # Convert accessible_to_foreigners column to binary
-df['accessible_to_foreigners'] = df['accessible_to_foreigners'].apply(lambda x: 1 if x == 'Yes' else 0)
+df['accessible_to_foreigners'] = df['accessible_to_foreigners'].astype(int)
 
 # Formatter functions
 def currency_formatter(x, pos):
@@ -4,32 +4,10 @@ import seaborn as sns
 from sklearn.linear_model import LinearRegression
 import re
 import numpy as np
+from snapshot import load_properties
 
-# Load the CSV data
-df = pd.read_csv("Land undervalued by region - real_estate_listings_modified.csv")
-
-# Clean and process data
-def extract_type(title):
-    if isinstance(title, str):
-        return title.split(' - ')[0]
-    return "Unknown"
-
-def extract_region(location):
-    if isinstance(location, str):
-        return location.split(',')[-1].strip()
-    return "Unknown"
-
-def clean_price(price):
-    try:
-        return float(price.replace('Rs', '').replace(',', '').strip())
-    except:
-        return None
-
-df['type'] = df['title'].apply(extract_type)
-df['region'] = df['location'].apply(extract_region)
-df['price'] = df['price'].apply(clean_price)
-df['land_surface'] = pd.to_numeric(df['land_surface'].str.extract('(\d+.\d+)')[0], errors='coerce')
-df['construction_year'] = pd.to_numeric(df['construction_year'], errors='coerce')
+# Load the cleaned, typed snapshot written by `python manage.py export_snapshot`
+df = load_properties()
 
 # Filter data
 df = df[df['construction_year'] <= 2023]
@@ -0,0 +1,32 @@
+"""
+Shared loader for the Parquet snapshot written by `python manage.py export_snapshot`.
+
+The snapshot is already cleaned and typed: price and surfaces are float64, bedrooms /
+bathrooms / toilets / construction_year are nullable Int16, accessible_to_foreigners and
+aircon are booleans, and location / region / type / agency / swimming_pool are
+categoricals. Tools can use it directly instead of re-parsing a CSV.
+"""
+import os
+
+import pandas as pd
+
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshot'))
+
+
+def load_properties(columns=None, unsold_only=False, snapshot_dir=None):
+    path = os.path.join(snapshot_dir or SNAPSHOT_DIR, 'properties.parquet')
+    if not os.path.exists(path):
+        raise FileNotFoundError(f'{path} not found; run `python manage.py export_snapshot` first')
+    if unsold_only and columns is not None and 'sold' not in columns:
+        columns = list(columns) + ['sold']
+    df = pd.read_parquet(path, columns=columns)
+    if unsold_only:
+        df = df[~df['sold']]
+    return df
+
+
+def load_price_history(snapshot_dir=None):
+    path = os.path.join(snapshot_dir or SNAPSHOT_DIR, 'price_history.parquet')
+    if not os.path.exists(path):
+        raise FileNotFoundError(f'{path} not found; run `python manage.py export_snapshot` first')
+    return pd.read_parquet(path)
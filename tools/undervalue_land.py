@@ -6,42 +6,10 @@ from matplotlib.ticker import ScalarFormatter
 from sklearn.linear_model import LinearRegression
 import numpy as np
 import os
+from snapshot import load_properties
 
-# Load the CSV data
-df = pd.read_csv("real_estate_listings_modified.csv")
-
-# Function to extract type from title
-def extract_type(title):
-    if isinstance(title, str):
-        return title.split(' - ')[0]
-    return "Unknown"
-
-# Apply the function to create the 'type' column
-df['type'] = df['title'].apply(extract_type)
-
-# Function to extract region from location
-def extract_region(location):
-    if isinstance(location, str):
-        return location.split(',')[-1].strip()
-    return "Unknown"
-
-# Apply the function to create the 'region' column
-df['region'] = df['location'].apply(extract_region)
-
-# Function to clean and convert price to numeric
-def clean_price(price):
-    try:
-        return float(price.replace('Rs', '').replace(',', '').strip())
-    except:
-        return None
-
-# Apply the cleaning function to the price column
-df['price'] = df['price'].apply(clean_price)
-
-# Extract numerical values for land and interior surfaces, handling errors
-df['land_surface'] = pd.to_numeric(df['land_surface'].str.extract('(\d+.\d+)')[0], errors='coerce')
-df['interior_surface'] = pd.to_numeric(df['interior_surface'].str.extract('(\d+.\d+)')[0], errors='coerce')
-df['construction_year'] = pd.to_numeric(df['construction_year'], errors='coerce')
+# Load the cleaned, typed snapshot written by `python manage.py export_snapshot`
+df = load_properties()
 
 # Function to create safe filenames
 def safe_filename(filename):
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,9 +38,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
     'rest_framework',
     'properties',
+    'valuation_tool',
 ]
 
 
@@ -143,3 +146,37 @@ DATABASES = {
         'PORT': '',
     }
 }
+
+
+# Dashboard response cache (see properties/cache.py). Entries are keyed on the dataset
+# version, so TTLs only bound memory use. Local memory by default; set DASHBOARD_CACHE_URL
+# (e.g. redis://localhost:6379/1) to share entries and hit/miss counters across workers.
+DASHBOARD_CACHE_URL = os.environ.get('DASHBOARD_CACHE_URL')
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 60 * 60 * 24))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': DASHBOARD_CACHE_URL,
+    } if DASHBOARD_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dashboard',
+    },
+}
+
+# Valuation pipelines kept in memory per worker (see valuation_tool/registry.py)
+VALUATION_MODEL_CACHE_SIZE = int(os.environ.get('VALUATION_MODEL_CACHE_SIZE', 4))
+VALUATION_WARM_ON_STARTUP = os.environ.get('VALUATION_WARM_ON_STARTUP', '1') == '1'
+
+# Nominatim requires an identifying User-Agent and allows at most one request per second
+GEOCODING_USER_AGENT = os.environ.get('GEOCODING_USER_AGENT', 'real-estate-dashboard/1.0')
+GEOCODING_RATE = float(os.environ.get('GEOCODING_RATE', 1.0))
+
+# Where run_pipeline finds combined-spiders.py
+SCRAPING_DIR = os.environ.get('SCRAPING_DIR', str(BASE_DIR.parent.parent.parent / 'scraping'))
+PIPELINE_WORKERS = int(os.environ.get('PIPELINE_WORKERS', 4))
+# Day of the week (Monday is 0) the nightly run crawls every page instead of incrementally
+PIPELINE_FULL_CRAWL_WEEKDAY = int(os.environ.get('PIPELINE_FULL_CRAWL_WEEKDAY', 6))
@@ -1,8 +1,8 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from properties.views import AgencyRankingView, ExchangeRatesView, InvestmentOpportunitiesView, LocationHeatmapView, LocationListView, MetricsView, PriceDistributionView, PricePerSquareMeterView, PriceVsAccessibleView, PropertyTypeDistributionView, PropertyViewSet, PricePerSquareMeterViewSet, RegionViewSet, CurrentMarketValueView, ScatterPlotDataView, get_agency_details, get_average_price_per_sq_meter, get_average_prices, get_historical_prices, get_latest_properties,  get_price_changes, get_price_history, get_properties_by_persona, get_rolling_average_prices, get_sold_properties, update_sold_status
-from valuation_tool.views import DistinctFeaturesView, ValuationPredictionView
+from properties.views import AgencyRankingView, CacheStatsView, ExchangeRatesView, InvestmentOpportunitiesView, LocationHeatmapView, LocationListView, MetricsView, PriceDistributionView, PricePerSquareMeterView, PriceVsAccessibleView, PropertyTypeDistributionView, PropertyViewSet, PricePerSquareMeterViewSet, RegionViewSet, CurrentMarketValueView, ScatterPlotDataView, get_agency_details, get_average_price_per_sq_meter, get_average_prices, get_historical_prices, get_latest_properties,  get_price_changes, get_price_history, get_properties_by_persona, get_rolling_average_prices, get_sold_properties, update_sold_status
+from valuation_tool.views import DistinctFeaturesView, ValuationBatchPredictionView, ValuationPredictionView
 router = DefaultRouter()
 router.register(r'properties', PropertyViewSet)
 router.register(r'prices', PricePerSquareMeterViewSet)
@@ -14,11 +14,13 @@ urlpatterns = [
     path('api/current_market_value/', CurrentMarketValueView.as_view(), name='current-market-value'),
     path('api/price_per_square_meter/', PricePerSquareMeterView.as_view(), name='price-per-square-meter'),
     path('api/price_distribution/', PriceDistributionView.as_view(), name='price-distribution'),
-    # path('api/locations/', LocationHeatmapView.as_view(), name='location-heatmap'),
+    path('api/location_heatmap/', LocationHeatmapView.as_view(), name='location-heatmap-data'),
     path('api/exchange_rates/', ExchangeRatesView.as_view(), name='exchange_rates'),
+    path('api/cache_stats/', CacheStatsView.as_view(), name='cache-stats'),
     path('api/metrics/',MetricsView.as_view(), name='metrics'),
     path('api/agency-ranking/', AgencyRankingView.as_view(), name='agency-ranking'),
     path('api/predict/', ValuationPredictionView.as_view(), name='valuation_prediction'),
+    path('api/predict/batch/', ValuationBatchPredictionView.as_view(), name='valuation_batch_prediction'),
     path('api/distinct_features/', DistinctFeaturesView.as_view(), name='distinct_features'),
     path('api/investment-opportunities/', InvestmentOpportunitiesView.as_view(), name='investment-opportunities'),
     path('api/property_type_distribution/', PropertyTypeDistributionView.as_view(), name='property_type_distribution'),
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings
+
+if settings.VALUATION_WARM_ON_STARTUP:
+    # Pay the model deserialization cost at worker startup rather than on the first prediction
+    from valuation_tool.registry import registry
+    registry.warm()
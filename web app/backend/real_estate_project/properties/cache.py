@@ -0,0 +1,107 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from .models import DatasetVersion
+
+CACHE_ALIAS = 'dashboard'
+KEY_PREFIX = 'dashboard'
+STATS_KEY = f'{KEY_PREFIX}:stats'
+
+# Endpoint names registered through cached_endpoint, reported by get_stats
+ENDPOINTS = set()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def get_dataset_version():
+    return DatasetVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def bump_dataset_version():
+    """Invalidate every cached dashboard response by moving to a new dataset version."""
+    updated = DatasetVersion.objects.filter(pk=1).update(version=F('version') + 1)
+    if not updated:
+        DatasetVersion.objects.create(pk=1, version=1)
+    return get_dataset_version()
+
+
+def normalize_params(query_dict):
+    # Order-independent and ignores empty parameters, so ?a=1&b= and ?b=&a=1 share an entry
+    items = sorted((key, sorted(value for value in values if value != '')) for key, values in query_dict.lists())
+    return '&'.join(f'{key}={",".join(values)}' for key, values in items if values)
+
+
+def build_key(endpoint, version, query_dict):
+    digest = hashlib.sha1(normalize_params(query_dict).encode('utf-8')).hexdigest()
+    return f'{KEY_PREFIX}:{endpoint}:v{version}:{digest}'
+
+
+def record(endpoint, outcome):
+    cache = get_cache()
+    key = f'{STATS_KEY}:{endpoint}:{outcome}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    cache = get_cache()
+    stats = {}
+    for endpoint in sorted(ENDPOINTS):
+        hits = cache.get(f'{STATS_KEY}:{endpoint}:hit') or 0
+        misses = cache.get(f'{STATS_KEY}:{endpoint}:miss') or 0
+        total = hits + misses
+        stats[endpoint] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else None,
+        }
+    return stats
+
+
+def cached_endpoint(endpoint, timeout=None):
+    """
+    Cache a view's successful responses per dataset version and normalized query string.
+
+    Works for APIView methods (self, request) and function views (request), returning
+    either a DRF Response or a Django HttpResponse.
+    """
+    ENDPOINTS.add(endpoint)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            request = args[-1]
+            cache = get_cache()
+            key = build_key(endpoint, get_dataset_version(), request.GET)
+
+            cached = cache.get(key)
+            if cached is not None:
+                record(endpoint, 'hit')
+                kind, payload, content_type = cached
+                if kind == 'drf':
+                    return Response(payload, status=200)
+                return HttpResponse(payload, content_type=content_type, status=200)
+
+            record(endpoint, 'miss')
+            response = view(*args, **kwargs)
+            if response.status_code == 200:
+                if isinstance(response, Response):
+                    entry = ('drf', response.data, None)
+                else:
+                    entry = ('http', response.content, response['Content-Type'])
+                cache.set(key, entry, timeout if timeout is not None else settings.DASHBOARD_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,215 @@
+import asyncio
+import csv
+import threading
+import time
+import unicodedata
+
+import requests
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Value
+from django.db.models.functions import Concat
+
+from .models import GeocodeCache, Location, Property
+
+NOMINATIM_URL = 'https://nominatim.openstreetmap.org/search'
+
+
+class GeocodingError(Exception):
+    """Transient provider failure; the lookup is retried with backoff."""
+
+
+def normalize_location(location):
+    # 'Côte d'Or,  Center' and 'cote d'or, center' share one cache entry
+    text = unicodedata.normalize('NFKD', location)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.casefold().replace(' ,', ',').split())
+
+
+def split_location(location):
+    # Property.location is 'Name, Region'; Location stores the two parts separately
+    name, _, region = location.rpartition(', ')
+    return (name, region) if name else (location, '')
+
+
+class GeocodingProvider:
+    """Resolves a 'Name, Region' location to (latitude, longitude), or None when unknown."""
+
+    name = None
+
+    def geocode(self, location):
+        raise NotImplementedError
+
+
+class NominatimProvider(GeocodingProvider):
+    name = 'nominatim'
+
+    def __init__(self, user_agent=None, timeout=10):
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = user_agent or settings.GEOCODING_USER_AGENT
+        self.timeout = timeout
+
+    def geocode(self, location):
+        params = {'q': f'{split_location(location)[0]}, Mauritius', 'format': 'json', 'limit': 1}
+        try:
+            response = self.session.get(NOMINATIM_URL, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise GeocodingError(str(e)) from e
+        if not data:
+            return None
+        return float(data[0]['lat']), float(data[0]['lon'])
+
+
+class FixtureProvider(GeocodingProvider):
+    """Offline provider backed by a location,latitude,longitude CSV such as location_coordinates.csv."""
+
+    name = 'fixture'
+
+    def __init__(self, path):
+        self.coordinates = {}
+        with open(path, newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                if row['latitude'] and row['longitude']:
+                    self.coordinates[normalize_location(row['location'])] = (float(row['latitude']), float(row['longitude']))
+
+    def geocode(self, location):
+        return self.coordinates.get(normalize_location(location))
+
+
+class AsyncRateLimiter:
+    """
+    Spaces request starts at least 1 / rate seconds apart across all tasks.
+
+    The slot is claimed under a thread lock rather than an asyncio.Lock, which is bound to
+    one event loop, so a single limiter keeps its budget across the loops of every chunk.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    async def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class Geocoder:
+    """
+    Geocodes locations through a provider with a persistent GeocodeCache in front of it.
+
+    Cache misses are fetched concurrently on an asyncio loop; the provider call itself runs
+    in a worker thread, and a shared limiter keeps the whole batch within `rate` requests
+    per second. Results are written back to the cache after every chunk, so an interrupted
+    run resumes where it stopped.
+    """
+
+    def __init__(self, provider, rate=None, concurrency=4, retries=3, chunk_size=50):
+        self.provider = provider
+        self.rate = settings.GEOCODING_RATE if rate is None else rate
+        self.concurrency = concurrency
+        self.retries = retries
+        self.chunk_size = chunk_size
+        self.requests = 0
+        # Shared by every chunk, so the first requests of a chunk still wait for the last
+        # ones of the previous chunk
+        self.limiter = AsyncRateLimiter(self.rate)
+
+    def geocode(self, locations, refresh=False):
+        """Return {location: (latitude, longitude) or None} for every location given."""
+        keys = {location: normalize_location(location) for location in locations}
+        results = {}
+        if not refresh:
+            cached = {
+                entry.key: entry
+                for entry in GeocodeCache.objects.filter(key__in=set(keys.values()))
+            }
+            for location, key in keys.items():
+                entry = cached.get(key)
+                if entry is not None:
+                    results[location] = (float(entry.latitude), float(entry.longitude)) if entry.latitude is not None else None
+
+        missing = [location for location in dict.fromkeys(locations) if location not in results]
+        for start in range(0, len(missing), self.chunk_size):
+            chunk = missing[start:start + self.chunk_size]
+            fetched = asyncio.run(self._fetch_all(chunk))
+            self._store(fetched, keys)
+            results.update(fetched)
+        return results
+
+    async def _fetch_all(self, locations):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(location):
+            async with semaphore:
+                for attempt in range(self.retries):
+                    await self.limiter.wait()
+                    self.requests += 1
+                    try:
+                        return location, await asyncio.to_thread(self.provider.geocode, location)
+                    except GeocodingError:
+                        await asyncio.sleep(2 ** attempt)
+                # Leave it uncached so the next run tries again
+                return location, GeocodingError
+
+        fetched = await asyncio.gather(*(fetch(location) for location in locations))
+        return {location: result for location, result in fetched if result is not GeocodingError}
+
+    def _store(self, fetched, keys):
+        entries = [
+            GeocodeCache(
+                key=keys[location][:255],
+                query=location[:255],
+                provider=self.provider.name,
+                latitude=round(coordinates[0], 6) if coordinates else None,
+                longitude=round(coordinates[1], 6) if coordinates else None,
+            )
+            for location, coordinates in fetched.items()
+        ]
+        GeocodeCache.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['query', 'provider', 'latitude', 'longitude', 'fetched_at'],
+        )
+
+
+def pending_locations():
+    """Distinct Property.location values without a geocoded Location row."""
+    geocoded = Location.objects.annotate(
+        full_name=Concat('name', Value(', '), 'region')
+    ).filter(full_name=OuterRef('location'), latitude__isnull=False, longitude__isnull=False)
+    return list(
+        Property.objects.exclude(location='')
+        .filter(~Exists(geocoded))
+        .values_list('location', flat=True)
+        .distinct()
+        .order_by('location')
+    )
+
+
+def save_locations(results):
+    """Create or update Location rows from geocode() results. Returns (created, updated)."""
+    existing = {(location.name, location.region): location for location in Location.objects.all()}
+    to_create, to_update = [], []
+    for full_name, coordinates in results.items():
+        if coordinates is None:
+            continue
+        name, region = split_location(full_name)
+        location = existing.get((name, region))
+        if location is None:
+            location = Location(name=name, region=region)
+            to_create.append(location)
+            existing[(name, region)] = location
+        elif location.pk is not None:
+            to_update.append(location)
+        location.latitude, location.longitude = round(coordinates[0], 6), round(coordinates[1], 6)
+
+    Location.objects.bulk_create(to_create)
+    Location.objects.bulk_update(to_update, ['latitude', 'longitude'])
+    return len(to_create), len(to_update)
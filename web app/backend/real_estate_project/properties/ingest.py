@@ -0,0 +1,206 @@
+import re
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_dataset_version
+from .models import Agency, Property, PropertyPriceHistory
+from .price_rollups import refresh_price_rollups
+from .vocabulary import rebuild_feature_vocabulary
+
+# Fields refreshed when a scraped listing already exists, as the CSV import always did
+UPSERT_FIELDS = ['price', 'last_updated', 'sold', 'agency']
+REQUIRED_FIELDS = ('title', 'location', 'details_link')
+
+
+def convert_to_int(value):
+    if value:
+        try:
+            return int(float(value))
+        except (ValueError, TypeError):
+            return None
+    return None
+
+
+def convert_to_float(value):
+    if value:
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            return None
+    return None
+
+
+def truncate(value, max_length):
+    if value and len(value) > max_length:
+        return value[:max_length]
+    return value
+
+
+def clean_price(value):
+    # 'Rs 12,500,000' from the spider, '12500000.0' from the cleaned CSVs
+    if value is None or value == '':
+        return None
+    return convert_to_float(str(value).replace('Rs', '').replace(',', '').strip())
+
+
+def clean_surface(value):
+    # '1,200 m²' -> 1200.0
+    if not value:
+        return None
+    return convert_to_float(re.sub(r'[^\d.]', '', str(value)))
+
+
+def extract_type(title):
+    # 'Apartment - Grand Baie' -> 'Apartment'
+    if isinstance(title, str):
+        return title.split(' - ')[0]
+    return 'Unknown'
+
+
+def join_list(value):
+    # Scrapy's CSV exporter joined list fields with ','; the vocabulary splits on it
+    if isinstance(value, (list, tuple)):
+        return ','.join(value)
+    return value or None
+
+
+def clean_row(raw):
+    """
+    Normalize a scraped listing (a spider item or a row of any of the scraping CSVs).
+
+    Applies what remove_duplicates.py and extract_type_csv.py did in pandas. Returns None
+    for rows without a ref, a parsable price or one of the required text fields.
+    """
+    ref = str(raw.get('ref') or '').strip()
+    if ref.endswith('.0'):
+        ref = ref[:-2]
+    price = clean_price(raw.get('price'))
+    if not ref or price is None or any(not raw.get(field) for field in REQUIRED_FIELDS):
+        return None
+
+    title = raw['title'].strip()
+    return {
+        'ref': truncate(ref, 50),
+        'price': price,
+        'title': truncate(title, 255),
+        'location': truncate(raw['location'].strip(), 255),
+        'details_link': raw['details_link'],
+        'description': join_list(raw.get('description')),
+        'agency_name': truncate(raw.get('agency') or raw.get('agency_name') or '', 255),
+        'agency_logo': raw.get('agency_logo') or None,
+        'contact_phone': truncate(raw.get('contact_phone') or None, 50),
+        'contact_email': truncate(raw.get('contact_email') or None, 50),
+        'contact_whatsapp': truncate(raw.get('contact_whatsapp') or None, 50),
+        'land_surface': clean_surface(raw.get('land_surface')),
+        'interior_surface': clean_surface(raw.get('interior_surface')),
+        'swimming_pool': truncate(raw.get('swimming_pool') or None, 50),
+        'construction_year': truncate(raw.get('construction_year') or None, 4),
+        'bedrooms': convert_to_int(raw.get('bedrooms')),
+        'accessible_to_foreigners': raw.get('accessible_to_foreigners') == 'Yes',
+        'bathrooms': convert_to_int(raw.get('bathrooms')),
+        'toilets': convert_to_int(raw.get('toilets')),
+        'aircon': raw.get('aircon') == 'Yes',
+        'general_features': join_list(raw.get('general_features')),
+        'indoor_features': join_list(raw.get('indoor_features')),
+        'outdoor_features': join_list(raw.get('outdoor_features')),
+        'location_description': join_list(raw.get('location_description')),
+        'type': truncate(raw.get('type') or extract_type(title), 50),
+    }
+
+
+def price_delta(previous_price, price):
+    """PropertyPriceHistory delta fields for a move from previous_price to price."""
+    previous_price, price = Decimal(str(previous_price)), Decimal(str(price))
+    change = price - previous_price
+    return {
+        'previous_price': previous_price,
+        'price_change': change,
+        'price_change_percentage': float(change / previous_price * 100) if previous_price else None,
+        'direction': 'up' if change > 0 else 'down' if change < 0 else '',
+    }
+
+
+def resolve_agencies(names):
+    """name -> Agency for every name, creating the missing ones."""
+    agencies = {}
+    for agency in Agency.objects.filter(name__in=names).order_by('-pk'):
+        agencies[agency.name] = agency  # lowest pk wins when names repeat
+    missing = [Agency(name=name) for name in names if name not in agencies]
+    for agency in Agency.objects.bulk_create(missing):
+        agencies[agency.name] = agency
+    return agencies
+
+
+def upsert_properties(rows, now=None, batch_size=1000):
+    """
+    Insert or refresh cleaned rows with multi-row INSERT ... ON CONFLICT (ref) DO UPDATE.
+
+    A price that differs from the stored one adds a PropertyPriceHistory row carrying the
+    delta against the stored price. Rows repeating a ref within the batch collapse to the
+    last one. The batch is one transaction, so a new price is never stored without its
+    history row. Returns (inserted, updated, price_changes).
+    """
+    now = now or timezone.now()
+    rows = list({row['ref']: row for row in rows}.values())
+    if not rows:
+        return 0, 0, 0
+
+    with transaction.atomic():
+        agencies = resolve_agencies({row['agency_name'] for row in rows})
+        previous = dict(Property.objects.filter(ref__in=[row['ref'] for row in rows]).values_list('ref', 'price'))
+        properties = [
+            Property(**row, agency=agencies[row['agency_name']], last_updated=now, sold=False)
+            for row in rows
+        ]
+        Property.objects.bulk_create(
+            properties,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['ref'],
+            update_fields=UPSERT_FIELDS,
+        )
+
+        price_history = [
+            PropertyPriceHistory(property_id=property.pk, price=property.price, **price_delta(previous[property.ref], property.price))
+            for property in properties
+            if property.ref in previous and float(previous[property.ref]) != property.price
+        ]
+        PropertyPriceHistory.objects.bulk_create(price_history, batch_size=batch_size)
+
+    updated = sum(1 for row in rows if row['ref'] in previous)
+    return len(rows) - updated, updated, len(price_history)
+
+
+def touch_listings(refs, now=None, batch_size=5000):
+    """
+    Record listings an incremental crawl saw but skipped as unchanged, so finalize_import
+    does not take them for delisted. Returns the number of rows updated.
+    """
+    now = now or timezone.now()
+    refs = list(refs)
+    updated = 0
+    for start in range(0, len(refs), batch_size):
+        updated += Property.objects.filter(ref__in=refs[start:start + batch_size]).update(last_updated=now)
+    return updated
+
+
+def finalize_import(now=None, mark_sold=True):
+    """
+    Post-import bookkeeping shared by import_properties and the spider pipeline: mark
+    listings unseen for six months as sold, rebuild the feature vocabulary, refresh the
+    price rollups for the history written since `now` and invalidate cached dashboards
+    once the surrounding transaction commits. Returns the sold count.
+
+    mark_sold=False skips the sold pass, for imports that did not see every listing.
+    """
+    now = now or timezone.now()
+    marked_sold = 0
+    if mark_sold:
+        six_months_ago = now - timezone.timedelta(days=180)
+        marked_sold = Property.objects.filter(last_updated__lt=six_months_ago, sold=False).update(sold=True)
+    rebuild_feature_vocabulary()
+    refresh_price_rollups(since=now)
+    transaction.on_commit(bump_dataset_version)
+    return marked_sold
@@ -0,0 +1,100 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from properties.models import Property, PropertyPriceHistory
+
+DEFAULT_OUTPUT_DIR = os.path.join(settings.BASE_DIR, '..', '..', '..', 'tools', 'snapshot')
+
+PROPERTY_COLUMNS = [
+    ('id', 'id'),
+    ('ref', 'ref'),
+    ('title', 'title'),
+    ('location', 'location'),
+    ('region_name', 'region__name'),
+    ('type', 'type'),
+    ('agency', 'agency_name'),
+    ('price', 'price'),
+    ('interior_surface', 'interior_surface'),
+    ('land_surface', 'land_surface'),
+    ('bedrooms', 'bedrooms'),
+    ('bathrooms', 'bathrooms'),
+    ('toilets', 'toilets'),
+    ('construction_year', 'construction_year'),
+    ('swimming_pool', 'swimming_pool'),
+    ('accessible_to_foreigners', 'accessible_to_foreigners'),
+    ('aircon', 'aircon'),
+    ('description', 'description'),
+    ('general_features', 'general_features'),
+    ('indoor_features', 'indoor_features'),
+    ('outdoor_features', 'outdoor_features'),
+    ('details_link', 'details_link'),
+    ('sold', 'sold'),
+    ('date_added', 'date_added'),
+    ('last_updated', 'last_updated'),
+]
+CATEGORICAL_COLUMNS = ['location', 'region', 'type', 'agency', 'swimming_pool']
+
+
+def build_properties_frame(rows):
+    df = pd.DataFrame.from_records(rows, columns=[name for name, _ in PROPERTY_COLUMNS])
+
+    # Region as the tools derived it: the FK when set, else the part after the last comma
+    from_location = df['location'].str.rpartition(',')[2].str.strip()
+    df['region'] = df.pop('region_name').fillna(from_location).replace('', 'Unknown')
+
+    for column in ('price', 'interior_surface', 'land_surface'):
+        df[column] = df[column].astype(np.float64)  # Decimal / None -> float / NaN
+    for column in ('bedrooms', 'bathrooms', 'toilets'):
+        df[column] = df[column].astype('Int16')
+    df['construction_year'] = pd.to_numeric(df['construction_year'], errors='coerce').astype('Int16')
+    df['id'] = df['id'].astype(np.int32)
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype('category')
+    return df
+
+
+def write_parquet(df, path):
+    # Readers never see a half written file
+    tmp_path = f'{path}.tmp'
+    df.to_parquet(tmp_path, index=False, compression='zstd')
+    os.replace(tmp_path, path)
+
+
+class Command(BaseCommand):
+    help = 'Export the cleaned, typed property table and price history to Parquet for the analysis tools'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', type=str, default=DEFAULT_OUTPUT_DIR, help='Directory for properties.parquet and price_history.parquet')
+        parser.add_argument('--unsold-only', action='store_true')
+
+    def handle(self, *args, **options):
+        output = os.path.abspath(options['output'])
+        os.makedirs(output, exist_ok=True)
+
+        start = time.perf_counter()
+        properties = Property.objects.order_by('id')
+        if options['unsold_only']:
+            properties = properties.filter(sold=False)
+        rows = list(properties.values_list(*(field for _, field in PROPERTY_COLUMNS)).iterator(chunk_size=10000))
+        df = build_properties_frame(rows)
+        write_parquet(df, os.path.join(output, 'properties.parquet'))
+
+        history = PropertyPriceHistory.objects.order_by('property_id', 'date')
+        if options['unsold_only']:
+            history = history.filter(property__sold=False)
+        history_df = pd.DataFrame.from_records(
+            list(history.values_list('property_id', 'price', 'date').iterator(chunk_size=10000)),
+            columns=['property_id', 'price', 'date'],
+        )
+        history_df['property_id'] = history_df['property_id'].astype(np.int32)
+        history_df['price'] = history_df['price'].astype(np.float64)
+        write_parquet(history_df, os.path.join(output, 'price_history.parquet'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {len(df)} properties and {len(history_df)} price changes to {output} '
+            f'in {time.perf_counter() - start:.2f}s'
+        ))
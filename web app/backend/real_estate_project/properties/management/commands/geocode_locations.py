@@ -0,0 +1,53 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from properties.geocoding import FixtureProvider, Geocoder, NominatimProvider, pending_locations, save_locations
+
+DEFAULT_FIXTURE = os.path.join(settings.BASE_DIR, 'location_coordinates.csv')
+
+
+class Command(BaseCommand):
+    help = 'Geocode property locations that have no coordinates yet and store them as Location rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('locations', nargs='*', help="Locations to geocode ('Name, Region'); defaults to every pending property location")
+        parser.add_argument('--provider', choices=['nominatim', 'fixture'], default='nominatim')
+        parser.add_argument('--fixture', type=str, default=DEFAULT_FIXTURE, help='CSV used by the fixture provider')
+        parser.add_argument('--rate', type=float, default=None, help='Maximum provider requests per second (default: GEOCODING_RATE)')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--retries', type=int, default=3)
+        parser.add_argument('--limit', type=int, default=None)
+        parser.add_argument('--refresh', action='store_true', help='Ignore cached results, including cached misses')
+
+    def handle(self, *args, **options):
+        if options['provider'] == 'fixture':
+            if not os.path.exists(options['fixture']):
+                raise CommandError(f"Fixture {options['fixture']} does not exist")
+            provider = FixtureProvider(options['fixture'])
+        else:
+            provider = NominatimProvider()
+
+        locations = options['locations'] or pending_locations()
+        if options['limit']:
+            locations = locations[:options['limit']]
+        self.stdout.write(self.style.NOTICE(f'Locations to geocode: {len(locations)}'))
+        if not locations:
+            return
+
+        geocoder = Geocoder(provider, rate=options['rate'], concurrency=options['concurrency'], retries=options['retries'])
+        start = time.perf_counter()
+        results = geocoder.geocode(locations, refresh=options['refresh'])
+        created, updated = save_locations(results)
+
+        found = sum(1 for coordinates in results.values() if coordinates is not None)
+        for location in locations:
+            if location not in results:
+                self.stdout.write(self.style.ERROR(f'Failed to geocode {location}'))
+            elif results[location] is None:
+                self.stdout.write(self.style.WARNING(f'No coordinates found for {location}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Geocoded {found}/{len(locations)} locations with {geocoder.requests} provider requests '
+            f'in {time.perf_counter() - start:.1f}s. Created {created} and updated {updated} locations.'
+        ))
@@ -1,73 +1,129 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
 import requests
 from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from django.utils import timezone
+from properties.cache import bump_dataset_version
 from properties.models import Property
-import time
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least 1 / rate seconds apart, across all workers."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, host):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def is_sold(details_link, response):
+    # Sold listings redirect back to the search results instead of the detail page
+    return response.status_code == 200 and 'en/buy-mauritius/' in response.url and response.url != details_link
+
 
 class Command(BaseCommand):
-    help = 'Update sold properties based on their detail link'
-
-    def handle(self, *args, **kwargs):
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-
-        # Load checked properties from a file
-        checked_ids = set()
-        try:
-            with open('checked_properties.txt', 'r') as file:
-                data = file.read().strip()
-                if data:
-                    checked_ids = set(map(int, data.split()))
-                else:
-                    self.stdout.write(self.style.NOTICE('checked_properties.txt is empty, checking all properties.'))
-        except FileNotFoundError:
-            self.stdout.write(self.style.NOTICE('checked_properties.txt not found, checking all properties.'))
-
-        # Debug: Print total properties in the database
-        total_properties_in_db = Property.objects.count()
-        self.stdout.write(self.style.NOTICE(f'Total properties in the database: {total_properties_in_db}'))
-
-        # Fetch all properties, excluding the ones already checked
-        if checked_ids:
-            properties_to_check = Property.objects.exclude(id__in=checked_ids)
-        else:
-            properties_to_check = Property.objects.all()
-
-        total_properties = properties_to_check.count()
-        updated_properties = 0
+    help = 'Check unsold listings for removal, most stale first, with a bounded and rate limited worker pool'
 
-        self.stdout.write(self.style.NOTICE(f'Total properties to check: {total_properties}'))
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--rate', type=float, default=2.0, help='Maximum requests per second per host')
+        parser.add_argument('--max-age', type=float, default=None, help='Only re-check listings not verified in this many days')
+        parser.add_argument('--limit', type=int, default=None, help='Maximum number of listings to check this run')
+        parser.add_argument('--batch-size', type=int, default=200, help='Checkpoint results to the database every N listings')
+        parser.add_argument('--timeout', type=float, default=15.0)
+
+    def handle(self, *args, **options):
+        properties_to_check = Property.objects.filter(sold=False)
+        if options['max_age'] is not None:
+            cutoff = timezone.now() - timezone.timedelta(days=options['max_age'])
+            properties_to_check = properties_to_check.filter(Q(last_checked_at__isnull=True) | Q(last_checked_at__lt=cutoff))
+        # Never-checked listings first, then the longest unverified
+        properties_to_check = properties_to_check.order_by(F('last_checked_at').asc(nulls_first=True), 'id')
+        if options['limit']:
+            properties_to_check = properties_to_check[:options['limit']]
+        properties_to_check = list(properties_to_check.only('id', 'details_link', 'last_checked_at', 'last_status', 'sold'))
 
+        total_properties = len(properties_to_check)
+        self.stdout.write(self.style.NOTICE(f'Total properties to check: {total_properties}'))
         if total_properties == 0:
             self.stdout.write(self.style.NOTICE('No properties to check.'))
             return
 
-        for property in properties_to_check:
-            try:
-                response = requests.get(property.details_link, headers=headers)
-                if response.status_code == 200:
-                    print(f'Checking property {property.id} {property.details_link}')
-                    if 'en/buy-mauritius/' in response.url:
-                        if response.url != property.details_link:
-                            property.sold = True
-                            property.save()
-                            updated_properties += 1
-                            self.stdout.write(self.style.SUCCESS(f'Updated property {property.id} as sold.'))
-                    else:
-                        self.stdout.write(self.style.NOTICE(f'Property {property.id} remains unsold.'))
-                        
-                else:
+        limiter = HostRateLimiter(options['rate'])
+        local = threading.local()
+        timeout = options['timeout']
+
+        def check(property):
+            # One keep-alive session per worker thread
+            session = getattr(local, 'session', None)
+            if session is None:
+                session = local.session = requests.Session()
+                session.headers.update(HEADERS)
+
+            limiter.wait(urlparse(property.details_link).netloc)
+            response = session.head(property.details_link, allow_redirects=True, timeout=timeout)
+            if response.status_code in (405, 501):
+                # HEAD not supported: stream the GET so only the headers are read
+                limiter.wait(urlparse(property.details_link).netloc)
+                response = session.get(property.details_link, allow_redirects=True, timeout=timeout, stream=True)
+                response.close()
+            return response
+
+        pending = []
+        checked = updated_properties = failed = 0
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {executor.submit(check, property): property for property in properties_to_check}
+            for future in as_completed(futures):
+                property = futures[future]
+                try:
+                    response = future.result()
+                except requests.RequestException as e:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f'Error fetching URL for property {property.id}: {e}'))
+                    continue
+
+                property.last_checked_at = timezone.now()
+                property.last_status = response.status_code
+                if is_sold(property.details_link, response):
+                    property.sold = True
+                    updated_properties += 1
+                elif response.status_code != 200:
                     self.stdout.write(self.style.WARNING(f'Failed to fetch URL for property {property.id}: Status Code {response.status_code}'))
+                pending.append(property)
+                checked += 1
 
-                # Add the checked property ID to the set
-                checked_ids.add(property.id)
-                time.sleep(2)
+                if len(pending) >= options['batch_size']:
+                    self.checkpoint(pending)
+                    pending = []
+                    self.stdout.write(f'Checked {checked}/{total_properties} ({checked / (time.perf_counter() - started):.1f}/s)')
 
-            except requests.RequestException as e:
-                self.stdout.write(self.style.ERROR(f'Error fetching URL for property {property.id}: {e}'))
+        self.checkpoint(pending)
+        if updated_properties:
+            bump_dataset_version()
 
-            # Save the updated set of checked property IDs to a file after each iteration
-            with open('checked_properties.txt', 'w') as file:
-                file.write(' '.join(map(str, checked_ids)))
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {checked} properties in {time.perf_counter() - started:.0f}s. '
+            f'Updated {updated_properties} properties as sold, {failed} failed.'
+        ))
 
-        self.stdout.write(self.style.SUCCESS(f'Processed {total_properties} properties. Updated {updated_properties} properties as sold.'))
+    def checkpoint(self, properties):
+        if properties:
+            Property.objects.bulk_update(properties, ['last_checked_at', 'last_status', 'sold'])
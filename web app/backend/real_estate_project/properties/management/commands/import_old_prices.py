@@ -1,67 +1,103 @@
-import pandas as pd
-import psycopg2
-from psycopg2 import sql
+import io
+import time
 from datetime import datetime
 
-# Database connection parameters
-DATABASE = "real_estate_db"
-USER = "root"
-PASSWORD = "root"
-HOST = "localhost"
-PORT = ""
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from properties.cache import bump_dataset_version
+from properties.models import Property
+from properties.price_rollups import refresh_price_rollups
+
+STAGING_TABLE = 'import_old_prices_staging'
+
+# Rows already in the history with the same (property, date, price) are skipped, so
+# re-running a backfill is a no-op
+INSERT_SQL = f"""
+    INSERT INTO properties_propertypricehistory (property_id, price, date, direction)
+    SELECT DISTINCT s.property_id, s.price, s.date, ''
+    FROM {STAGING_TABLE} s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM properties_propertypricehistory h
+        WHERE h.property_id = s.property_id AND h.date = s.date AND h.price = s.price
+    )
+"""
+
+# Fill the deltas of the backfilled properties' rows that don't have one yet, from the
+# row before them. Deltas written at import time are left alone.
+DELTA_SQL = f"""
+    UPDATE properties_propertypricehistory AS h
+    SET previous_price = d.previous_price,
+        price_change = h.price - d.previous_price,
+        price_change_percentage = CASE WHEN d.previous_price <> 0
+            THEN ((h.price - d.previous_price) / d.previous_price * 100)::double precision END,
+        direction = CASE WHEN h.price > d.previous_price THEN 'up'
+            WHEN h.price < d.previous_price THEN 'down' ELSE '' END
+    FROM (
+        SELECT id, LAG(price) OVER (PARTITION BY property_id ORDER BY date, id) AS previous_price
+        FROM properties_propertypricehistory
+        WHERE property_id IN (SELECT property_id FROM {STAGING_TABLE})
+    ) AS d
+    WHERE h.id = d.id AND h.previous_price IS NULL AND d.previous_price IS NOT NULL
+"""
+
 
-# Read the CSV file
-csv_file_path = '/Users/gabrielmayer/Desktop/real estate micro Saas/web app/backend/real_estate_project/properties/management/commands/cleaned_properties_1.csv'
-data = pd.read_csv(csv_file_path)
+class Command(BaseCommand):
+    help = 'Backfill PropertyPriceHistory from an older cleaned CSV (ref, price) with COPY'
 
-# Clean the price column
-data['price'] = pd.to_numeric(data['price'], errors='coerce')
+    def add_arguments(self, parser):
+        parser.add_argument('--csv', type=str, required=True, help='CSV with at least ref and price columns')
+        parser.add_argument('--date', type=str, required=True, help='YYYY-MM-DD the CSV prices were observed on')
 
-# Filter out rows with invalid prices
-data = data.dropna(subset=['price'])
+    def handle(self, *args, **options):
+        try:
+            target_date = timezone.make_aware(datetime.strptime(options['date'], '%Y-%m-%d'))
+        except ValueError:
+            raise CommandError('--date must be YYYY-MM-DD')
 
-# Convert 'ref' to string, strip leading/trailing whitespaces, and remove .0
-data['ref'] = data['ref'].astype(str).str.strip().str.replace('.0$', '', regex=True)
+        start = time.perf_counter()
+        data = self.read_prices(options['csv'])
 
-# Define the target date for the price history records
-target_date = datetime(2024, 6, 28)
+        # One query for the whole ref -> id map, joined in pandas instead of a lookup per row
+        properties = pd.DataFrame.from_records(
+            Property.objects.values_list('ref', 'id').iterator(chunk_size=10000), columns=['ref', 'property_id'],
+        )
+        history = data.merge(properties, on='ref', how='inner')
+        unmatched = len(data) - len(history)
+        history = history.drop_duplicates(subset=['property_id', 'price'])
+        history['date'] = target_date.isoformat()
 
-# Establish a database connection
-conn = psycopg2.connect(database=DATABASE, user=USER, password=PASSWORD, host=HOST, port=PORT)
-cursor = conn.cursor()
+        buffer = io.StringIO()
+        history[['property_id', 'price', 'date']].to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
 
-# Loop through the data and insert price history records
-for index, row in data.iterrows():
-    property_ref = row['ref']
-    price = row['price']
-    
-    # Log the property_ref for debugging
-    print(f"Looking up property with ref: {property_ref}")
-    
-    # Find the corresponding property ID
-    cursor.execute(sql.SQL("SELECT id FROM properties_property WHERE ref = %s"), [property_ref])
-    property_id = cursor.fetchone()
-    
-    # Log the result of the database query
-    if property_id:
-        print(f"Found property ID: {property_id[0]}")
-    else:
-        print(f"No property found with ref: {property_ref}")
-    
-    if property_id:
-        property_id = property_id[0]
-        
-        # Insert the price history record
-        cursor.execute(sql.SQL("""
-            INSERT INTO properties_propertypricehistory (property_id, price, date)
-            VALUES (%s, %s, %s)
-        """), [property_id, price, target_date])
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE TEMP TABLE {STAGING_TABLE} (property_id bigint, price numeric(20, 2), date timestamptz) ON COMMIT DROP'
+                )
+                cursor.cursor.copy_expert(f'COPY {STAGING_TABLE} (property_id, price, date) FROM STDIN WITH (FORMAT csv)', buffer)
+                cursor.execute(INSERT_SQL)
+                inserted = cursor.rowcount
+                cursor.execute(DELTA_SQL)
+            refresh_price_rollups(since=target_date)
+            transaction.on_commit(bump_dataset_version)
 
-# Commit the transaction
-conn.commit()
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {inserted} price history rows dated {options["date"]} '
+            f'({len(history) - inserted} already present, {unmatched} unknown refs) '
+            f'in {time.perf_counter() - start:.2f}s'
+        ))
 
-# Close the database connection
-cursor.close()
-conn.close()
+    def read_prices(self, path):
+        try:
+            data = pd.read_csv(path, usecols=['ref', 'price'], dtype={'ref': str})
+        except FileNotFoundError:
+            raise CommandError(f'{path} not found')
 
-print("Price history records imported successfully.")
+        # Same cleaning as before: numeric prices only, refs stripped of whitespace and '.0'
+        data['price'] = pd.to_numeric(data['price'], errors='coerce')
+        data = data.dropna(subset=['price', 'ref'])
+        data['ref'] = data['ref'].str.strip().str.replace(r'\.0$', '', regex=True)
+        return data
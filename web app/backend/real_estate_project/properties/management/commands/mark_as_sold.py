@@ -1,5 +1,6 @@
 import csv
 from django.core.management.base import BaseCommand
+from properties.cache import bump_dataset_version
 from properties.models import Property
 
 class Command(BaseCommand):
@@ -22,5 +23,6 @@ class Command(BaseCommand):
         # Find and mark properties as sold if their ref is not in the current_refs
         properties_to_update = Property.objects.exclude(ref__in=current_refs)
         updated_count = properties_to_update.update(sold=True)
+        bump_dataset_version()
         
         self.stdout.write(self.style.SUCCESS(f'Successfully marked {updated_count} properties as sold.'))
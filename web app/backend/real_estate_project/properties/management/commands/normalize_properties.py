@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery
+from django.db.models.functions import Left, Length
+from properties.cache import bump_dataset_version
+from properties.models import Agency, Property
+
+
+class Command(BaseCommand):
+    help = 'Normalize property data with set-based UPDATEs (surfaces, refs and agency links)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Run every step and report affected rows, then roll back')
+
+    def handle(self, *args, **options):
+        steps = [
+            ('interior_surface', self.clean_interior_surface),
+            ('land_surface', self.clean_land_surface),
+            ('ref', self.remove_dot_zero),
+            ('agency', self.replace_agency_id),
+        ]
+        total = 0
+        started = time.perf_counter()
+
+        # A dry run executes the same statements so counts and timings are real, then rolls back
+        with transaction.atomic():
+            for name, step in steps:
+                start = time.perf_counter()
+                affected = step()
+                total += affected
+                self.stdout.write(f'{name:<18} {affected:>8} rows {time.perf_counter() - start:>8.2f}s')
+            if options['dry_run']:
+                transaction.set_rollback(True)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Dry run: {total} rows would be updated. No changes were saved.'))
+            return
+        if total:
+            bump_dataset_version()
+        self.stdout.write(self.style.SUCCESS(f'Normalized {total} rows in {time.perf_counter() - started:.2f}s'))
+
+    def clean_interior_surface(self):
+        # Missing surfaces used to be stored as 0; NULL keeps them out of averages and per m² prices
+        return Property.objects.filter(interior_surface__lte=0).update(interior_surface=None)
+
+    def clean_land_surface(self):
+        return Property.objects.filter(land_surface__lte=0).update(land_surface=None)
+
+    def remove_dot_zero(self):
+        # Refs read from floats in the CSV ('1234.0'); skip any whose clean ref already exists
+        stripped = Left(OuterRef('ref'), Length(OuterRef('ref')) - 2)
+        conflicts = Property.objects.filter(ref=stripped)
+        skipped = Property.objects.filter(ref__endswith='.0').filter(Exists(conflicts)).count()
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'{skipped} refs ending in .0 already exist without the suffix and were left as is'))
+        return (
+            Property.objects.filter(ref__endswith='.0')
+            .filter(~Exists(conflicts))
+            .update(ref=Left('ref', Length('ref') - 2))
+        )
+
+    def replace_agency_id(self):
+        agency_id = Subquery(Agency.objects.filter(name=OuterRef('agency_name')).order_by('id').values('id')[:1])
+        known = Exists(Agency.objects.filter(name=OuterRef('agency_name')))
+        missing = Property.objects.exclude(agency_name='').filter(~known).count()
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{missing} properties have an agency name with no matching agency'))
+        return Property.objects.filter(known).exclude(agency_id=agency_id).update(agency_id=agency_id)
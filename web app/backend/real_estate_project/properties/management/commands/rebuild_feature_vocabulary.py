@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from properties.vocabulary import rebuild_feature_vocabulary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the FeatureTerm vocabulary served by /api/distinct_features/'
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_feature_vocabulary()
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt feature vocabulary with {count} terms'))
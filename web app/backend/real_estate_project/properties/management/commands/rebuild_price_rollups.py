@@ -0,0 +1,29 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from properties.cache import bump_dataset_version
+from properties.price_rollups import refresh_price_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily and monthly price rollups behind the market evolution charts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=str, help='YYYY-MM-DD; only rebuild buckets from this month on (default: everything)')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = timezone.make_aware(datetime.strptime(options['since'], '%Y-%m-%d'))
+            except ValueError:
+                raise CommandError('--since must be YYYY-MM-DD')
+
+        start = time.perf_counter()
+        rows = refresh_price_rollups(since)
+        bump_dataset_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rows} price rollup rows in {time.perf_counter() - start:.2f}s'
+        ))
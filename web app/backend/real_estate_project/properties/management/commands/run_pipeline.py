@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from properties.models import PipelineRun
+from properties.pipeline import PipelineRunner, nightly_steps
+
+
+class Command(BaseCommand):
+    help = 'Run the nightly crawl and refresh steps as a dependency graph, logging each step to PipelineStepRun'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resume', nargs='?', const='latest', default=None,
+                            help='Skip the steps that succeeded in a failed run (default: the latest one)')
+        parser.add_argument('--workers', type=int, default=None, help='Steps run concurrently (default: PIPELINE_WORKERS)')
+        parser.add_argument('--full-crawl', action='store_true', default=None,
+                            help='Crawl every page and mark unseen listings sold (default: only on PIPELINE_FULL_CRAWL_WEEKDAY)')
+        parser.add_argument('--list', action='store_true', help='Print the steps and their dependencies and exit')
+
+    def handle(self, *args, **options):
+        steps = nightly_steps(full_crawl=options['full_crawl'])
+        if options['list']:
+            for step in steps:
+                self.stdout.write(f"{step.name:<32} <- {', '.join(step.depends_on) or '-'}")
+            return
+
+        resume = None
+        if options['resume']:
+            runs = PipelineRun.objects.filter(status=PipelineRun.FAILED).order_by('-started_at')
+            resume = runs.first() if options['resume'] == 'latest' else runs.filter(pk=options['resume']).first()
+            if resume is None:
+                raise CommandError(f"No failed pipeline run to resume ({options['resume']})")
+
+        runner = PipelineRunner(steps, workers=options['workers'], log=self.stdout.write)
+        pipeline_run = runner.run(resume=resume)
+
+        for step in pipeline_run.steps.order_by('id'):
+            duration = f'{step.duration_seconds:.1f}s' if step.duration_seconds is not None else '-'
+            rows = step.rows if step.rows is not None else '-'
+            self.stdout.write(f'{step.step:<32} {step.status:<13} {duration:>9} {rows:>9}')
+        if pipeline_run.status == PipelineRun.FAILED:
+            raise CommandError(f'Pipeline run {pipeline_run.pk} failed; rerun with --resume {pipeline_run.pk}')
+        self.stdout.write(self.style.SUCCESS(f'Pipeline run {pipeline_run.pk} succeeded'))
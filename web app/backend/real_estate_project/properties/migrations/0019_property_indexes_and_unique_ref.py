@@ -0,0 +1,67 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+def merge_duplicate_refs(apps, schema_editor):
+    # ref becomes unique: keep the most recently updated row per ref, which holds the
+    # latest scraped price and fields, and move the price history of the duplicates onto
+    # it before deleting them
+    Property = apps.get_model('properties', 'Property')
+    PropertyPriceHistory = apps.get_model('properties', 'PropertyPriceHistory')
+
+    duplicates = Property.objects.values('ref').annotate(count_ref=models.Count('id')).filter(count_ref__gt=1)
+    for duplicate in duplicates:
+        ids = list(
+            Property.objects.filter(ref=duplicate['ref']).order_by('-last_updated', '-id').values_list('id', flat=True)
+        )
+        keep_id, drop_ids = ids[0], ids[1:]
+        PropertyPriceHistory.objects.filter(property_id__in=drop_ids).update(property_id=keep_id)
+        Property.objects.filter(id__in=drop_ids).delete()
+
+    # The foreign keys are DEFERRABLE INITIALLY DEFERRED: fire their pending checks now,
+    # or the ALTER TABLEs below fail with "pending trigger events"
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0018_property_agency'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(merge_duplicate_refs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='property',
+            name='ref',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['sold', 'type', 'region'], name='property_sold_type_region_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('sold', False)), fields=['type', 'region'], name='property_unsold_type_reg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('sold', False)), fields=['-date_added', 'id'], name='property_unsold_added_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('location'), name='gin_trgm_ops'), name='property_location_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), name='property_title_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertypricehistory',
+            index=models.Index(fields=['property', 'date'], name='pricehistory_property_date_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0020_datasetversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeatureTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('description', 'Description feature'), ('general', 'General feature'), ('type', 'Property type'), ('location', 'Location'), ('region', 'Region')], max_length=20)),
+                ('term', models.CharField(max_length=255)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'term'), name='featureterm_kind_term_unique')],
+            },
+        ),
+    ]
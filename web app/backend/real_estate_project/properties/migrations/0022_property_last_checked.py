@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0021_featureterm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='last_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='last_status',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('sold', False)), fields=['last_checked_at'], name='property_unsold_checked_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0022_property_last_checked'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pricepersquaremeter',
+            name='property_type',
+            field=models.CharField(blank=True, choices=[('House', 'House'), ('Apartment', 'Apartment'), ('Land', 'Land'), ('Commercial Land', 'Commercial Land')], max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='pricepersquaremeter',
+            name='region',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='properties.region'),
+        ),
+        migrations.AlterField(
+            model_name='pricepersquaremeter',
+            name='price_per_square_meter',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='pricepersquaremeter',
+            name='location',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='pricepersquaremeter',
+            name='median',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pricepersquaremeter',
+            name='p25',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pricepersquaremeter',
+            name='p75',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pricepersquaremeter',
+            name='count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pricepersquaremeter',
+            name='listing_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pricepersquaremeter',
+            name='avg_interior_surface',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pricepersquaremeter',
+            name='interior_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pricepersquaremeter',
+            name='avg_land_surface',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pricepersquaremeter',
+            name='land_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='pricepersquaremeter',
+            index=models.Index(fields=['property_type', 'region', 'location'], name='ppsm_type_region_location_idx'),
+        ),
+    ]
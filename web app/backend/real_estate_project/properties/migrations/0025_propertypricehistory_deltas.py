@@ -0,0 +1,53 @@
+from django.db import migrations, models
+
+# Every history row is a price change written by the import, so the row before it (by
+# date, then id) holds the previous price. The first row of each property has none.
+BACKFILL_SQL = """
+UPDATE properties_propertypricehistory AS h
+SET previous_price = d.previous_price,
+    price_change = h.price - d.previous_price,
+    price_change_percentage = CASE WHEN d.previous_price <> 0
+        THEN ((h.price - d.previous_price) / d.previous_price * 100)::double precision END,
+    direction = CASE WHEN h.price > d.previous_price THEN 'up'
+        WHEN h.price < d.previous_price THEN 'down' ELSE '' END
+FROM (
+    SELECT id, LAG(price) OVER (PARTITION BY property_id ORDER BY date, id) AS previous_price
+    FROM properties_propertypricehistory
+) AS d
+WHERE h.id = d.id AND d.previous_price IS NOT NULL
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0024_geocodecache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertypricehistory',
+            name='previous_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertypricehistory',
+            name='price_change',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertypricehistory',
+            name='price_change_percentage',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertypricehistory',
+            name='direction',
+            field=models.CharField(blank=True, choices=[('up', 'Up'), ('down', 'Down')], default='', max_length=4),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='propertypricehistory',
+            index=models.Index(condition=models.Q(('previous_price__isnull', False)), fields=['-date', '-id'], name='pricehistory_change_date_idx'),
+        ),
+    ]
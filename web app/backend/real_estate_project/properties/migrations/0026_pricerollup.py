@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0025_propertypricehistory_deltas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('property_type', models.CharField(blank=True, max_length=50)),
+                ('region', models.CharField(blank=True, max_length=100)),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('sum_price', models.DecimalField(decimal_places=2, max_digits=24)),
+                ('avg_price', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('median_price', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('period', 'property_type', 'region', 'location', 'period_start'), name='pricerollup_bucket_unique')],
+                'indexes': [models.Index(fields=['period_start'], name='pricerollup_period_start_idx')],
+            },
+        ),
+    ]
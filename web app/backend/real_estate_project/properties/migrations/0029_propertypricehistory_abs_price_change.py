@@ -0,0 +1,21 @@
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0028_pipelinerun_pipelinesteprun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertypricehistory',
+            name='abs_price_change',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.math.Abs('price_change'), output_field=models.DecimalField(decimal_places=2, max_digits=20, null=True)),
+        ),
+        migrations.AddIndex(
+            model_name='propertypricehistory',
+            index=models.Index(condition=models.Q(('previous_price__isnull', False)), fields=['-abs_price_change', '-id'], name='pricehistory_abs_change_idx'),
+        ),
+    ]
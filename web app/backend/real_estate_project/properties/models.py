@@ -1,4 +1,7 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Abs, Upper
 
 class Region(models.Model):
     name = models.CharField(max_length=100)
@@ -54,10 +57,27 @@ class Property(models.Model):
     outdoor_features = models.TextField(null=True, blank=True)
     location_description = models.TextField(null=True, blank=True)
     type = models.CharField(max_length=50, choices=PROPERTY_TYPES)
-    ref = models.CharField(max_length=50)
+    ref = models.CharField(max_length=50, unique=True)
     sold = models.BooleanField(default=False)
     last_updated = models.DateTimeField(auto_now=True)
     date_added = models.DateTimeField(auto_now_add=True)  
+    # Liveness checkpoint written by get_unsold
+    last_checked_at = models.DateTimeField(null=True, blank=True)
+    last_status = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sold', 'type', 'region'], name='property_sold_type_region_idx'),
+            # Dashboards only look at unsold listings, which are a shrinking share of the table
+            models.Index(fields=['type', 'region'], condition=Q(sold=False), name='property_unsold_type_reg_idx'),
+            models.Index(fields=['-date_added', 'id'], condition=Q(sold=False), name='property_unsold_added_idx'),
+            # Keyset order of the sold archive
+            models.Index(fields=['-date_added', 'id'], condition=Q(sold=True), name='property_sold_added_idx'),
+            models.Index(fields=['last_checked_at'], condition=Q(sold=False), name='property_unsold_checked_idx'),
+            # icontains compiles to UPPER(col) LIKE UPPER(%s), so the trigram indexes are on UPPER(col)
+            GinIndex(OpClass(Upper('location'), name='gin_trgm_ops'), name='property_location_trgm_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='property_title_trgm_idx'),
+        ]
 
     def location_name(self):
         return self.location.split(',')[0].strip() if ',' in self.location else self.location
@@ -68,9 +88,34 @@ class Property(models.Model):
         return self.title
 
 class PropertyPriceHistory(models.Model):
+    DIRECTIONS = [
+        ('up', 'Up'),
+        ('down', 'Down'),
+    ]
+
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='price_history')
     price = models.DecimalField(max_digits=20, decimal_places=2)
     date = models.DateTimeField(auto_now_add=True)
+    # Delta against the price this row replaced, written at import time so the price-change
+    # feed never has to look up the previous row. NULL when that price is unknown.
+    previous_price = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True)
+    price_change = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True)
+    price_change_percentage = models.FloatField(null=True, blank=True)
+    direction = models.CharField(max_length=4, choices=DIRECTIONS, blank=True, default='')
+    # Stored so the feed can page "largest changes first" on an index
+    abs_price_change = models.GeneratedField(
+        expression=Abs('price_change'),
+        output_field=models.DecimalField(max_digits=20, decimal_places=2, null=True),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'date'], name='pricehistory_property_date_idx'),
+            # Keyset orders of the price-change feed, restricted to rows with a known delta
+            models.Index(fields=['-date', '-id'], condition=Q(previous_price__isnull=False), name='pricehistory_change_date_idx'),
+            models.Index(fields=['-abs_price_change', '-id'], condition=Q(previous_price__isnull=False), name='pricehistory_abs_change_idx'),
+        ]
 
     def __str__(self):
         return f"{self.property.title} - {self.price} on {self.date}"
@@ -83,12 +128,30 @@ class PricePerSquareMeter(models.Model):
         ('Commercial Land', 'Commercial Land'),
     ]
     
-    property_type = models.CharField(max_length=50, choices=PROPERTY_TYPES)
-    region = models.ForeignKey(Region, on_delete=models.CASCADE)
-    price_per_square_meter = models.DecimalField(max_digits=10, decimal_places=2)
+    # Rebuilt by import_price_per_square_meter over unsold listings. A blank property_type,
+    # null region or blank location is the roll-up across all values of that column.
+    property_type = models.CharField(max_length=50, choices=PROPERTY_TYPES, blank=True)
+    region = models.ForeignKey(Region, on_delete=models.CASCADE, null=True, blank=True)
+    location = models.CharField(max_length=255, blank=True, default='')
+    price_per_square_meter = models.DecimalField(max_digits=10, decimal_places=2, null=True)  # mean
+    median = models.FloatField(null=True, blank=True)
+    p25 = models.FloatField(null=True, blank=True)
+    p75 = models.FloatField(null=True, blank=True)
+    count = models.PositiveIntegerField(default=0)  # listings with a usable surface
+    listing_count = models.PositiveIntegerField(default=0)
+    avg_interior_surface = models.FloatField(null=True, blank=True)
+    interior_count = models.PositiveIntegerField(default=0)
+    avg_land_surface = models.FloatField(null=True, blank=True)
+    land_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['property_type', 'region', 'location'], name='ppsm_type_region_location_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.property_type} in {self.region.name}: {self.price_per_square_meter}"
+        region = self.region.name if self.region else 'All'
+        return f"{self.property_type or 'All'} in {region}: {self.price_per_square_meter}"
 
 
 from django.db import models
@@ -107,3 +170,138 @@ class ExchangeRate(models.Model):
     currency = models.CharField(max_length=3)
     rate = models.FloatField()
     updated_at = models.DateTimeField(auto_now=True)
+
+
+class DatasetVersion(models.Model):
+    # Single row bumped by the import pipeline; cached dashboard responses are keyed on it
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dataset version {self.version}"
+
+
+class FeatureTerm(models.Model):
+    # Vocabulary served to the valuation tool, rebuilt by import_properties
+    KINDS = [
+        ('description', 'Description feature'),
+        ('general', 'General feature'),
+        ('type', 'Property type'),
+        ('location', 'Location'),
+        ('region', 'Region'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    term = models.CharField(max_length=255)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'term'], name='featureterm_kind_term_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.term} ({self.count})"
+
+
+class GeocodeCache(models.Model):
+    # One row per normalized location query, including misses so they aren't retried every run
+    key = models.CharField(max_length=255, unique=True)
+    query = models.CharField(max_length=255)
+    provider = models.CharField(max_length=50)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    fetched_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.query}: {self.latitude}, {self.longitude}"
+
+
+class PriceRollup(models.Model):
+    # Price history statistics per day / month, maintained by price_rollups.refresh_price_rollups.
+    # A blank property_type, region or location is the roll-up across all values of that column.
+    DAY = 'day'
+    MONTH = 'month'
+    PERIODS = [
+        (DAY, 'Day'),
+        (MONTH, 'Month'),
+    ]
+
+    period = models.CharField(max_length=5, choices=PERIODS)
+    period_start = models.DateField()
+    property_type = models.CharField(max_length=50, blank=True)
+    region = models.CharField(max_length=100, blank=True)
+    location = models.CharField(max_length=255, blank=True)
+    count = models.PositiveIntegerField(default=0)
+    sum_price = models.DecimalField(max_digits=24, decimal_places=2)
+    avg_price = models.DecimalField(max_digits=20, decimal_places=2)
+    median_price = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Also the lookup index: equality on the level, range on period_start
+            models.UniqueConstraint(
+                fields=['period', 'property_type', 'region', 'location', 'period_start'],
+                name='pricerollup_bucket_unique',
+            ),
+        ]
+        indexes = [
+            # refresh_price_rollups deletes everything from a month on
+            models.Index(fields=['period_start'], name='pricerollup_period_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.period_start} {self.property_type or 'All'} / {self.region or 'All'} / {self.location or 'All'}: {self.avg_price}"
+
+
+class PipelineRun(models.Model):
+    # One execution of the nightly pipeline (properties.pipeline); steps are logged below
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUSES = [
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=RUNNING)
+    resumed_from = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='resumed_by')
+
+    def __str__(self):
+        return f"Pipeline run {self.pk} ({self.status})"
+
+
+class PipelineStepRun(models.Model):
+    # Per-step metrics and checkpoint: a resumed run skips the steps that succeeded before
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CHECKPOINTED = 'checkpointed'  # succeeded in the run this one resumed
+    BLOCKED = 'blocked'  # an upstream step failed
+    STATUSES = [
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+        (CHECKPOINTED, 'Checkpointed'),
+        (BLOCKED, 'Blocked'),
+    ]
+
+    run = models.ForeignKey(PipelineRun, on_delete=models.CASCADE, related_name='steps')
+    step = models.CharField(max_length=100)
+    status = models.CharField(max_length=12, choices=STATUSES)
+    started_at = models.DateTimeField(null=True, blank=True)
+    duration_seconds = models.FloatField(null=True, blank=True)
+    rows = models.IntegerField(null=True, blank=True)
+    output = models.TextField(blank=True, default='')
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'step'], name='pipelinesteprun_run_step_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.step} in run {self.run_id}: {self.status}"
@@ -0,0 +1,121 @@
+import base64
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.utils import timezone
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def cursor_value(value):
+    # Full precision: DjangoJSONEncoder would cut datetimes to milliseconds and the keyset
+    # comparison would then skip or repeat rows
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'Cannot encode {type(value).__name__} in a cursor')
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, default=cursor_value).encode()).decode()
+
+
+def decode_cursor(cursor):
+    # Raises ValueError for anything encode_cursor did not produce
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    if not value:
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, maximum)
+
+
+def parse_date_range(start_date, end_date):
+    """
+    ?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD -> aware datetimes [start, end + 1 day) so
+    the end date is inclusive. Missing bounds are None.
+    """
+    def parse(value, days=0):
+        if not value:
+            return None
+        day = datetime.strptime(value, '%Y-%m-%d').date() + timedelta(days=days)
+        return timezone.make_aware(datetime.combine(day, time.min))
+    return parse(start_date), parse(end_date, days=1)
+
+
+def parse_fields(value, allowed, default):
+    """?fields=a,b -> ['a', 'b'], checked against `allowed`; `default` when empty."""
+    fields = [field.strip() for field in (value or '').split(',') if field.strip()] or list(default)
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def lookup_field(model, path):
+    """The model field a values() path such as 'property__interior_surface' ends on."""
+    *relations, name = path.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+def keyset_filter(ordering, values, nullable=()):
+    """
+    Rows strictly after `values` in `ordering` (e.g. ['-date', '-id']). The last field
+    must be unique so every row has exactly one position. Fields in `nullable` are
+    ordered NULLS LAST, which keyset_page applies.
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        if value is None:
+            # Only NULLs follow a NULL; they tie on this column
+            equal &= Q(**{f'{name}__isnull': True})
+            continue
+        after = Q(**{f'{name}__{lookup}': value})
+        if name in nullable:
+            after |= Q(**{f'{name}__isnull': True})
+        condition |= equal & after
+        equal &= Q(**{name: value})
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of a values() queryset in `ordering`. Returns (rows, next_cursor); the rows
+    must include every ordering field, next_cursor is None on the last page.
+    """
+    names = [field.lstrip('-') for field in ordering]
+    nullable = {name for name in names if lookup_field(queryset.model, name).null}
+    if cursor:
+        try:
+            queryset = queryset.filter(keyset_filter(ordering, decode_cursor(cursor), nullable))
+        except ValidationError as e:  # well-formed cursor with values the fields reject
+            raise ValueError('Invalid cursor') from e
+    order_by = [
+        (F(name).desc(nulls_last=True) if field.startswith('-') else F(name).asc(nulls_last=True)) if name in nullable else field
+        for field, name in zip(ordering, names)
+    ]
+    rows = list(queryset.order_by(*order_by)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor([rows[-1][name] for name in names]) if has_more else None
+    return rows, next_cursor
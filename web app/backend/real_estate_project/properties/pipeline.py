@@ -0,0 +1,192 @@
+import io
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import ExchangeRate, PipelineRun, PipelineStepRun, PricePerSquareMeter, Property
+
+OUTPUT_TAIL = 4000  # characters of a step's output kept in the run log
+
+
+class StepFailed(Exception):
+    pass
+
+
+class Step:
+    """
+    One node of the pipeline graph.
+
+    `run` is called as run(started_at) in a worker thread and returns (rows, output):
+    rows is the step's row count metric (or None), output a short text for the run log.
+    """
+
+    def __init__(self, name, run, depends_on=()):
+        self.name = name
+        self.run = run
+        self.depends_on = tuple(depends_on)
+
+    def __repr__(self):
+        return f'Step({self.name!r}, depends_on={self.depends_on!r})'
+
+
+def command_step(name, command, *args, depends_on=(), count=None):
+    """A step running a management command; `count` is an optional row count query."""
+    def run(started_at):
+        output = io.StringIO()
+        call_command(command, *args, stdout=output, stderr=output)
+        return (count(started_at) if count else None), output.getvalue()[-OUTPUT_TAIL:]
+    return Step(name, run, depends_on)
+
+
+def crawl_step(incremental=True):
+    """
+    The spiders, which upsert straight into the database (scraping/pipelines.py).
+
+    An incremental crawl stops once pages hold nothing new, so it cannot tell a delisted
+    listing from one on a deeper page and leaves the sold sweep to full crawls.
+    """
+    command = [sys.executable, 'combined-spiders.py'] + (['--incremental'] if incremental else [])
+
+    def run(started_at):
+        with tempfile.TemporaryFile(mode='w+') as log:
+            result = subprocess.run(command, cwd=settings.SCRAPING_DIR, stdout=log, stderr=subprocess.STDOUT, text=True)
+            log.seek(0)
+            output = log.read()[-OUTPUT_TAIL:]
+        if result.returncode:
+            raise StepFailed(f'combined-spiders.py exited with {result.returncode}\n{output}')
+        return Property.objects.filter(last_updated__gte=started_at).count(), output
+    return Step('crawl', run)
+
+
+def nightly_steps(full_crawl=None):
+    """
+    The nightly refresh, formerly run_full_process.sh. The exchange rates don't depend on
+    the crawl and are fetched while it runs; everything reading listings waits for it.
+
+    The crawl is incremental except on PIPELINE_FULL_CRAWL_WEEKDAY or with full_crawl=True;
+    only a full crawl marks the listings it did not see as sold.
+    """
+    if full_crawl is None:
+        full_crawl = timezone.localdate().weekday() == settings.PIPELINE_FULL_CRAWL_WEEKDAY
+    return [
+        crawl_step(incremental=not full_crawl),
+        command_step('fetch_exchange_rate', 'fetch_exchange_rate', count=lambda started_at: ExchangeRate.objects.count()),
+        command_step('normalize_properties', 'normalize_properties', depends_on=['crawl']),
+        command_step(
+            'import_price_per_square_meter', 'import_price_per_square_meter', depends_on=['normalize_properties'],
+            count=lambda started_at: PricePerSquareMeter.objects.count(),
+        ),
+        command_step(
+            'export_snapshot', 'export_snapshot', depends_on=['normalize_properties'],
+            count=lambda started_at: Property.objects.count(),
+        ),
+    ]
+
+
+def validate(steps):
+    """Check names are unique, dependencies exist and the graph has no cycle."""
+    names = [step.name for step in steps]
+    if len(set(names)) != len(names):
+        raise ValueError('Duplicate step names')
+    by_name = {step.name: step for step in steps}
+    for step in steps:
+        for dependency in step.depends_on:
+            if dependency not in by_name:
+                raise ValueError(f'{step.name} depends on unknown step {dependency}')
+
+    done = set()
+    while len(done) < len(steps):
+        ready = [step.name for step in steps if step.name not in done and set(step.depends_on) <= done]
+        if not ready:
+            raise ValueError(f"Cycle between {', '.join(sorted(set(names) - done))}")
+        done.update(ready)
+
+
+class PipelineRunner:
+    """
+    Run a step graph with up to `workers` independent steps at a time, logging each step
+    to PipelineStepRun.
+
+    A failed step blocks its dependents but not unrelated branches. With `resume`, steps
+    that succeeded (or were checkpointed) in that earlier run are not run again.
+    """
+
+    def __init__(self, steps, workers=None, log=print):
+        validate(steps)
+        self.steps = {step.name: step for step in steps}
+        self.workers = workers or settings.PIPELINE_WORKERS
+        self.log = log
+
+    def run(self, resume=None):
+        pipeline_run = PipelineRun.objects.create(resumed_from=resume)
+        done, failed = set(), set()
+
+        if resume is not None:
+            for previous in resume.steps.filter(status__in=[PipelineStepRun.SUCCEEDED, PipelineStepRun.CHECKPOINTED]):
+                if previous.step in self.steps:
+                    PipelineStepRun.objects.create(
+                        run=pipeline_run, step=previous.step, status=PipelineStepRun.CHECKPOINTED,
+                        rows=previous.rows, output=previous.output,
+                    )
+                    done.add(previous.step)
+                    self.log(f'{previous.step}: checkpointed in run {resume.pk}')
+
+        pending = {name for name in self.steps if name not in done}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                for name in sorted(pending):
+                    step = self.steps[name]
+                    if any(dependency in failed for dependency in step.depends_on):
+                        pending.discard(name)
+                        failed.add(name)
+                        PipelineStepRun.objects.create(run=pipeline_run, step=name, status=PipelineStepRun.BLOCKED)
+                        self.log(f'{name}: blocked')
+                    elif set(step.depends_on) <= done:
+                        pending.discard(name)
+                        record = PipelineStepRun.objects.create(
+                            run=pipeline_run, step=name, status=PipelineStepRun.RUNNING, started_at=timezone.now(),
+                        )
+                        running[executor.submit(self.execute, step, record.started_at)] = record
+                        self.log(f'{name}: started')
+
+                if not running:
+                    continue  # everything left was just blocked
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = running.pop(future)
+                    status, rows, output, duration = future.result()
+                    record.status = status
+                    record.rows = rows
+                    record.duration_seconds = round(duration, 3)
+                    if status == PipelineStepRun.SUCCEEDED:
+                        record.output = output
+                        done.add(record.step)
+                    else:
+                        record.error = output
+                        failed.add(record.step)
+                    record.save()
+                    self.log(f'{record.step}: {status} in {duration:.1f}s' + (f' ({rows} rows)' if rows is not None else ''))
+
+        pipeline_run.status = PipelineRun.FAILED if failed else PipelineRun.SUCCEEDED
+        pipeline_run.finished_at = timezone.now()
+        pipeline_run.save(update_fields=['status', 'finished_at'])
+        return pipeline_run
+
+    def execute(self, step, started_at):
+        # Runs in a worker thread, which has its own database connection
+        start = time.perf_counter()
+        try:
+            rows, output = step.run(started_at)
+            return PipelineStepRun.SUCCEEDED, rows, output or '', time.perf_counter() - start
+        except Exception as e:
+            return PipelineStepRun.FAILED, None, f'{type(e).__name__}: {e}'[-OUTPUT_TAIL:], time.perf_counter() - start
+        finally:
+            close_old_connections()
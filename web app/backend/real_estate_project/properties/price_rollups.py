@@ -0,0 +1,127 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+from .models import PriceRollup
+
+# Daily or monthly price statistics of the price history, rolled up to each
+# (type, region, location) level in one pass. A NULL grouping column in the output means
+# "all values" for that level and is stored as ''.
+ROLLUP_SQL = """
+    INSERT INTO properties_pricerollup
+        (period, period_start, property_type, region, location, count, sum_price, avg_price, median_price)
+    SELECT
+        %(period)s,
+        period_start,
+        COALESCE(property_type, ''),
+        COALESCE(region_name, ''),
+        COALESCE(location, ''),
+        COUNT(*),
+        SUM(price),
+        AVG(price),
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY price)
+    FROM (
+        SELECT
+            date_trunc(%(period)s, h.date)::date AS period_start,
+            p.type AS property_type,
+            COALESCE(r.name, NULLIF(TRIM(split_part(p.location, ',', 2)), ''), 'Unknown') AS region_name,
+            LEFT(p.location, 255) AS location,
+            h.price
+        FROM properties_propertypricehistory h
+        JOIN properties_property p ON p.id = h.property_id
+        LEFT JOIN properties_region r ON r.id = p.region_id
+        WHERE h.date >= %(since)s
+    ) AS base
+    GROUP BY GROUPING SETS (
+        (period_start),
+        (period_start, region_name),
+        (period_start, region_name, location),
+        (period_start, property_type),
+        (period_start, property_type, region_name),
+        (period_start, property_type, region_name, location)
+    )
+"""
+
+# Series of the matched rollup rows plus a count weighted rolling mean over the last N
+# calendar days / months (gaps count towards the window, unlike a ROWS frame)
+SERIES_SQL = """
+    WITH series AS (
+        SELECT
+            period_start,
+            SUM(count) AS count,
+            SUM(sum_price) AS sum_price,
+            CASE WHEN COUNT(*) = 1 THEN MAX(median_price) END AS median_price
+        FROM properties_pricerollup
+        WHERE period = %s AND {conditions}
+        GROUP BY period_start
+    )
+    SELECT
+        period_start,
+        count,
+        sum_price / count,
+        median_price,
+        SUM(sum_price) OVER w / SUM(count) OVER w
+    FROM series
+    WINDOW w AS (ORDER BY period_start RANGE BETWEEN %s * INTERVAL '1 {period}' PRECEDING AND CURRENT ROW)
+    ORDER BY period_start
+"""
+
+
+def refresh_price_rollups(since=None):
+    """
+    Recompute the rollup buckets that history rows dated `since` or later fall into.
+
+    Buckets are rebuilt from the start of since's month, so an import only rewrites the
+    current month and costs the same however long the history grows. since=None rebuilds
+    everything. Returns the number of rollup rows written.
+    """
+    if since is None:
+        start = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+    else:
+        start = since.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    with transaction.atomic():
+        PriceRollup.objects.filter(period_start__gte=start.date()).delete()
+        written = 0
+        with connection.cursor() as cursor:
+            for period in (PriceRollup.DAY, PriceRollup.MONTH):
+                cursor.execute(ROLLUP_SQL, {'period': period, 'since': start})
+                written += cursor.rowcount
+    return written
+
+
+def rollup_conditions(property_type=None, region=None, locations=()):
+    """
+    SQL conditions and params selecting the rollup rows for the dashboard filters.
+
+    Locations keep the views' icontains semantics and several can be given; their rows
+    are summed per period. Without locations the (type, region) level row is used.
+    """
+    conditions = ['property_type = %s', 'region = %s']
+    params = [property_type if property_type and property_type != 'All' else '']
+    if locations:
+        if region and region != 'All':
+            params.append(region)
+        else:
+            conditions[1] = "region <> %s"
+            params.append('')
+        conditions.append('(' + ' OR '.join(['UPPER(location) LIKE UPPER(%s)'] * len(locations)) + ')')
+        params.extend(f'%{location.strip()}%' for location in locations)
+    else:
+        params.append(region if region and region != 'All' else '')
+        conditions.append("location = ''")
+    return ' AND '.join(conditions), params
+
+
+def price_series(period, property_type=None, region=None, locations=(), window=1):
+    """
+    [(period_start, count, avg_price, median_price, rolling_avg_price)] for the filters,
+    one row per day / month that has history. The rolling mean covers `window` periods
+    ending at each row. Reads only rollup rows, so its cost follows the number of periods.
+    """
+    if period not in (PriceRollup.DAY, PriceRollup.MONTH):
+        raise ValueError(f'Unknown period {period!r}')
+    conditions, params = rollup_conditions(property_type, region, locations)
+    with connection.cursor() as cursor:
+        cursor.execute(SERIES_SQL.format(conditions=conditions, period=period), [period] + params + [window - 1])
+        return cursor.fetchall()
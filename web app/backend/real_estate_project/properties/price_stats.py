@@ -0,0 +1,133 @@
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import PricePerSquareMeter, Region
+
+# Price per m² of every unsold listing, rolled up to each (type, region, location) level in
+# one pass. Land is priced on land_surface, everything else on interior_surface. A NULL
+# grouping column in the output means "all values" for that level.
+PRICE_STATS_SQL = """
+    WITH base AS (
+        SELECT
+            p.type AS property_type,
+            COALESCE(r.name, NULLIF(TRIM(split_part(p.location, ',', 2)), ''), 'Unknown') AS region_name,
+            p.location,
+            p.interior_surface,
+            p.land_surface,
+            CASE
+                WHEN POSITION('land' IN LOWER(p.type)) > 0 AND p.land_surface > 0
+                    THEN p.price / p.land_surface
+                WHEN POSITION('land' IN LOWER(p.type)) = 0 AND p.interior_surface > 0
+                    THEN p.price / p.interior_surface
+            END AS ppsm
+        FROM properties_property p
+        LEFT JOIN properties_region r ON r.id = p.region_id
+        WHERE NOT p.sold
+    )
+    SELECT
+        property_type,
+        region_name,
+        location,
+        AVG(ppsm),
+        percentile_cont(ARRAY[0.25, 0.5, 0.75]) WITHIN GROUP (ORDER BY ppsm),
+        COUNT(ppsm),
+        COUNT(*),
+        AVG(interior_surface),
+        COUNT(interior_surface),
+        AVG(land_surface),
+        COUNT(land_surface)
+    FROM base
+    GROUP BY GROUPING SETS (
+        (),
+        (region_name),
+        (region_name, location),
+        (property_type),
+        (property_type, region_name),
+        (property_type, region_name, location)
+    )
+"""
+
+
+def rebuild_price_per_square_meter():
+    """Recompute the PricePerSquareMeter table from the property table. Returns the number of rows."""
+    with connection.cursor() as cursor:
+        cursor.execute(PRICE_STATS_SQL)
+        results = cursor.fetchall()
+
+    regions = {}
+    for region_id, name in Region.objects.order_by('id').values_list('id', 'name'):
+        regions.setdefault(name, region_id)
+
+    rows = []
+    for (property_type, region_name, location, mean, percentiles, count, listing_count,
+         avg_interior, interior_count, avg_land, land_count) in results:
+        if region_name is not None and region_name not in regions:
+            regions[region_name] = Region.objects.create(name=region_name).id
+        p25, median, p75 = percentiles if percentiles else (None, None, None)
+        rows.append(PricePerSquareMeter(
+            property_type=property_type or '',
+            region_id=regions.get(region_name),
+            location=(location or '')[:255],
+            price_per_square_meter=round(mean, 2) if mean is not None else None,
+            median=median,
+            p25=p25,
+            p75=p75,
+            count=count,
+            listing_count=listing_count,
+            avg_interior_surface=avg_interior,
+            interior_count=interior_count,
+            avg_land_surface=avg_land,
+            land_count=land_count,
+        ))
+
+    # Readers keep seeing the previous snapshot until the swap commits
+    with transaction.atomic():
+        PricePerSquareMeter.objects.all().delete()
+        PricePerSquareMeter.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def lookup_price_per_square_meter(property_type=None, region=None, location=None):
+    """
+    Combine the precomputed rows matching the dashboard filters.
+
+    Filters keep the views' icontains semantics, so one filter can match several rows
+    (e.g. 'Land' matches Land and Commercial Land); those are merged weighted by their
+    counts. Percentiles can't be merged and are only returned for a single matching row.
+    Returns None when nothing matches.
+    """
+    conditions = Q()
+    if property_type and property_type != 'All':
+        conditions &= Q(property_type__icontains=property_type) & ~Q(property_type='')
+    else:
+        conditions &= Q(property_type='')
+    if location:
+        conditions &= Q(location__icontains=location) & ~Q(location='')
+    else:
+        conditions &= Q(location='')
+    if region and region != 'All':
+        conditions &= Q(region__name__icontains=region)
+    elif not location:
+        conditions &= Q(region__isnull=True)
+
+    rows = list(PricePerSquareMeter.objects.filter(conditions))
+    if not rows:
+        return None
+
+    def weighted(value, weight):
+        total = sum(getattr(row, weight) for row in rows if getattr(row, value) is not None)
+        if not total:
+            return None
+        return sum(float(getattr(row, value)) * getattr(row, weight) for row in rows if getattr(row, value) is not None) / total
+
+    single = rows[0] if len(rows) == 1 else None
+    return {
+        'price_per_square_meter': weighted('price_per_square_meter', 'count'),
+        'median': single.median if single else None,
+        'p25': single.p25 if single else None,
+        'p75': single.p75 if single else None,
+        'count': sum(row.count for row in rows),
+        'listing_count': sum(row.listing_count for row in rows),
+        'average_interior_size': weighted('avg_interior_surface', 'interior_count'),
+        'average_land_size': weighted('avg_land_surface', 'land_count'),
+    }
@@ -1,3 +1,529 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from properties.geocoding import FixtureProvider, Geocoder, pending_locations, save_locations
+from properties.ingest import finalize_import, touch_listings, upsert_properties
+from properties.models import (
+    Agency, ExchangeRate, GeocodeCache, Location, PipelineRun, PipelineStepRun, PriceRollup, Property, PropertyPriceHistory, Region,
+)
+from properties.pipeline import PipelineRunner, Step, nightly_steps
+from properties.price_rollups import price_series, refresh_price_rollups
+from properties.price_stats import lookup_price_per_square_meter, rebuild_price_per_square_meter
+from properties.views import (
+    AgencyRankingView, CurrentMarketValueView, InvestmentOpportunitiesView, MetricsView, PriceDistributionView,
+    PropertyTypeDistributionView, ScatterPlotDataView, get_latest_properties, get_price_changes, get_price_history, get_sold_properties,
+)
+
+SEED_ROWS = 100000
+UNSOLD_EVERY = 20  # 5% of the seeded table is still on the market
+TYPES = ['Apartment', 'House / Villa', 'Penthouse', 'Townhouse / Duplex', 'Residential land', 'Agricultural land', 'Commercial land', 'Office']
+REGIONS = ['North', 'South', 'East', 'West', 'Center']
+LOCATIONS = [f'Location {i}' for i in range(149)] + ['Tamarin']
+HOT_TABLES = ('properties_property', 'properties_propertypricehistory')
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'EXPLAIN plans are only meaningful on PostgreSQL')
+class DashboardQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        regions = [Region.objects.create(name=name) for name in REGIONS]
+        agency = Agency.objects.create(name='Seed agency')
+        now = timezone.now()
+
+        properties = []
+        for i in range(SEED_ROWS):
+            region = regions[i % len(regions)]
+            properties.append(Property(
+                title=f'{TYPES[i % len(TYPES)]} - Seed {i}',
+                location=f'{LOCATIONS[i % len(LOCATIONS)]}, {region.name}',
+                price=1000000 + (i % 1000) * 10000,
+                details_link=f'https://example.com/{i}',
+                region=region,
+                agency_name=agency.name,
+                agency=agency,
+                land_surface=500 + i % 300,
+                interior_surface=50 + i % 250,
+                type=TYPES[i % len(TYPES)],
+                ref=str(i),
+                sold=i % UNSOLD_EVERY != 0,
+            ))
+        Property.objects.bulk_create(properties, batch_size=5000)
+        Property.objects.update(date_added=now - timedelta(days=30))
+        latest_ids = Property.objects.filter(sold=False).order_by('id').values('id')[:500]
+        Property.objects.filter(id__in=latest_ids).update(date_added=now)
+
+        PropertyPriceHistory.objects.bulk_create(
+            [PropertyPriceHistory(property_id=pk, price=1000000) for pk in Property.objects.values_list('id', flat=True)],
+            batch_size=5000,
+        )
+        cls.sample_property_id = Property.objects.filter(sold=False).values_list('id', flat=True).first()
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE properties_property')
+            cursor.execute('ANALYZE properties_propertypricehistory')
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def assertNoSequentialScan(self, view, params=None, **kwargs):
+        request = self.factory.get('/', params or {})
+        with CaptureQueriesContext(connection) as queries:
+            view(request, **kwargs)
+
+        checked = 0
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT') or not any(table in sql for table in HOT_TABLES):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN ' + sql)
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+            for table in HOT_TABLES:
+                self.assertNotIn(f'Seq Scan on {table}', plan, f'Sequential scan for:\n{sql}\n{plan}')
+            checked += 1
+        self.assertGreater(checked, 0)
+
+    def test_current_market_value(self):
+        self.assertNoSequentialScan(CurrentMarketValueView.as_view())
+
+    def test_metrics_reads_materialized_statistics(self):
+        request = self.factory.get('/', {'property_type': 'Apartment', 'region': 'North'})
+        with CaptureQueriesContext(connection) as queries:
+            MetricsView.as_view()(request)
+        for query in queries.captured_queries:
+            for table in HOT_TABLES:
+                self.assertNotIn(table, query['sql'])
+
+    def test_price_distribution(self):
+        self.assertNoSequentialScan(PriceDistributionView.as_view(), {'property_type': 'Apartment', 'location': 'Tamarin'})
+
+    def test_property_type_distribution(self):
+        self.assertNoSequentialScan(PropertyTypeDistributionView.as_view(), {'region': 'Tamarin'})
+
+    def test_agency_ranking(self):
+        self.assertNoSequentialScan(AgencyRankingView.as_view(), {'region': 'Tamarin'})
+
+    def test_latest_properties(self):
+        self.assertNoSequentialScan(get_latest_properties)
+
+    def test_price_history(self):
+        self.assertNoSequentialScan(get_price_history, property_id=self.sample_property_id)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'GROUPING SETS and percentile_cont need PostgreSQL')
+class PricePerSquareMeterStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        north = Region.objects.create(name='North')
+        agency = Agency.objects.create(name='Seed agency')
+        rows = [
+            # type, location, price, interior, land, sold
+            ('Apartment', 'Grand Baie, North', 100000, 100, 0, False),
+            ('Apartment', 'Grand Baie, North', 300000, 100, 0, False),
+            ('Apartment', 'Pereybere, North', 200000, 100, 0, False),
+            ('Residential land', 'Grand Baie, North', 500000, None, 1000, False),
+            ('Apartment', 'Grand Baie, North', 900000, 100, 0, True),
+        ]
+        Property.objects.bulk_create([
+            Property(
+                title=f'{property_type} {i}', location=location, price=price, details_link=f'https://example.com/{i}',
+                region=north, agency_name=agency.name, agency=agency, interior_surface=interior,
+                land_surface=land, type=property_type, ref=str(i), sold=sold,
+            )
+            for i, (property_type, location, price, interior, land, sold) in enumerate(rows)
+        ])
+        rebuild_price_per_square_meter()
+
+    def test_type_region_level(self):
+        stats = lookup_price_per_square_meter('Apartment', 'North')
+        self.assertAlmostEqual(stats['price_per_square_meter'], 2000)
+        self.assertAlmostEqual(stats['median'], 2000)
+        self.assertAlmostEqual(stats['p25'], 1500)
+        self.assertAlmostEqual(stats['p75'], 2500)
+        self.assertEqual(stats['listing_count'], 3)
+
+    def test_land_is_priced_on_land_surface(self):
+        stats = lookup_price_per_square_meter('land', 'North')
+        self.assertAlmostEqual(stats['price_per_square_meter'], 500)
+        self.assertAlmostEqual(stats['average_land_size'], 1000)
+
+    def test_location_level(self):
+        stats = lookup_price_per_square_meter('Apartment', None, 'Grand Baie')
+        self.assertAlmostEqual(stats['price_per_square_meter'], 2000)
+        self.assertEqual(stats['count'], 2)
+
+    def test_all_level(self):
+        self.assertEqual(lookup_price_per_square_meter('All', 'All')['listing_count'], 4)
+
+
+class InvestmentOpportunitiesTests(TestCase):
+    def test_rejects_invalid_page(self):
+        factory = RequestFactory()
+        for params in [{'limit': 0}, {'limit': -5}, {'offset': -5}, {'limit': 'ten'}]:
+            response = InvestmentOpportunitiesView.as_view()(factory.get('/', params))
+            self.assertEqual(response.status_code, 400, params)
+
+
+class ScatterPlotDataTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        agency = Agency.objects.create(name='Seed agency')
+        for i in range(3):
+            Property.objects.create(
+                title=f'Apartment - {i}', location='Grand Baie, North', price=1000000, details_link=f'https://example.com/{i}',
+                agency_name=agency.name, agency=agency, type='Apartment', ref=str(i), interior_surface=100,
+            )
+        ExchangeRate.objects.create(currency='EUR', rate=0.02)
+        ExchangeRate.objects.create(currency='USD', rate=0.025)
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def fetch(self, **params):
+        return ScatterPlotDataView.as_view()(self.factory.get('/', params))
+
+    def test_dashboard_currency_symbols(self):
+        # The values CurrencyToggle.js sends; Rs is the stored currency
+        for currency, price in [('Rs', 1000000), ('€', 20000), ('$', 25000)]:
+            response = self.fetch(currency=currency, limit=10)
+            self.assertEqual(response.status_code, 200, currency)
+            self.assertAlmostEqual(response.data['results'][0]['price'], price)
+
+    def test_unpaginated_stream_with_default_currency(self):
+        response = self.fetch(currency='Rs')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(b''.join(response.streaming_content))), 3)
+
+    def test_unknown_currency(self):
+        self.assertEqual(self.fetch(currency='GBP').status_code, 400)
+
+    def test_rejects_non_positive_limit(self):
+        self.assertEqual(self.fetch(limit=0).status_code, 400)
+        self.assertEqual(self.fetch(limit=-1).status_code, 400)
+
+    def test_cursor_pages(self):
+        first = self.fetch(limit=2).data
+        self.assertEqual(len(first['results']), 2)
+        second = self.fetch(limit=2, cursor=first['next_cursor']).data
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNone(second['next_cursor'])
+
+
+class CountingProvider(FixtureProvider):
+    def __init__(self, path):
+        super().__init__(path)
+        self.calls = []
+        self.times = []
+
+    def geocode(self, location):
+        self.calls.append(location)
+        self.times.append(time.monotonic())
+        return super().geocode(location)
+
+
+class GeocoderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        agency = Agency.objects.create(name='Seed agency')
+        for i, location in enumerate(['Grand Baie, North', 'Grand Baie, North', 'Côte d\'Or, Center', 'Nowhere, East', 'Tamarin, West']):
+            Property.objects.create(
+                title=f'Property {i}', location=location, price=1000000, details_link=f'https://example.com/{i}',
+                agency_name=agency.name, agency=agency, type='House', ref=str(i),
+            )
+        Location.objects.create(name='Tamarin', region='West', latitude=-20.32, longitude=57.37)
+
+    def setUp(self):
+        handle, self.fixture = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', encoding='utf-8') as file:
+            file.write('location,latitude,longitude\n"Grand Baie, North",-20.0128,57.5803\n"cote d\'or, center",-20.2536,57.5497\n')
+        self.addCleanup(os.remove, self.fixture)
+
+    def test_pending_locations_skip_geocoded(self):
+        self.assertEqual(pending_locations(), ["Côte d'Or, Center", 'Grand Baie, North', 'Nowhere, East'])
+
+    def test_geocode_caches_hits_and_misses(self):
+        provider = CountingProvider(self.fixture)
+        geocoder = Geocoder(provider, rate=0, concurrency=2)
+        results = geocoder.geocode(pending_locations())
+
+        self.assertEqual(results['Grand Baie, North'], (-20.0128, 57.5803))
+        self.assertEqual(results["Côte d'Or, Center"], (-20.2536, 57.5497))
+        self.assertIsNone(results['Nowhere, East'])
+        self.assertEqual(GeocodeCache.objects.count(), 3)
+
+        self.assertEqual(save_locations(results), (2, 0))
+        self.assertEqual(pending_locations(), ['Nowhere, East'])
+
+        provider.calls.clear()
+        self.assertEqual(geocoder.geocode(['Grand Baie, North', 'Nowhere, East']), {
+            'Grand Baie, North': (-20.0128, 57.5803),
+            'Nowhere, East': None,
+        })
+        self.assertEqual(provider.calls, [])
+
+    def test_rate_limit_spans_chunks(self):
+        provider = CountingProvider(self.fixture)
+        Geocoder(provider, rate=10, concurrency=2, chunk_size=1).geocode(pending_locations())
+        self.assertEqual(len(provider.times), 3)
+        gaps = [later - earlier for earlier, later in zip(provider.times, provider.times[1:])]
+        self.assertGreaterEqual(min(gaps), 0.08)
+
+
+def listing(ref, price):
+    return {
+        'ref': ref, 'price': price, 'title': f'Apartment - {ref}', 'location': 'Grand Baie, North',
+        'details_link': f'https://example.com/{ref}', 'agency_name': 'Seed agency', 'type': 'Apartment',
+    }
+
+
+class PriceChangeFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        upsert_properties([listing(str(i), 1000000) for i in range(5)])
+        upsert_properties([listing('0', 1100000), listing('1', 900000), listing('2', 1000000), listing('3', 1200000)])
+        # Outside the requested window
+        PropertyPriceHistory.objects.filter(property__ref='3').update(date=timezone.now() - timedelta(days=60))
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def fetch(self, **params):
+        return json.loads(get_price_changes(self.factory.get('/', params)).content)
+
+    def test_deltas_are_stored_at_import(self):
+        change = PropertyPriceHistory.objects.get(property__ref='1')
+        self.assertEqual(change.previous_price, 1000000)
+        self.assertEqual(change.price_change, -100000)
+        self.assertEqual(change.price_change_percentage, -10.0)
+        self.assertEqual(change.direction, 'down')
+        self.assertFalse(PropertyPriceHistory.objects.filter(property__ref='2').exists())
+
+    def test_date_window_and_keyset_pages(self):
+        today = timezone.localdate()
+        params = {'start_date': (today - timedelta(days=7)).isoformat(), 'end_date': today.isoformat(), 'limit': 1}
+        first = self.fetch(**params)
+        self.assertEqual(len(first['price_changes']), 1)
+        self.assertIsNotNone(first['next_cursor'])
+
+        second = self.fetch(**params, cursor=first['next_cursor'])
+        self.assertIsNone(second['next_cursor'])
+        titles = {change['property_title'] for change in first['price_changes'] + second['price_changes']}
+        self.assertEqual(titles, {'Apartment - 0', 'Apartment - 1'})
+
+    def test_largest_changes_first_across_pages(self):
+        first = self.fetch(limit=1)
+        self.assertEqual(first['price_changes'][0]['property_title'], 'Apartment - 3')
+        second = self.fetch(limit=2, cursor=first['next_cursor'])
+        self.assertEqual({change['property_title'] for change in second['price_changes']}, {'Apartment - 0', 'Apartment - 1'})
+        self.assertIsNone(second['next_cursor'])
+        self.assertNotIn('latest_properties', first)
+
+    def test_invalid_cursor(self):
+        response = get_price_changes(self.factory.get('/', {'cursor': 'not-a-cursor'}))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(get_price_changes(self.factory.get('/', {'sort_by': 'title'})).status_code, 400)
+
+
+class UpsertPropertiesTests(TestCase):
+    def test_failed_history_write_keeps_old_price(self):
+        upsert_properties([listing('1', 1000000)])
+        with mock.patch.object(PropertyPriceHistory.objects, 'bulk_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                upsert_properties([listing('1', 1100000)])
+        self.assertEqual(Property.objects.get(ref='1').price, 1000000)
+
+        # The next run still sees the change
+        self.assertEqual(upsert_properties([listing('1', 1100000)]), (0, 1, 1))
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'finalize_import refreshes the PostgreSQL price rollups')
+    def test_touched_listings_are_not_marked_sold(self):
+        upsert_properties([listing('1', 1000000), listing('2', 1000000)])
+        Property.objects.update(last_updated=timezone.now() - timedelta(days=365))
+        now = timezone.now()
+        self.assertEqual(touch_listings(['1'], now=now), 1)
+        self.assertEqual(finalize_import(now, mark_sold=False), 0)
+        self.assertEqual(finalize_import(now), 1)
+        self.assertEqual(list(Property.objects.filter(sold=True).values_list('ref', flat=True)), ['2'])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'GROUPING SETS, percentile_cont and RANGE frames need PostgreSQL')
+class PriceRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        agency = Agency.objects.create(name='Seed agency')
+        grand_baie = Property.objects.create(
+            title='Apartment - Grand Baie', location='Grand Baie, North', price=100, details_link='https://example.com/1',
+            agency_name=agency.name, agency=agency, type='Apartment', ref='1',
+        )
+        tamarin = Property.objects.create(
+            title='Apartment - Tamarin', location='Tamarin, West', price=100, details_link='https://example.com/2',
+            agency_name=agency.name, agency=agency, type='Apartment', ref='2',
+        )
+        cls.today = timezone.now().replace(day=15, hour=12)
+        for days_ago, property, price in [(3, grand_baie, 100), (3, tamarin, 300), (1, grand_baie, 200), (0, grand_baie, 400)]:
+            history = PropertyPriceHistory.objects.create(property=property, price=price)
+            PropertyPriceHistory.objects.filter(pk=history.pk).update(date=cls.today - timedelta(days=days_ago))
+        refresh_price_rollups()
+
+    def test_daily_series_and_rolling_window(self):
+        series = price_series(PriceRollup.DAY, 'Apartment', 'All', window=2)
+        self.assertEqual([(count, float(avg)) for _, count, avg, _, _ in series], [(2, 200), (1, 200), (1, 400)])
+        # Day -3 is outside the 2 day window of day -1, so the rolling mean restarts
+        self.assertEqual([float(rolling) for *_, rolling in series], [200, 200, 300])
+
+    def test_location_filter_and_median(self):
+        series = price_series(PriceRollup.DAY, 'All', 'All', ['grand baie'])
+        self.assertEqual([float(avg) for _, _, avg, _, _ in series], [100, 200, 400])
+        self.assertEqual([median for _, _, _, median, _ in series], [100, 200, 400])
+
+    def test_incremental_refresh_only_rewrites_the_month(self):
+        old = PriceRollup.objects.create(
+            period=PriceRollup.DAY, period_start=(self.today - timedelta(days=60)).date(), count=1, sum_price=1, avg_price=1,
+        )
+        refresh_price_rollups(since=self.today)
+        self.assertTrue(PriceRollup.objects.filter(pk=old.pk).exists())
+        self.assertEqual(price_series(PriceRollup.MONTH, 'Apartment', 'North')[0][1], 3)
+
+
+class ListingPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        agency = Agency.objects.create(name='Seed agency')
+        now = timezone.now()
+        for i in range(7):
+            prop = Property.objects.create(
+                title=f'Apartment - {i}', location='Grand Baie, North', price=1000000 + i, details_link=f'https://example.com/{i}',
+                agency_name=agency.name, agency=agency, type='Apartment', ref=str(i), sold=True,
+                description='Sea view', interior_surface=None if i % 3 == 0 else 100 + i,
+            )
+            # Two listings share each timestamp, so the id tie-breaker matters
+            Property.objects.filter(pk=prop.pk).update(date_added=now - timedelta(days=i // 2))
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def fetch_all(self, **params):
+        pages, cursor = [], None
+        while True:
+            response = get_sold_properties(self.factory.get('/', {**params, **({'cursor': cursor} if cursor else {})}))
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.content)
+            pages.append(data['sold_properties'])
+            cursor = data['next_cursor']
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_row_once(self):
+        pages = self.fetch_all(limit=2, fields='ref')
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        refs = [row['ref'] for page in pages for row in page]
+        self.assertEqual(sorted(refs), [str(i) for i in range(7)])
+        self.assertEqual(list(pages[0][0]), ['ref'])
+
+    def test_nullable_sort_puts_missing_surfaces_last(self):
+        rows = [row for page in self.fetch_all(limit=3, sort_by='-interior_surface', fields='ref,interior_surface') for row in page]
+        self.assertEqual([row['ref'] for row in rows], ['5', '4', '2', '1', '0', '3', '6'])
+
+    def test_default_projection_skips_long_columns(self):
+        row = json.loads(get_sold_properties(self.factory.get('/')).content)['sold_properties'][0]
+        self.assertNotIn('description', row)
+
+    def test_rejects_unknown_sort_and_fields(self):
+        self.assertEqual(get_sold_properties(self.factory.get('/', {'sort_by': 'title'})).status_code, 400)
+        self.assertEqual(get_latest_properties(self.factory.get('/', {'fields': 'agency_id'})).status_code, 400)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'COPY FROM STDIN needs PostgreSQL')
+class ImportOldPricesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        upsert_properties([listing('101', 1000000), listing('102', 2000000)])
+        upsert_properties([listing('101', 1100000)])
+
+    def setUp(self):
+        handle, self.csv = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as file:
+            file.write('ref,price,title\n101.0,900000,a\n101,900000,a\n102,not a price,b\n999,5000,c\n')
+        self.addCleanup(os.remove, self.csv)
+
+    def test_backfill_is_deduplicated_and_idempotent(self):
+        call_command('import_old_prices', csv=self.csv, date='2024-06-28', stdout=io.StringIO())
+        call_command('import_old_prices', csv=self.csv, date='2024-06-28', stdout=io.StringIO())
+
+        history = list(PropertyPriceHistory.objects.filter(property__ref='101').order_by('date').values_list('price', 'previous_price'))
+        # The backfilled row comes first; the import-time delta of the later row is kept
+        self.assertEqual(history, [(900000, None), (1100000, 1000000)])
+
+
+class PipelineRunnerTests(TestCase):
+    def make_steps(self, calls, fail=()):
+        def run(name):
+            def step(started_at):
+                calls.append(name)
+                if name in fail:
+                    raise RuntimeError(f'{name} broke')
+                return len(name), f'{name} done'
+            return step
+        return [
+            Step('crawl', run('crawl')),
+            Step('rates', run('rates')),
+            Step('normalize', run('normalize'), depends_on=['crawl']),
+            Step('stats', run('stats'), depends_on=['normalize']),
+        ]
+
+    def statuses(self, pipeline_run):
+        return dict(pipeline_run.steps.values_list('step', 'status'))
+
+    def test_dependencies_run_in_order(self):
+        calls = []
+        pipeline_run = PipelineRunner(self.make_steps(calls), workers=2, log=lambda message: None).run()
+        self.assertEqual(pipeline_run.status, PipelineRun.SUCCEEDED)
+        self.assertLess(calls.index('crawl'), calls.index('normalize'))
+        self.assertLess(calls.index('normalize'), calls.index('stats'))
+        self.assertEqual(pipeline_run.steps.get(step='normalize').rows, len('normalize'))
+
+    def test_failure_blocks_dependents_and_resume_skips_good_steps(self):
+        calls = []
+        failed = PipelineRunner(self.make_steps(calls, fail={'normalize'}), log=lambda message: None).run()
+        self.assertEqual(failed.status, PipelineRun.FAILED)
+        self.assertEqual(self.statuses(failed), {
+            'crawl': PipelineStepRun.SUCCEEDED, 'rates': PipelineStepRun.SUCCEEDED,
+            'normalize': PipelineStepRun.FAILED, 'stats': PipelineStepRun.BLOCKED,
+        })
+        self.assertIn('normalize broke', failed.steps.get(step='normalize').error)
+
+        calls.clear()
+        resumed = PipelineRunner(self.make_steps(calls), log=lambda message: None).run(resume=failed)
+        self.assertEqual(resumed.status, PipelineRun.SUCCEEDED)
+        self.assertEqual(sorted(calls), ['normalize', 'stats'])
+        self.assertEqual(resumed.steps.get(step='crawl').status, PipelineStepRun.CHECKPOINTED)
+
+    def crawl_command(self, **kwargs):
+        crawl = next(step for step in nightly_steps(**kwargs) if step.name == 'crawl')
+        with mock.patch('properties.pipeline.subprocess.run', return_value=mock.Mock(returncode=0)) as run:
+            crawl.run(timezone.now())
+        return run.call_args.args[0]
+
+    def test_full_crawl_is_scheduled_weekly(self):
+        today = timezone.localdate().weekday()
+        with override_settings(PIPELINE_FULL_CRAWL_WEEKDAY=today):
+            self.assertNotIn('--incremental', self.crawl_command())
+        with override_settings(PIPELINE_FULL_CRAWL_WEEKDAY=(today + 1) % 7):
+            self.assertIn('--incremental', self.crawl_command())
+            self.assertNotIn('--incremental', self.crawl_command(full_crawl=True))
+
+    def test_rejects_cycles(self):
+        with self.assertRaises(ValueError):
+            PipelineRunner([Step('a', None, depends_on=['b']), Step('b', None, depends_on=['a'])])
@@ -5,9 +5,12 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .models import Property
+from .cache import cached_endpoint, get_stats
+from .price_stats import lookup_price_per_square_meter
 from django.db import models  # Import models from django.db
 
 class CurrentMarketValueView(APIView):
+    @cached_endpoint('current_market_value')
     def get(self, request):
         total_market_value = Property.objects.filter(sold=False).aggregate(total_value=Sum('price'))['total_value']
         return Response({'current_market_value': total_market_value}, status=status.HTTP_200_OK)
@@ -46,61 +49,24 @@ class PricePerSquareMeterView(APIView):
     def get(self, request):
         property_type = request.GET.get('property_type')
         region = request.GET.get('region')
-        print(f"Requested property_type: {property_type}, region: {region}")
 
         if not property_type or not region:
             return Response({'error': 'property_type and region are required parameters'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if "Land" in property_type:
-            surface_field = 'land_surface'
-        else:
-            surface_field = 'interior_surface'
-
-        filter_conditions = Q(title__icontains=property_type) & Q(sold=False) & ~Q(**{surface_field: None})
-
-        if region != "All":
-            filter_conditions &= Q(location__icontains=region)
-
-        valid_properties = Property.objects.filter(filter_conditions)
-        print(f"Valid properties: {valid_properties.count()}")
-
-        # Convert and clean non-numeric characters
-        def clean_surface(value):
-            if isinstance(value, str):
-                # Remove any non-numeric characters except decimal point
-                cleaned_value = re.sub(r'[^\d.]+', '', value)
-                return float(cleaned_value) if cleaned_value else None
-            return value
-
-        # Apply cleaning in annotation
-        valid_properties = valid_properties.annotate(
-            numeric_surface=Cast(
-                F(surface_field),
-                output_field=FloatField()
-            )
-        )
-
-        # Ensure the numeric_surface is not None
-        valid_properties = valid_properties.exclude(numeric_surface__isnull=True)
-
-        try:
-            price_data = valid_properties.aggregate(
-                total_price=Sum('price', output_field=FloatField()),
-                total_surface=Sum('numeric_surface', output_field=FloatField())
-            )
-
-            if price_data['total_surface'] and price_data['total_surface'] > 0:
-                average_price = price_data['total_price'] / price_data['total_surface']
-                return Response({
-                    'property_type': property_type,
-                    'region': region if region != "All" else "All",
-                    'price_per_square_meter': average_price
-                }, status=status.HTTP_200_OK)
-
+        # Served from the table rebuilt by import_price_per_square_meter
+        stats = lookup_price_per_square_meter(property_type, region)
+        if stats is None or stats['price_per_square_meter'] is None:
             return Response({'error': 'No valid data found for the specified parameters'}, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
-            print(f"Error processing data: {e}")
-            return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            'property_type': property_type,
+            'region': region,
+            'price_per_square_meter': stats['price_per_square_meter'],
+            'median': stats['median'],
+            'p25': stats['p25'],
+            'p75': stats['p75'],
+            'count': stats['count'],
+        }, status=status.HTTP_200_OK)
 
 
 # class PricePerSquareMeterView(APIView):
@@ -143,6 +109,7 @@ import numpy as np
 
 
 class PriceDistributionView(APIView):
+    @cached_endpoint('price_distribution')
     def get(self, request):
         property_type = request.GET.get('property_type')
         region = request.GET.get('region')
@@ -191,27 +158,69 @@ from rest_framework import status
 from properties.models import Location
 from properties.serializers import LocationSerializer
 
+from django.db import connection
 from django.db.models import Avg
+from datetime import datetime, timedelta
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
+# One pass over the filtered properties, grouped per Location row, so the heatmap never
+# issues a query per location. {filters} is built from fixed fragments only.
+HEATMAP_SQL = """
+    SELECT l.name, l.latitude::float8, l.longitude::float8,
+           AVG(p.price)::float8,
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY p.price)::float8,
+           COUNT(*)
+    FROM properties_location l
+    JOIN properties_property p ON p.location = l.name || ', ' || l.region
+    WHERE l.latitude IS NOT NULL AND l.longitude IS NOT NULL {filters}
+    GROUP BY l.id
+    ORDER BY l.id
+"""
+
+
 class LocationHeatmapView(APIView):
     def get(self, request):
-        locations = Location.objects.all()
-        location_data = []
-        for location in locations:
-            locationName = location.name + ", " + location.region
-            # Calculate the average price for properties at this location
-            avg_price = Property.objects.filter(location=locationName).aggregate(Avg('price'))['price__avg']
-            location_data.append({
-                'name': location.name,
-                'region': location.region,
-                'latitude': location.latitude,
-                'longitude': location.longitude,
-                'average_price': avg_price
-            })
-        return Response(location_data, status=status.HTTP_200_OK)
+        property_type = request.GET.get('property_type')
+        sold = request.GET.get('sold', 'false').lower()
+        date_from = request.GET.get('date_from')
+        date_to = request.GET.get('date_to')
+
+        filters = []
+        params = []
+        if sold in ('true', 'false'):
+            filters.append('p.sold = %s')
+            params.append(sold == 'true')
+        elif sold != 'all':
+            return Response({'error': 'sold must be true, false or all'}, status=status.HTTP_400_BAD_REQUEST)
+        if property_type and property_type != 'All':
+            filters.append('UPPER(p.type) LIKE UPPER(%s)')
+            params.append(f'%{property_type}%')
+        try:
+            if date_from:
+                filters.append('p.date_added >= %s')
+                params.append(datetime.strptime(date_from, '%Y-%m-%d'))
+            if date_to:
+                filters.append('p.date_added < %s')
+                params.append(datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1))
+        except ValueError:
+            return Response({'error': 'Dates must be formatted as YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with connection.cursor() as cursor:
+            cursor.execute(HEATMAP_SQL.format(filters=''.join(f' AND {f}' for f in filters)), params)
+            rows = cursor.fetchall()
+
+        # Columnar payload: parallel arrays the map worker can zip without parsing each object
+        names, lat, lng, average, median, count = (list(column) for column in zip(*rows)) if rows else ([], [], [], [], [], [])
+        return Response({
+            'name': names,
+            'lat': lat,
+            'lng': lng,
+            'weight': average,
+            'median': median,
+            'count': count,
+        }, status=status.HTTP_200_OK)
 
 # In exchange_rates/views.py
 from rest_framework.views import APIView
@@ -220,6 +229,11 @@ from properties.models import ExchangeRate
 
 
 
+class CacheStatsView(APIView):
+    def get(self, request):
+        return Response(get_stats(), status=status.HTTP_200_OK)
+
+
 class ExchangeRatesView(APIView):
     def get(self, request):
         rates = ExchangeRate.objects.all()
@@ -239,83 +253,30 @@ from rest_framework import status
 from properties.models import Property
 
 class MetricsView(APIView):
+    @cached_endpoint('metrics')
     def get(self, request):
-        property_type = request.GET.get('property_type')
+        property_type = request.GET.get('property_type') or 'All'
         region = request.GET.get('region')
         location = request.GET.get('location')  
 
-        filter_conditions = Q(sold=False)  # Exclude sold properties
-
-        if property_type and property_type != 'All':
-            filter_conditions &= Q(type__icontains=property_type)
-
-        if region and region != 'All':
-            filter_conditions &= Q(region__name__icontains=region)  # Adjusted region filter
-
-        if location:  # Apply location filter if provided
-            filter_conditions &= Q(location__icontains=location)
-
-        properties = Property.objects.filter(filter_conditions)
-        print(f"Filtered Properties Count: {properties.count()}")
-        print(f"Filter Conditions: {filter_conditions}")
+        # Served from the table rebuilt by import_price_per_square_meter
+        stats = lookup_price_per_square_meter(property_type, region, location) or {
+            'price_per_square_meter': None, 'average_interior_size': None, 'average_land_size': None, 'listing_count': 0,
+        }
 
         if 'land' in property_type.lower():
-            # Calculate price per square meter based on land surface
-            price_per_sq_meter = properties.annotate(
-                price_per_sq_meter=Case(
-                    When(
-                        land_surface__gt=0,
-                        then=ExpressionWrapper(
-                            F('price') / F('land_surface'),
-                            output_field=FloatField()
-                        )
-                    ),
-                    default=None,
-                    output_field=FloatField()
-                )
-            ).aggregate(
-                avg_price_per_sq_meter=Avg('price_per_sq_meter'),
-                avg_land_size=Avg(Cast('land_surface', FloatField())),
-                count=Count('id')
-            )
-
-            # Rename keys in the response
             metrics = {
-                'price_per_sq_meter': price_per_sq_meter['avg_price_per_sq_meter'],
-                'average_land_size': price_per_sq_meter['avg_land_size'],
-                'count': price_per_sq_meter['count']
+                'price_per_sq_meter': stats['price_per_square_meter'],
+                'average_land_size': stats['average_land_size'],
+                'count': stats['listing_count']
             }
-            print(f"Metrics for land: {metrics}")
-
         else:
-            # Calculate price per square meter based on interior surface
-            price_per_sq_meter = properties.annotate(
-                price_per_sq_meter=Case(
-                    When(
-                        interior_surface__gt=0,
-                        then=ExpressionWrapper(
-                            F('price') / F('interior_surface'),
-                            output_field=FloatField()
-                        )
-                    ),
-                    default=None,
-                    output_field=FloatField()
-                )
-            ).aggregate(
-                avg_price_per_sq_meter=Avg('price_per_sq_meter'),
-                avg_interior_size=Avg('interior_surface'),
-                avg_land_size=Avg(Cast('land_surface', FloatField())),
-                count=Count('id')
-            )
-
-            # Rename keys in the response
             metrics = {
-                'price_per_sq_meter': price_per_sq_meter['avg_price_per_sq_meter'],
-                'average_interior_size': price_per_sq_meter['avg_interior_size'],
-                'average_land_size': price_per_sq_meter['avg_land_size'],
-                'count': price_per_sq_meter['count']
+                'price_per_sq_meter': stats['price_per_square_meter'],
+                'average_interior_size': stats['average_interior_size'],
+                'average_land_size': stats['average_land_size'],
+                'count': stats['listing_count']
             }
-            print(f"Metrics for non-land: {metrics}")
 
         return Response(metrics, status=status.HTTP_200_OK)
 
@@ -335,50 +296,78 @@ from rest_framework.views import APIView
 from rest_framework import status
 
 class AgencyRankingView(APIView):
+    # ranking_by value -> annotation used for ordering
+    RANKING_FIELDS = {
+        'count': 'property_count',
+        'value': 'total_value',
+        'average_price': 'average_price',
+        'price_per_sq_meter': 'price_per_sq_meter',
+    }
+
+    @cached_endpoint('agency_ranking')
     def get(self, request):
         property_type = request.GET.get('property_type')
         region = request.GET.get('region')
         ranking_by = request.GET.get('ranking_by', 'count')  # Default to ranking by count
 
+        if ranking_by not in self.RANKING_FIELDS:
+            return Response({'error': f"ranking_by must be one of {', '.join(self.RANKING_FIELDS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.GET['limit']) if request.GET.get('limit') else None
+            offset = int(request.GET.get('offset', 0))
+        except ValueError:
+            return Response({'error': 'limit and offset must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if (limit is not None and limit < 1) or offset < 0:
+            return Response({'error': 'limit must be positive and offset non-negative'}, status=status.HTTP_400_BAD_REQUEST)
+
         filter_conditions = Q()
         if property_type and property_type != 'All':
             filter_conditions &= Q(type__icontains=property_type)
         if region and region != 'All':
             filter_conditions &= Q(location__icontains=region)
 
-        if ranking_by == 'count':
-            agencies = Property.objects.filter(filter_conditions) \
-                .values('agency__id', 'agency__name') \
-                .annotate(property_count=Count('id')) \
-                .order_by('-property_count')
-        else:  # ranking_by == 'value'
-            agencies = Property.objects.filter(filter_conditions) \
-                .values('agency__id', 'agency__name') \
-                .annotate(total_value=Sum('price')) \
-                .order_by('-total_value')
-
-        if ranking_by == 'count':
-            response_data = [
-                {
-                    'agency_id': agency['agency__id'],
-                    'agency_name': agency['agency__name'],
-                    'property_count': agency['property_count'],
-                    'total_value': Property.objects.filter(agency__id=agency['agency__id']).aggregate(total_value=Sum('price'))['total_value']
-                }
-                for agency in agencies
-            ]
-        else:
-            response_data = [
-                {
-                    'agency_id': agency['agency__id'],
-                    'agency_name': agency['agency__name'],
-                    'property_count': Property.objects.filter(agency__id=agency['agency__id']).count(),
-                    'total_value': agency['total_value']
-                }
-                for agency in agencies
-            ]
-        
-        print(response_data)
+        # Every metric comes out of the same GROUP BY so they all honour the same filters
+        order_field = self.RANKING_FIELDS[ranking_by]
+        agencies = Property.objects.filter(filter_conditions) \
+            .values('agency__id', 'agency__name') \
+            .annotate(
+                property_count=Count('id'),
+                total_value=Sum('price'),
+                average_price=Avg('price'),
+                price_per_sq_meter=Avg(
+                    Case(
+                        When(
+                            interior_surface__gt=0,
+                            then=ExpressionWrapper(
+                                F('price') / F('interior_surface'),
+                                output_field=FloatField()
+                            )
+                        ),
+                        default=None,
+                        output_field=FloatField()
+                    )
+                ),
+            ) \
+            .order_by(F(order_field).desc(nulls_last=True), 'agency__id')
+
+        # Top-N / pagination is pushed down to SQL as LIMIT/OFFSET
+        if limit is not None:
+            agencies = agencies[offset:offset + limit]
+        elif offset:
+            agencies = agencies[offset:]
+
+        response_data = [
+            {
+                'agency_id': agency['agency__id'],
+                'agency_name': agency['agency__name'],
+                'property_count': agency['property_count'],
+                'total_value': agency['total_value'],
+                'average_price': agency['average_price'],
+                'price_per_sq_meter': agency['price_per_sq_meter'],
+            }
+            for agency in agencies
+        ]
 
         return Response(response_data, status=status.HTTP_200_OK)
 
@@ -413,9 +402,25 @@ from django.db.models import Q, F, FloatField, Avg, ExpressionWrapper, Case, Whe
 from .models import Property, Region
 
 class InvestmentOpportunitiesView(APIView):
+    SORTS = ('id', 'discount', 'z_score')
+
     def get(self, request):
         property_type = request.GET.get('property_type')
         region_name = request.GET.get('region')
+        sort = request.GET.get('sort', 'id')
+
+        try:
+            # Fractions above/below the (type, region) average price per m² that count as over/undervalued
+            over_threshold = float(request.GET.get('over_threshold', 0.1))
+            under_threshold = float(request.GET.get('under_threshold', 0.1))
+            limit = int(request.GET['limit']) if request.GET.get('limit') else None
+            offset = int(request.GET.get('offset', 0))
+        except ValueError:
+            return Response({'error': 'Thresholds must be numbers and limit/offset integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if (limit is not None and limit < 1) or offset < 0:
+            return Response({'error': 'limit must be positive and offset not negative'}, status=status.HTTP_400_BAD_REQUEST)
+        if sort not in self.SORTS:
+            return Response({'error': f"sort must be one of {', '.join(self.SORTS)}"}, status=status.HTTP_400_BAD_REQUEST)
 
         filter_conditions = Q(sold=False)  # Exclude sold properties
 
@@ -428,90 +433,84 @@ class InvestmentOpportunitiesView(APIView):
             except Region.DoesNotExist:
                 return Response({'error': 'Invalid region provided'}, status=status.HTTP_404_NOT_FOUND)
 
-        properties = Property.objects.filter(filter_conditions)
+        # Single projection of just the columns the scoring needs
+        rows = list(Property.objects.filter(filter_conditions).order_by('id').values_list(
+            'title', 'location', 'price', 'details_link', 'type', 'region_id', 'interior_surface', 'land_surface'
+        ))
 
-        if not properties.exists():
+        if not rows:
             return Response({'error': 'No data available for the given filters'}, status=status.HTTP_404_NOT_FOUND)
 
-        # Filter out properties with invalid interior_surface or land_surface values
-        valid_properties = []
-        for property in properties:
-            try:
-                interior_surface = float(property.interior_surface) if property.interior_surface else 0.0
-                land_surface = float(property.land_surface) if property.land_surface else 0.0
-
-                # Skip Villa properties without land_surface
-                if property.type.lower() == 'villa' and land_surface == 0:
-                    continue
-
-                if interior_surface >= 0 and land_surface >= 0:
-                    valid_properties.append(property)
-            except ValueError as e:
-                print(f"Invalid surface value for property {property.id}: {e}")
+        count = len(rows)
+        price = np.fromiter((float(row[2]) for row in rows), np.float64, count)
+        interior_surface = np.fromiter((float(row[6] or 0) for row in rows), np.float64, count)
+        land_surface = np.fromiter((float(row[7] or 0) for row in rows), np.float64, count)
+        is_villa = np.fromiter((row[4].lower() == 'villa' for row in rows), bool, count)
+        total_surface = interior_surface + land_surface
 
-        if not valid_properties:
+        # Villas without land surface are skipped, as are listings with no surface at all
+        valid = (interior_surface >= 0) & (land_surface >= 0) & ~(is_villa & (land_surface == 0)) & (total_surface > 0)
+        if not valid.any():
             return Response({'error': 'No valid properties found after filtering'}, status=status.HTTP_404_NOT_FOUND)
 
-        # Recalculate avg_price_per_sqm using valid_properties
-        property_ids = [property.id for property in valid_properties]
-        filtered_properties = Property.objects.filter(id__in=property_ids)
-
-        filtered_properties = filtered_properties.annotate(
-            total_surface=Cast(F('interior_surface'), FloatField()) + Cast(F('land_surface'), FloatField())
-        ).exclude(total_surface=0)
-
-        avg_price_per_sqm = filtered_properties.values('type', 'region').annotate(
-            avg_price_per_sqm=Avg(
-                Cast(F('price'), FloatField()) / Cast(F('total_surface'), FloatField())
-            )
-        ).order_by()
-
-        # Merge avg_price_per_sqm back into properties
-        avg_price_per_sqm_dict = {(item['type'], item['region']): item['avg_price_per_sqm'] for item in avg_price_per_sqm}
-
-        # Print avg_price_per_sqm_dict for debugging
-        print(f"Average Price per SQM: {avg_price_per_sqm_dict}")
+        price_per_sqm = np.divide(price, total_surface, out=np.zeros(count), where=total_surface > 0)
+
+        # Per (type, region) mean and standard deviation in one bincount pass
+        groups = {}
+        group_ids = np.fromiter((groups.setdefault((row[4], row[5]), len(groups)) for row in rows), np.int64, count)
+        weights = valid.astype(np.float64)
+        group_count = np.bincount(group_ids, weights=weights, minlength=len(groups))
+        group_sum = np.bincount(group_ids, weights=price_per_sqm * weights, minlength=len(groups))
+        group_sq_sum = np.bincount(group_ids, weights=price_per_sqm ** 2 * weights, minlength=len(groups))
+        group_mean = np.divide(group_sum, group_count, out=np.zeros(len(groups)), where=group_count > 0)
+        group_std = np.sqrt(np.maximum(np.divide(group_sq_sum, group_count, out=np.zeros(len(groups)), where=group_count > 0) - group_mean ** 2, 0))
+
+        mean = group_mean[group_ids]
+        std = group_std[group_ids]
+        scored = valid & (mean > 0)
+        z_score = np.divide(price_per_sqm - mean, std, out=np.full(count, np.nan), where=scored & (std > 0))
+        discount = np.divide(mean - price_per_sqm, mean, out=np.zeros(count), where=scored)
+
+        overvalued_mask = scored & (price_per_sqm > mean * (1 + over_threshold))
+        undervalued_mask = scored & (price_per_sqm < mean * (1 - under_threshold))
+
+        def serialize(mask, descending_discount):
+            indices = np.flatnonzero(mask)
+            if sort == 'discount':
+                # Undervalued: biggest discount first; overvalued: biggest premium first
+                indices = indices[np.argsort(-discount[indices] if descending_discount else discount[indices], kind='stable')]
+            elif sort == 'z_score':
+                key = np.nan_to_num(z_score[indices])
+                indices = indices[np.argsort(key if descending_discount else -key, kind='stable')]
+            total = len(indices)
+            indices = indices[offset:offset + limit] if limit is not None else indices[offset:]
+            return total, [
+                {
+                    'title': rows[i][0],
+                    'location': rows[i][1],
+                    'price': rows[i][2],
+                    'details_link': rows[i][3],
+                    'price_per_sqm': float(price_per_sqm[i]),
+                    'average_price_per_sqm': float(mean[i]),
+                    'discount': float(discount[i]),
+                    'z_score': None if np.isnan(z_score[i]) else float(z_score[i]),
+                }
+                for i in indices
+            ]
 
-        def get_normalized_price(property):
-            try:
-                price = float(property.price)
-                interior_surface = float(property.interior_surface) if property.interior_surface else 0.0
-                land_surface = float(property.land_surface) if property.land_surface else 0.0
-                total_surface = interior_surface + land_surface
-
-                if total_surface == 0:
-                    return None
-
-                normalized_price = price / total_surface
-                return normalized_price
-            except Exception as e:
-                print(f"Error calculating normalized price for property {property.id}: {e}")
-                return None
-
-        overvalued_properties = []
-        undervalued_properties = []
-        for property in valid_properties:
-            normalized_price = get_normalized_price(property)
-            if normalized_price is not None:
-                avg_price_per_sqm = avg_price_per_sqm_dict.get((property.type, property.region_id), None)
-                if avg_price_per_sqm:
-                    # Print comparison details for debugging
-                    print(f"Property {property.id} - Normalized Price: {normalized_price}, Avg Price per SQM: {avg_price_per_sqm}")
-                    if normalized_price > avg_price_per_sqm * 1.1:  # 10% above the average
-                        overvalued_properties.append(property)
-                    elif normalized_price < avg_price_per_sqm * 0.9:  # 10% below the average
-                        undervalued_properties.append(property)
-
-        overvalued_data = [{'title': prop.title, 'location': prop.location, 'price': prop.price, 'details_link': prop.details_link} for prop in overvalued_properties]
-        undervalued_data = [{'title': prop.title, 'location': prop.location, 'price': prop.price, 'details_link': prop.details_link} for prop in undervalued_properties]
+        overvalued_count, overvalued_data = serialize(overvalued_mask, descending_discount=False)
+        undervalued_count, undervalued_data = serialize(undervalued_mask, descending_discount=True)
 
         return Response({
             'overvalued': overvalued_data,
-            'undervalued': undervalued_data
+            'undervalued': undervalued_data,
+            'overvalued_count': overvalued_count,
+            'undervalued_count': undervalued_count,
         }, status=status.HTTP_200_OK)
 
     
 class PropertyTypeDistributionView(APIView):
+    @cached_endpoint('property_type_distribution')
     def get(self, request):
         region = request.GET.get('region', 'All')
 
@@ -537,12 +536,45 @@ from rest_framework import status
 from .models import Property
 from .serializers import PropertySerializer
 
+import json
+from decimal import Decimal
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from properties.models import ExchangeRate
+from .pagination import parse_limit
+
+
 class ScatterPlotDataView(APIView):
+    # Any concrete column can be projected; the default is just what the chart plots
+    ALLOWED_FIELDS = [field.attname for field in Property._meta.concrete_fields]
+    DEFAULT_FIELDS = ['id', 'price', 'interior_surface', 'land_surface']
+    STREAM_CHUNK_SIZE = 2000
+    MAX_PAGE_SIZE = 5000
+    # The dashboard's currency toggle sends symbols; ExchangeRate is keyed by ISO code
+    CURRENCY_CODES = {'Rs': 'MUR', '€': 'EUR', '$': 'USD'}
+
     def get(self, request):
         currency = request.query_params.get('currency')
+        currency = self.CURRENCY_CODES.get(currency, currency)
         property_type = request.query_params.get('propertyType')
         region = request.query_params.get('region')
         location = request.query_params.get('location')
+        # Not 'format', which DRF reserves for renderer selection
+        output_format = request.query_params.get('output', 'json')
+
+        fields = [field.strip() for field in request.query_params.get('fields', '').split(',') if field.strip()] or self.DEFAULT_FIELDS
+        unknown = [field for field in fields if field not in self.ALLOWED_FIELDS]
+        if unknown:
+            return Response({'error': f"Unknown fields: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+        if output_format not in ('json', 'ndjson'):
+            return Response({'error': 'output must be json or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Prices are stored in MUR; ExchangeRate holds MUR -> currency rates
+        rate = None
+        if currency and currency != 'MUR':
+            rate = ExchangeRate.objects.filter(currency=currency).values_list('rate', flat=True).first()
+            if rate is None:
+                return Response({'error': f'No exchange rate for {currency}'}, status=status.HTTP_400_BAD_REQUEST)
 
         properties = Property.objects.filter(sold=False)  # Exclude sold properties
 
@@ -555,8 +587,56 @@ class ScatterPlotDataView(APIView):
         if location:
             properties = properties.filter(location__icontains=location)
 
-        serializer = PropertySerializer(properties, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # id is always fetched as the keyset cursor, but only returned if requested
+        columns = fields if 'id' in fields else ['id'] + fields
+        rows = properties.order_by('id').values_list(*columns)
+
+        def to_item(row):
+            item = {}
+            for field, value in zip(columns, row):
+                if isinstance(value, Decimal):
+                    value = float(value)
+                if field == 'price' and rate is not None and value is not None:
+                    value = value * rate
+                item[field] = value
+            if 'id' not in fields:
+                del item['id']
+            return item
+
+        # Cursor pagination: ?limit=N, then ?cursor=<next_cursor> from the previous page
+        if request.query_params.get('limit'):
+            try:
+                limit = parse_limit(request.query_params['limit'], maximum=self.MAX_PAGE_SIZE)
+                cursor = int(request.query_params.get('cursor', 0))
+            except ValueError:
+                return Response({'error': 'limit must be a positive integer and cursor an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            page = list(rows.filter(id__gt=cursor)[:limit + 1])
+            has_more = len(page) > limit
+            page = page[:limit]
+            return Response({
+                'results': [to_item(row) for row in page],
+                'next_cursor': page[-1][0] if has_more else None,
+            }, status=status.HTTP_200_OK)
+
+        # Unpaginated: stream from a server-side cursor so memory stays flat with the result size
+        def dumps(item):
+            return json.dumps(item, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+        def stream_ndjson():
+            for row in rows.iterator(chunk_size=self.STREAM_CHUNK_SIZE):
+                yield dumps(to_item(row)) + '\n'
+
+        def stream_json():
+            yield '['
+            separator = ''
+            for row in rows.iterator(chunk_size=self.STREAM_CHUNK_SIZE):
+                yield separator + dumps(to_item(row))
+                separator = ','
+            yield ']'
+
+        if output_format == 'ndjson':
+            return StreamingHttpResponse(stream_ndjson(), content_type='application/x-ndjson')
+        return StreamingHttpResponse(stream_json(), content_type='application/json')
 
 
 # views.py
@@ -701,33 +781,47 @@ def get_agency_details(request):
 
     return JsonResponse(data, safe=False)
 
-from datetime import datetime
-from django.db.models import OuterRef, Subquery, F, FloatField, ExpressionWrapper, Max
-from django.db.models.functions import Abs
 from django.http import JsonResponse
 from .models import Property, PropertyPriceHistory
+from .pagination import keyset_page, parse_date_range, parse_fields, parse_limit
 from django.utils import timezone
 from datetime import datetime, timedelta
 
-
-class Abs(Func):
-    function = 'ABS'
+PRICE_CHANGE_FIELDS = [
+    'id', 'date', 'price', 'previous_price', 'price_change', 'price_change_percentage', 'direction',
+    'property_id', 'property__title', 'property__details_link', 'property__interior_surface',
+]
+# sort_by -> keyset ordering; the trailing id makes every position unique
+PRICE_CHANGE_SORTS = {
+    'price_change': ['-abs_price_change', '-id'],  # largest first, matches pricehistory_abs_change_idx
+    'date': ['-date', '-id'],  # newest first, matches pricehistory_change_date_idx
+    'interior_size': ['-property__interior_surface', '-id'],
+}
 
 def get_price_changes(request):
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
     property_type = request.GET.get('property_type')
     region = request.GET.get('region')
-    sort_by = request.GET.get('sort_by', 'price_change')  # Default sort by price change
+    ordering = PRICE_CHANGE_SORTS.get(request.GET.get('sort_by') or 'price_change')  # Default sort by price change
+    if ordering is None:
+        return JsonResponse({'error': f"sort_by must be one of {', '.join(PRICE_CHANGE_SORTS)}"}, status=400)
 
-    # Convert string dates to datetime objects
-    start_date = datetime.strptime(start_date, '%Y-%m-%d')
-    end_date = datetime.strptime(end_date, '%Y-%m-%d')
+    try:
+        start_date, end_date = parse_date_range(request.GET.get('start_date'), request.GET.get('end_date'))
+        limit = parse_limit(request.GET.get('limit'))
+    except ValueError:
+        return JsonResponse({'error': 'Dates must be YYYY-MM-DD and limit a positive integer'}, status=400)
 
-    # Fetch price changes within the date range
+    # Deltas are stored on the history rows at import time, so this is an index scan
+    # instead of a previous-price lookup per row
     price_changes = PropertyPriceHistory.objects.filter(
+        previous_price__isnull=False,
+        direction__in=['up', 'down'],
         property__sold=False  # Exclude sold properties
-    ).select_related('property')
+    )
+    if start_date:
+        price_changes = price_changes.filter(date__gte=start_date)
+    if end_date:
+        price_changes = price_changes.filter(date__lt=end_date)
 
     # Apply filters for property type and region
     if property_type and property_type != 'All':
@@ -735,111 +829,97 @@ def get_price_changes(request):
     if region and region != 'All':
         price_changes = price_changes.filter(property__region__name=region)
 
-    # Find previous price history entry for each price change
-    previous_price_subquery = PropertyPriceHistory.objects.filter(
-        property_id=OuterRef('property_id'),
-        date__lt=OuterRef('date')
-    ).order_by('-date').values('price')[:1]
-
-    # Annotate the query with previous price, price change, and percentage change
-    price_changes = price_changes.annotate(
-        previous_price=Subquery(previous_price_subquery),
-        price_change=ExpressionWrapper(F('price') - F('previous_price'), output_field=FloatField()),
-        price_change_absolute=ExpressionWrapper(Abs(F('price') - F('previous_price')), output_field=FloatField()),
-        price_change_percentage=ExpressionWrapper((F('price') - F('previous_price')) / F('previous_price') * 100, output_field=FloatField()),
-        price_change_date=F('date')  # Get the date of the price change
-    ).exclude(price_change=0)
-
-    # Sorting
-    if sort_by == 'price_change':
-        price_changes = price_changes.order_by('-price_change_absolute')
-    elif sort_by == 'interior_size':
-        price_changes = price_changes.order_by('-property__interior_surface')
-
-    # Calculate the date one week ago
-    one_week_ago = datetime.now() - timedelta(days=7)
-
-    # Filter latest properties
-    latest_properties = Property.objects.filter(
-        Q(sold=False),  # Exclude sold properties
-        date_added__gte=one_week_ago,
-        **({'type': property_type} if property_type != 'All' else {}),
-        **({'location__icontains': region} if region != 'All' else {})  # Use icontains for partial match
-    ).order_by('-date_added')
-
-    # Prepare latest properties data
-    latest_properties_data = [
-        {
-            'id': prop.id,
-            'title': prop.title,
-            'price': prop.price,
-            'date_added': prop.date_added,
-            'details_link': prop.details_link,
-        }
-        for prop in latest_properties
-    ]
+    # The sort is the keyset order, so ?cursor=<next_cursor> continues it across pages
+    keys = [field.lstrip('-') for field in ordering]
+    try:
+        page, next_cursor = keyset_page(
+            price_changes.values(*dict.fromkeys(PRICE_CHANGE_FIELDS + keys)), ordering, request.GET.get('cursor'), limit,
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
     # Prepare price changes data
     data = {
         'price_changes': [{
-            'property_id': change.property.id,
-            'property_title': change.property.title,
-            'current_price': change.price,
-            'previous_price': change.previous_price,
-            'price_change': change.price_change,
-            'price_change_percentage': change.price_change_percentage,
-            'price_up': change.price > change.previous_price if change.previous_price is not None else None,
-            'details_link': change.property.details_link,
-            'price_change_date': change.price_change_date  # Correctly reference the date of the price change
-        } for change in price_changes],
-        'latest_properties': latest_properties_data
+            'property_id': change['property_id'],
+            'property_title': change['property__title'],
+            'current_price': change['price'],
+            'previous_price': change['previous_price'],
+            'price_change': change['price_change'],
+            'price_change_percentage': change['price_change_percentage'],
+            'price_up': change['direction'] == 'up',
+            'details_link': change['property__details_link'],
+            'price_change_date': change['date']
+        } for change in page],
+        'next_cursor': next_cursor,
     }
 
     # Return response as JSON
     return JsonResponse(data, safe=False)
 
+LISTING_FIELDS = [
+    'id', 'title', 'price', 'date_added', 'details_link', 'location', 'description', 'agency_name',
+    'land_surface', 'interior_surface', 'swimming_pool', 'construction_year', 'bedrooms', 'bathrooms',
+    'toilets', 'aircon', 'general_features', 'indoor_features', 'outdoor_features',
+    'location_description', 'type', 'ref',
+]
+# sort_by -> keyset ordering; the trailing id makes every position unique
+LISTING_SORTS = {
+    'date_added': ['-date_added', 'id'],  # newest first, matches property_unsold_added_idx
+    'price': ['price', 'id'],
+    '-price': ['-price', 'id'],
+    'interior_surface': ['interior_surface', 'id'],
+    '-interior_surface': ['-interior_surface', 'id'],
+}
+
+
+def listing_page(request, properties, default_fields):
+    """
+    Keyset page of `properties` for ?sort_by=, ?fields=, ?limit= and ?cursor=.
+
+    Only the requested columns (plus the sort keys) are fetched. Returns (rows, next_cursor)
+    or raises ValueError for bad parameters.
+    """
+    ordering = LISTING_SORTS.get(request.GET.get('sort_by') or 'date_added')
+    if ordering is None:
+        raise ValueError(f"sort_by must be one of {', '.join(LISTING_SORTS)}")
+    fields = parse_fields(request.GET.get('fields'), LISTING_FIELDS, default_fields)
+    limit = parse_limit(request.GET.get('limit'))
+
+    keys = [field.lstrip('-') for field in ordering]
+    rows, next_cursor = keyset_page(
+        properties.values(*dict.fromkeys(fields + keys)), ordering, request.GET.get('cursor'), limit,
+    )
+    return [{field: row[field] for field in fields} for row in rows], next_cursor
+
+
 def get_latest_properties(request):
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
     property_type = request.GET.get('property_type')
     region = request.GET.get('region')
-    sort_by = request.GET.get('sort_by', 'date_added')  # Default to sorting by date_added
 
-    # Convert string dates to datetime objects
-    if start_date:
-        start_date = datetime.strptime(start_date, '%Y-%m-%d')
-    if end_date:
-        end_date = datetime.strptime(end_date, '%Y-%m-%d')
-
-    # Calculate the date one week ago
-    one_week_ago = datetime.now() - timedelta(days=7)
+    try:
+        start_date, end_date = parse_date_range(request.GET.get('start_date'), request.GET.get('end_date'))
+    except ValueError:
+        return JsonResponse({'error': 'Dates must be YYYY-MM-DD'}, status=400)
 
-    # Build the filter conditions
-    filter_conditions = Q(sold=False, date_added__gte=one_week_ago)
+    # Build the filter conditions; the default window is the last week
+    filter_conditions = Q(sold=False, date_added__gte=start_date or timezone.now() - timedelta(days=7))
+    if end_date:
+        filter_conditions &= Q(date_added__lt=end_date)
     if property_type and property_type != 'All':
         filter_conditions &= Q(type=property_type)
     if region and region != 'All':
         filter_conditions &= Q(location__icontains=f', {region}')
 
-    # Filter latest properties
-    latest_properties = Property.objects.filter(filter_conditions).order_by(sort_by)
-
-    # Prepare latest properties data
-    latest_properties_data = [
-        {
-            'id': prop.id,
-            'title': prop.title,
-            'price': prop.price,
-            'date_added': prop.date_added,
-            'details_link': prop.details_link,
-            'interior_surface': prop.interior_surface,  # Include interior surface
-            'location': prop.location,  # Include location
-        }
-        for prop in latest_properties
-    ]
+    try:
+        latest_properties, next_cursor = listing_page(
+            request, Property.objects.filter(filter_conditions),
+            ['id', 'title', 'price', 'date_added', 'details_link', 'interior_surface', 'location'],
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
-    # Return response as JSON
-    return JsonResponse({'latest_properties': latest_properties_data}, safe=False)
+    return JsonResponse({'latest_properties': latest_properties, 'next_cursor': next_cursor}, safe=False)
 
 from django.http import JsonResponse
 from .models import PropertyPriceHistory
@@ -880,71 +960,52 @@ def get_historical_prices(request):
     return JsonResponse(list(page_obj.object_list), safe=False)
 from django.db.models import Avg
 from django.http import JsonResponse
-from .models import PropertyPriceHistory
+from .models import PriceRollup
+from .price_rollups import price_series
 
+@cached_endpoint('average_prices')
 def get_average_prices(request):
     property_type = request.GET.get('property_type', 'All')
     region = request.GET.get('region', 'All')
-    
-    queryset = PropertyPriceHistory.objects.filter(property__sold=False)
-    if property_type != 'All':
-        queryset = queryset.filter(property__type=property_type)
-    if region != 'All':
-        queryset = queryset.filter(property__region__name=region)
-    
-    # Group by month and calculate the average price
-    average_prices = queryset.extra(select={'month': "DATE_TRUNC('month', date)"}).values('month').annotate(avg_price=Avg('price')).order_by('month')
 
-    return JsonResponse(list(average_prices), safe=False)
+    # Monthly statistics come from the precomputed rollups, not the price history
+    average_prices = [
+        {'month': month, 'avg_price': avg_price, 'median_price': median_price, 'count': count}
+        for month, count, avg_price, median_price, _ in price_series(PriceRollup.MONTH, property_type, region)
+    ]
 
-from django.db.models import Avg
-from django.http import JsonResponse
-from .models import PropertyPriceHistory
+    return JsonResponse(average_prices, safe=False)
 
-from django.db.models import Avg
-from django.http import JsonResponse
-from .models import PropertyPriceHistory
-from django.db.models import Avg
-from django.http import JsonResponse
-from .models import PropertyPriceHistory
-from django.db.models.functions import TruncDay
+ROLLING_WINDOW_DAYS = 7
+MAX_ROLLING_WINDOW_DAYS = 365
 
+@cached_endpoint('rolling_average_prices')
 def get_rolling_average_prices(request):
     property_type = request.GET.get('property_type', 'All')
     region = request.GET.get('region', 'All')
-    locations = request.GET.get('location', '')
-
-    # Split locations by comma if it's a string
-    if locations:
-        locations = locations.split(',')
-    
-    print(f"Property Type: {property_type}")
-    print(f"Region: {region}")
-    print(f"Locations: {locations}")
+    locations = [location for location in request.GET.get('location', '').split(',') if location.strip()]
 
-    queryset = PropertyPriceHistory.objects.filter(property__sold=False)
-    
-    if property_type != 'All':
-        queryset = queryset.filter(property__type=property_type)
-    if region != 'All':
-        queryset = queryset.filter(property__region__name=region)
-    if locations:
-        location_query = Q()
-        for location in locations:
-            location_query |= Q(property__location__icontains=location)
-        queryset = queryset.filter(location_query)
-
-    # Aggregate average prices by date
-    date_prices = queryset.annotate(
-        truncated_date=TruncDay('date')
-    ).values('truncated_date').annotate(
-        avg_price=Avg('price')
-    ).order_by('truncated_date')
-    
-    print(f"Queryset Count: {queryset.count()}")
-    print(date_prices)
+    try:
+        window = int(request.GET.get('window') or ROLLING_WINDOW_DAYS)
+    except ValueError:
+        return JsonResponse({'error': 'window must be an integer'}, status=400)
+    if not 1 <= window <= MAX_ROLLING_WINDOW_DAYS:
+        return JsonResponse({'error': f'window must be between 1 and {MAX_ROLLING_WINDOW_DAYS} days'}, status=400)
+
+    # Daily statistics from the rollups plus the count weighted mean over the last `window` days
+    date_prices = [
+        {
+            'truncated_date': day,
+            'avg_price': avg_price,
+            'rolling_avg_price': rolling_avg_price,
+            'median_price': median_price,
+            'count': count,
+        }
+        for day, count, avg_price, median_price, rolling_avg_price
+        in price_series(PriceRollup.DAY, property_type, region, locations, window)
+    ]
 
-    return JsonResponse(list(date_prices), safe=False)
+    return JsonResponse(date_prices, safe=False)
 
 
 from django.http import JsonResponse
@@ -964,33 +1025,17 @@ def get_sold_properties(request):
     
     if region != 'All':
         properties = properties.filter(region__name=region)
-    
-    data = [{
-        'id': prop.id,
-        'title': prop.title,
-        'price': prop.price,
-        'date_added': prop.date_added,
-        'details_link': prop.details_link,
-        'location': prop.location,
-        'description': prop.description,
-        'agency_name': prop.agency_name,
-        'land_surface': prop.land_surface,
-        'interior_surface': prop.interior_surface,
-        'swimming_pool': prop.swimming_pool,
-        'construction_year': prop.construction_year,
-        'bedrooms': prop.bedrooms,
-        'bathrooms': prop.bathrooms,
-        'toilets': prop.toilets,
-        'aircon': prop.aircon,
-        'general_features': prop.general_features,
-        'indoor_features': prop.indoor_features,
-        'outdoor_features': prop.outdoor_features,
-        'location_description': prop.location_description,
-        'type': prop.type,
-        'ref': prop.ref,
-    } for prop in properties]
 
-    return JsonResponse(data, safe=False)
+    # The sold archive only grows: page through it and fetch the long text columns
+    # (description, features) only when ?fields= asks for them
+    try:
+        sold_properties, next_cursor = listing_page(
+            request, properties, ['id', 'title', 'price', 'date_added', 'location', 'type', 'ref', 'details_link'],
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({'sold_properties': sold_properties, 'next_cursor': next_cursor}, safe=False)
 
 
 
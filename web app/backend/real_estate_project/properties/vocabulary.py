@@ -0,0 +1,71 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .models import FeatureTerm, Property
+
+# Properties per comma separated term; DISTINCT so a listing repeating a term counts once
+TERM_COUNTS_SQL = """
+    SELECT term, COUNT(*) FROM (
+        SELECT DISTINCT id, TRIM(UNNEST(string_to_array({column}, ','))) AS term
+        FROM properties_property
+        WHERE {column} IS NOT NULL
+    ) terms
+    WHERE term <> ''
+    GROUP BY term
+"""
+
+
+def map_location_to_region(location):
+    if 'West' in location:
+        return 'West'
+    elif 'East' in location:
+        return 'East'
+    elif 'North' in location:
+        return 'North'
+    elif 'South' in location:
+        return 'South'
+    else:
+        return 'Center'
+
+
+def term_counts(column):
+    with connection.cursor() as cursor:
+        cursor.execute(TERM_COUNTS_SQL.format(column=connection.ops.quote_name(column)))
+        return dict(cursor.fetchall())
+
+
+def rebuild_feature_vocabulary():
+    """Recompute every FeatureTerm from the property table. Returns the number of terms."""
+    locations = dict(
+        Property.objects.exclude(location='').values_list('location').annotate(count=Count('id')).order_by()
+    )
+    regions = Counter()
+    for location, count in locations.items():
+        regions[map_location_to_region(location)] += count
+
+    vocabulary = {
+        'description': term_counts('description'),
+        'general': term_counts('general_features'),
+        'type': dict(Property.objects.exclude(type='').values_list('type').annotate(count=Count('id')).order_by()),
+        'location': locations,
+        'region': regions,
+    }
+    terms = [
+        FeatureTerm(kind=kind, term=term[:255], count=count)
+        for kind, counts in vocabulary.items()
+        for term, count in counts.items()
+    ]
+
+    with transaction.atomic():
+        FeatureTerm.objects.all().delete()
+        FeatureTerm.objects.bulk_create(terms, batch_size=1000, ignore_conflicts=True)
+    return len(terms)
+
+
+def load_feature_vocabulary():
+    vocabulary = {kind: {} for kind, _ in FeatureTerm.KINDS}
+    for kind, term, count in FeatureTerm.objects.order_by('kind', 'term').values_list('kind', 'term', 'count'):
+        vocabulary[kind][term] = count
+    return vocabulary
@@ -0,0 +1,202 @@
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.preprocessing import MultiLabelBinarizer
+
+GENERAL_PREFIX = 'general_feature_'
+DESCRIPTION_PREFIX = 'description_feature_'
+REGION_PREFIX = 'region_'
+INTERACTION = 'interaction_private_pool_beachfront'
+NUMERIC_COLUMNS = ['interior_surface', 'land_surface', 'bedrooms', 'bathrooms', 'toilets', 'aircon']
+
+
+def clean_surface_area(value):
+    if isinstance(value, str):
+        value = re.sub(r'[^0-9.]', '', value)  # Remove non-numeric characters
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def to_list(value):
+    # general_features arrives as a list from the frontend, description as a ', ' joined string
+    if isinstance(value, str):
+        return value.split(', ')
+    return list(value or [])
+
+
+def build_feature_matrix(items, feature_names):
+    """
+    Encode request payloads into the model's feature layout.
+
+    Produces the same columns as ValuationPredictionView builds with pandas for a single
+    row, but fills one preallocated float matrix for the whole batch: numeric columns are
+    assigned as arrays and the multi-hot columns with a single fancy-indexed write.
+    """
+    columns = {name: index for index, name in enumerate(feature_names)}
+    X = np.zeros((len(items), len(feature_names)), dtype=np.float64)
+
+    interior = np.fromiter((clean_surface_area(item.get('interior_surface', 0)) for item in items), np.float64, len(items))
+    land = np.fromiter((clean_surface_area(item.get('land_surface', 0)) for item in items), np.float64, len(items))
+    numeric = {
+        'interior_surface': interior,
+        'land_surface': land,
+        'interior_surface_squared': interior ** 2,
+        'land_surface_squared': land ** 2,
+    }
+    for name in ('bedrooms', 'bathrooms', 'toilets', 'aircon'):
+        numeric[name] = np.fromiter((int(item.get(name, 0) or 0) for item in items), np.float64, len(items))
+    for name, values in numeric.items():
+        if name in columns:
+            X[:, columns[name]] = values
+
+    rows, cols = [], []
+
+    def mark(row, name):
+        col = columns.get(name)
+        if col is not None:
+            rows.append(row)
+            cols.append(col)
+
+    for row, item in enumerate(items):
+        description = to_list(item.get('description', ''))
+        for feature in to_list(item.get('general_features', [])):
+            mark(row, GENERAL_PREFIX + feature)
+        for feature in description:
+            mark(row, DESCRIPTION_PREFIX + feature)
+        if 'Private pool' in description and 'Beachfront' in description:
+            mark(row, INTERACTION)
+        mark(row, REGION_PREFIX + str(item.get('region', '')))
+
+    if rows:
+        X[np.asarray(rows), np.asarray(cols)] = 1.0
+    return X
+
+
+def tokenize(value):
+    """
+    Split a feature list into exact tokens.
+
+    Lists come straight from request payloads; strings are the comma joined columns of the
+    database / CSV (',' from the scraper, ', ' from older exports). NaN and None are empty.
+    """
+    if isinstance(value, str):
+        return [token.strip() for token in value.split(',') if token.strip()]
+    if isinstance(value, (list, tuple, set)):
+        return [str(token).strip() for token in value if str(token).strip()]
+    return []
+
+
+def to_number(value):
+    # Missing or unparsable values become NaN so the fitted medians can fill them
+    if value is None or value == '':
+        return np.nan
+    if isinstance(value, str):
+        if value in ('Yes', 'No'):
+            return 1.0 if value == 'Yes' else 0.0
+        value = re.sub(r'[^0-9.]', '', value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def column_values(X, name):
+    # Accepts a DataFrame or a list of dict-like request payloads
+    if hasattr(X, 'columns'):
+        return X[name].tolist() if name in X.columns else [None] * len(X)
+    return [item.get(name) for item in X]
+
+
+class PropertyFeatureEncoder(BaseEstimator, TransformerMixin):
+    """
+    Fitted encoder from raw listing rows to the valuation feature matrix.
+
+    Learns the general feature, description and region vocabularies and the medians used
+    to fill missing numbers, then encodes rows into a CSR matrix: numeric columns, their
+    squared surfaces, one multi-hot block per vocabulary and the private pool x beachfront
+    interaction. Tokens match exactly, so 'Pool' no longer fires for 'Private pool'.
+
+    It is the first step of the pickled valuation pipelines, so training and serving run
+    the same code. Column names follow the layout of the older feature_names pickles.
+    """
+
+    def fit(self, X, y=None):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN column -> median 0
+            self.medians_ = np.nan_to_num(np.nanmedian(self._numeric(X), axis=0))
+        self.general_ = MultiLabelBinarizer().fit(tokenize(value) for value in column_values(X, 'general_features'))
+        self.description_ = MultiLabelBinarizer().fit(tokenize(value) for value in column_values(X, 'description'))
+        self.regions_ = sorted({str(value) for value in column_values(X, 'region') if value})
+        self.feature_names_ = np.array(
+            NUMERIC_COLUMNS[:2]
+            + ['interior_surface_squared', 'land_surface_squared']
+            + NUMERIC_COLUMNS[2:]
+            + [GENERAL_PREFIX + name for name in self.general_.classes_]
+            + [DESCRIPTION_PREFIX + name for name in self.description_.classes_]
+            + [INTERACTION]
+            + [REGION_PREFIX + name for name in self.regions_],
+            dtype=object,
+        )
+        return self
+
+    def transform(self, X):
+        numeric = self._numeric(X)
+        numeric = np.where(np.isnan(numeric), self.medians_, numeric)
+        surfaces = numeric[:, :2]
+        dense = np.hstack([surfaces, surfaces ** 2, numeric[:, 2:]])
+
+        general = self._multi_hot(column_values(X, 'general_features'), self.general_.classes_)
+        description = self._multi_hot(column_values(X, 'description'), self.description_.classes_)
+        interaction = self._interaction(description)
+        regions = self._multi_hot(([str(value)] if value else [] for value in column_values(X, 'region')), self.regions_)
+        return sp.hstack([sp.csr_matrix(dense), general, description, interaction, regions], format='csr')
+
+    def get_feature_names_out(self, input_features=None):
+        return self.feature_names_
+
+    def _numeric(self, X):
+        return np.column_stack([
+            np.fromiter((to_number(value) for value in column_values(X, name)), np.float64)
+            for name in NUMERIC_COLUMNS
+        ])
+
+    @staticmethod
+    def _multi_hot(values, classes):
+        # Build the CSR arrays directly; unknown tokens are dropped without a warning per row
+        index = {name: position for position, name in enumerate(classes)}
+        indptr, indices = [0], []
+        for value in values:
+            tokens = value if isinstance(value, list) else tokenize(value)
+            indices.extend(sorted({index[token] for token in tokens if token in index}))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float64)
+        return sp.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(classes)))
+
+    def _interaction(self, description):
+        classes = list(self.description_.classes_)
+        if 'Private pool' not in classes or 'Beachfront' not in classes:
+            return sp.csr_matrix((description.shape[0], 1))
+        both = description[:, classes.index('Private pool')].multiply(description[:, classes.index('Beachfront')])
+        return sp.csr_matrix(both)
+
+
+def has_encoder(model):
+    return isinstance(getattr(model, 'named_steps', {}).get('features'), PropertyFeatureEncoder)
+
+
+def predict_prices(model, feature_names, items):
+    """
+    Predict with either pipeline layout found on disk: ones starting with a fitted
+    PropertyFeatureEncoder take the raw payloads, older ones get a dense matrix built for
+    their pickled feature_names.
+    """
+    if has_encoder(model):
+        return model.predict(items)
+    X = build_feature_matrix(items, feature_names)
+    return model.predict(pd.DataFrame(X, columns=feature_names))
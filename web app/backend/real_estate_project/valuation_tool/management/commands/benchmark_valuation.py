@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+from valuation_tool.registry import registry
+from valuation_tool.views import ValuationBatchPredictionView, ValuationPredictionView
+
+
+class Command(BaseCommand):
+    help = 'Measure /api/predict/ latency with cold and warm models, and /api/predict/batch/ throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', type=str, default='Penthouse', help='Property type to score')
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        payload = {
+            'type': options['type'],
+            'region': 'North',
+            'interior_surface': '200',
+            'land_surface': '0',
+            'bedrooms': 3,
+            'bathrooms': 2,
+            'toilets': 3,
+            'aircon': 1,
+            'general_features': ['Sea view'],
+            'description': 'Private pool, Beachfront',
+        }
+        factory = APIRequestFactory()
+        view = ValuationPredictionView.as_view()
+
+        def run(cold):
+            timings = []
+            for _ in range(options['requests']):
+                if cold:
+                    # Equivalent to the previous joblib.load on every request
+                    registry.clear()
+                request = factory.post('/api/predict/', payload, format='json')
+                start = time.perf_counter()
+                response = view(request)
+                timings.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    self.stderr.write(self.style.ERROR(f'Prediction failed: {response.data}'))
+                    return None
+            return timings
+
+        self.stdout.write(f"{'mode':>6} {'p50 ms':>10} {'p99 ms':>10}")
+        for mode, cold in (('cold', True), ('warm', False)):
+            timings = run(cold)
+            if timings is None:
+                return
+            timings.sort()
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            self.stdout.write(f'{mode:>6} {statistics.median(timings):>10.2f} {p99:>10.2f}')
+
+        # Throughput: batch endpoint vs the same rows sent one request at a time
+        batch = [dict(payload, interior_surface=str(100 + i % 300)) for i in range(options['batch_size'])]
+        batch_view = ValuationBatchPredictionView.as_view()
+        request = factory.post('/api/predict/batch/', {'properties': batch}, format='json')
+        start = time.perf_counter()
+        batch_view(request)
+        batch_seconds = time.perf_counter() - start
+
+        single_rows = min(options['batch_size'], options['requests'])
+        start = time.perf_counter()
+        for item in batch[:single_rows]:
+            view(factory.post('/api/predict/', item, format='json'))
+        single_seconds = time.perf_counter() - start
+
+        single_rate = single_rows / single_seconds
+        batch_rate = len(batch) / batch_seconds
+        self.stdout.write(f'single: {single_rate:,.0f} rows/s')
+        self.stdout.write(f'batch:  {batch_rate:,.0f} rows/s ({batch_rate / single_rate:.1f}x)')
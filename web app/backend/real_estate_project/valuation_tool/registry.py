@@ -0,0 +1,81 @@
+import glob
+import os
+import threading
+from collections import OrderedDict
+
+import joblib
+from django.conf import settings
+
+MODEL_DIR = os.path.join(settings.BASE_DIR, 'valuation_tool')
+MODEL_PREFIX = 'valuation_model_'
+
+
+def model_key(property_type):
+    # 'House / Villa' -> 'House _ Villa', matching the file names written by valuation_tool_ML.py
+    return property_type.replace('/', '_')
+
+
+def model_paths(key):
+    return (
+        os.path.join(MODEL_DIR, f'{MODEL_PREFIX}{key}.pkl'),
+        os.path.join(MODEL_DIR, f'feature_names_{key}.pkl'),
+    )
+
+
+class ModelRegistry:
+    """
+    In-process cache of the per-type valuation pipelines and their feature lists.
+
+    Entries are kept in a bounded LRU and reloaded when either pickle's mtime changes,
+    so retraining only requires replacing the files on disk.
+    """
+
+    def __init__(self, max_size=4):
+        self.max_size = max_size
+        self._entries = OrderedDict()  # key -> (mtimes, model, feature_names)
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, property_type):
+        key = model_key(property_type)
+        paths = model_paths(key)
+        # Raises FileNotFoundError for unknown types, like joblib.load did
+        mtimes = tuple(os.stat(path).st_mtime_ns for path in paths)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == mtimes:
+                self._entries.move_to_end(key)
+                return entry[1], entry[2]
+
+        # Deserialize outside the lock so one slow load doesn't block other types
+        model = joblib.load(paths[0])
+        feature_names = joblib.load(paths[1])
+
+        with self._lock:
+            self.loads += 1
+            self._entries[key] = (mtimes, model, feature_names)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return model, feature_names
+
+    def available_types(self):
+        pattern = os.path.join(MODEL_DIR, f'{MODEL_PREFIX}*.pkl')
+        keys = [os.path.basename(path)[len(MODEL_PREFIX):-len('.pkl')] for path in glob.glob(pattern)]
+        return sorted(key for key in keys if os.path.exists(model_paths(key)[1]))
+
+    def warm(self):
+        """Load every property type that has both a model and a feature list on disk."""
+        loaded = []
+        for key in self.available_types()[:self.max_size]:
+            self.get(key)
+            loaded.append(key)
+        return loaded
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+registry = ModelRegistry(max_size=getattr(settings, 'VALUATION_MODEL_CACHE_SIZE', 4))
@@ -1,3 +1,78 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory
+
+from valuation_tool.features import DESCRIPTION_PREFIX, GENERAL_PREFIX, INTERACTION, PropertyFeatureEncoder
+from valuation_tool.views import ValuationBatchPredictionView
+
+TRAINING_ROWS = [
+    {'region': 'North', 'interior_surface': '120 m²', 'land_surface': None, 'bedrooms': 3, 'bathrooms': 2, 'toilets': 1,
+     'aircon': 'Yes', 'general_features': 'Pool,Garden', 'description': 'Private pool, Beachfront'},
+    {'region': 'West', 'interior_surface': 80, 'land_surface': 400, 'bedrooms': None, 'bathrooms': 1, 'toilets': 1,
+     'aircon': 0, 'general_features': 'Garden', 'description': 'Sea view'},
+]
+
+
+class PropertyFeatureEncoderTests(SimpleTestCase):
+    def setUp(self):
+        self.encoder = PropertyFeatureEncoder().fit(TRAINING_ROWS)
+        self.columns = {name: index for index, name in enumerate(self.encoder.get_feature_names_out())}
+
+    def encode(self, item):
+        return self.encoder.transform([item]).toarray()[0]
+
+    def test_tokens_match_exactly(self):
+        row = self.encode({'general_features': ['Pool'], 'description': 'Private pool'})
+        self.assertEqual(row[self.columns[GENERAL_PREFIX + 'Pool']], 1)
+        self.assertEqual(row[self.columns[GENERAL_PREFIX + 'Garden']], 0)
+        self.assertEqual(row[self.columns[DESCRIPTION_PREFIX + 'Private pool']], 1)
+        self.assertEqual(row[self.columns[INTERACTION]], 0)
+
+    def test_interaction_and_unknown_tokens(self):
+        row = self.encode({'description': 'Private pool, Beachfront, Helipad', 'region': 'Mars'})
+        self.assertEqual(row[self.columns[INTERACTION]], 1)
+        self.assertEqual(row.sum() - row[:8].sum(), 3)  # two description tokens + interaction
+
+    def test_missing_numbers_use_fitted_medians(self):
+        row = self.encode({'interior_surface': '', 'land_surface': '250'})
+        self.assertEqual(row[self.columns['interior_surface']], 100)
+        self.assertEqual(row[self.columns['land_surface']], 250)
+        self.assertEqual(row[self.columns['land_surface_squared']], 250 ** 2)
+
+    def test_batch_shape_matches_feature_names(self):
+        X = self.encoder.transform(TRAINING_ROWS)
+        self.assertEqual(X.shape, (2, len(self.columns)))
+        np.testing.assert_array_equal(X.toarray()[:, self.columns['aircon']], [1, 0])
+
+
+class SurfaceModel:
+    """Stand-in for a pickled pipeline without an encoder: predicts the interior surface."""
+
+    def predict(self, X):
+        return X['interior_surface'].to_numpy()
+
+
+class ValuationBatchPredictionTests(SimpleTestCase):
+    def predict(self, properties):
+        request = APIRequestFactory().post('/', {'properties': properties}, format='json')
+        with mock.patch('valuation_tool.views.registry.get', return_value=(SurfaceModel(), ['interior_surface', 'bedrooms'])):
+            response = ValuationBatchPredictionView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data['predictions']
+
+    def test_bad_rows_fail_alone(self):
+        predictions = self.predict([
+            {'type': 'Apartment', 'interior_surface': 100},
+            {'type': 'Apartment', 'interior_surface': 80, 'bedrooms': 'abc'},
+            {'type': 'Apartment', 'interior_surface': 120},
+        ])
+        self.assertEqual(predictions[0], {'predicted_price': 100.0})
+        self.assertIn('error', predictions[1])
+        self.assertEqual(predictions[2], {'predicted_price': 120.0})
+
+    def test_type_must_be_a_string(self):
+        predictions = self.predict([{'type': 5}, {'type': ['Apartment']}, {'type': 'Apartment', 'interior_surface': 90}])
+        self.assertEqual(predictions[:2], [{'error': 'type must be a string'}] * 2)
+        self.assertEqual(predictions[2], {'predicted_price': 90.0})
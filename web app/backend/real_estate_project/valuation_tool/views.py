@@ -50,6 +50,8 @@ from rest_framework import status
 from django.conf import settings
 import pandas as pd
 import re
+from .features import predict_prices
+from .registry import registry
 
 def clean_surface_area(value):
     if isinstance(value, str):
@@ -70,69 +72,12 @@ def clean_surface_area(value):
 class ValuationPredictionView(APIView):
     def post(self, request):
         try:
-            property_type = request.data.get('type', '').replace('/', '_')
-            model_path = os.path.join(settings.BASE_DIR, f'./valuation_tool/valuation_model_{property_type}.pkl')
-            feature_names_path = os.path.join(settings.BASE_DIR, f'./valuation_tool/feature_names_{property_type}.pkl')
-
-            model = joblib.load(model_path)
-            feature_names = joblib.load(feature_names_path)
-
-            # Log the incoming data for debugging
-            print("Request data:", request.data)
-
-            # Extract base features from request data
-            features = {
-                'region': request.data.get('region', ''),
-                'interior_surface': clean_surface_area(request.data.get('interior_surface', 0)),
-                'land_surface': clean_surface_area(request.data.get('land_surface', 0)),
-                'interior_surface_squared': clean_surface_area(request.data.get('interior_surface', 0)) ** 2,
-                'land_surface_squared': clean_surface_area(request.data.get('land_surface', 0)) ** 2,
-                'bedrooms': int(request.data.get('bedrooms', 0)),
-                'bathrooms': int(request.data.get('bathrooms', 0)),
-                'toilets': int(request.data.get('toilets', 0)),
-                'aircon': int(request.data.get('aircon', 0))
-            }
-
-            # Add general features
-            general_features_list = request.data.get('general_features', [])
-            for feature in feature_names:
-                if feature.startswith('general_feature_'):
-                    features[feature] = 1 if feature[len('general_feature_'):] in general_features_list else 0
-
-            # Add description features
-            description_features_list = request.data.get('description', '').split(', ')
-            for feature in feature_names:
-                if feature.startswith('description_feature_'):
-                    features[feature] = 1 if feature[len('description_feature_'):] in description_features_list else 0
-
-            # Add interaction feature for private pool and beachfront
-            features['interaction_private_pool_beachfront'] = 1 if 'Private pool' in description_features_list and 'Beachfront' in description_features_list else 0
-
-            # Create DataFrame for easier manipulation
-            df = pd.DataFrame([features])
-
-            # Convert region to dummy variables and ensure all necessary columns are present
-            region_dummies = pd.get_dummies(df['region'], prefix='region')
-            df = pd.concat([df, region_dummies], axis=1)
-            df.drop('region', axis=1, inplace=True)
-
-            # Add missing features with default value (0 or empty string)
-            missing_features = list(set(feature_names) - set(df.columns))
-            missing_df = pd.DataFrame(0, index=df.index, columns=missing_features)
-
-            # Concatenate the original and missing features DataFrames
-            df = pd.concat([df, missing_df], axis=1)
-
-            # Ensure all features are in the correct order
-            df = df[feature_names]
-
-            # Make prediction using the pipeline
-            prediction = model.predict(df)
-
-            # Ensure that the price does not decrease with increasing interior or land surface area
-            for feature in ['interior_surface', 'land_surface']:
-                if features[feature] > request.data.get(feature, 0):
-                    prediction[0] = max(prediction[0], model.predict(pd.DataFrame([features]))[0])
+            # Pipelines are deserialized once per worker and reused across requests
+            model, feature_names = registry.get(request.data.get('type', ''))
+
+            # The pipeline's fitted PropertyFeatureEncoder encodes the raw payload, exactly
+            # as it encoded the training rows
+            prediction = predict_prices(model, feature_names, [request.data])
 
             return Response({'predicted_price': prediction[0]}, status=status.HTTP_200_OK)
         except Exception as e:
@@ -140,6 +85,57 @@ class ValuationPredictionView(APIView):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+
+class ValuationBatchPredictionView(APIView):
+    max_batch_size = 5000
+
+    def post(self, request):
+        items = request.data.get('properties') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Expected a non-empty list of properties'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_batch_size:
+            return Response({'error': f'At most {self.max_batch_size} properties per request'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(items)
+
+        # Group input positions by model so each model runs a single predict call
+        groups = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {'error': 'Each property must be an object'}
+                continue
+            property_type = item.get('type', '')
+            if not isinstance(property_type, str):
+                results[index] = {'error': 'type must be a string'}
+                continue
+            groups.setdefault(property_type, []).append(index)
+
+        for property_type, indices in groups.items():
+            try:
+                model, feature_names = registry.get(property_type)
+            except FileNotFoundError:
+                for index in indices:
+                    results[index] = {'error': f'No valuation model for type {property_type!r}'}
+                continue
+
+            try:
+                predictions = predict_prices(model, feature_names, [items[index] for index in indices])
+            except (TypeError, ValueError):
+                # A row the model cannot coerce fails the whole call; rerun the group row by
+                # row so only the bad rows report an error
+                for index in indices:
+                    try:
+                        results[index] = {'predicted_price': float(predict_prices(model, feature_names, [items[index]])[0])}
+                    except (TypeError, ValueError) as e:
+                        results[index] = {'error': str(e)}
+                continue
+
+            for index, prediction in zip(indices, predictions):
+                results[index] = {'predicted_price': float(prediction)}
+
+        return Response({'predictions': results}, status=status.HTTP_200_OK)
+
+
 # class ValuationPredictionView(APIView):
 #     def post(self, request):
 #         try:
@@ -207,7 +203,12 @@ class ValuationPredictionView(APIView):
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-import psycopg2
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import etag
+from properties.models import FeatureTerm
+from properties.vocabulary import load_feature_vocabulary
 
 # class DistinctFeaturesView(APIView):
 #     def get(self, request):
@@ -234,62 +235,24 @@ import psycopg2
 #         except Exception as e:
 #             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+def feature_vocabulary_etag(request, *args, **kwargs):
+    # rebuild_feature_vocabulary recreates every row, so the highest id changes on each rebuild
+    state = FeatureTerm.objects.aggregate(last_id=Max('id'), terms=Count('id'))
+    return f"features-{state['last_id'] or 0}-{state['terms']}"
+
+
 class DistinctFeaturesView(APIView):
+    @method_decorator(etag(feature_vocabulary_etag))
     def get(self, request):
-        try:
-            conn = psycopg2.connect(database="real_estate_db", user="root", password="root", host="localhost", port="")
-            cursor = conn.cursor()
-
-            # Extract and split description features into distinct terms
-            cursor.execute("SELECT description FROM properties_property;")
-            description_features = set()
-            for row in cursor.fetchall():
-                if row[0]:  # Check if the row is not empty
-                    features = [feature.strip() for feature in row[0].split(',')]
-                    description_features.update(features)
-            description_features = sorted(description_features)
-
-            # Extract and split general features into distinct terms
-            cursor.execute("SELECT general_features FROM properties_property;")
-            general_features = set()
-            for row in cursor.fetchall():
-                if row[0]:  # Check if the row is not empty
-                    features = [feature.strip() for feature in row[0].split(',')]
-                    general_features.update(features)
-            general_features = sorted(general_features)
-
-            # Extract distinct property types
-            cursor.execute("SELECT DISTINCT type FROM properties_property;")
-            property_types = sorted(set(row[0] for row in cursor.fetchall() if row[0]))
-
-            # Extract distinct locations
-            cursor.execute("SELECT DISTINCT location FROM properties_property;")
-            locations = sorted(set(row[0] for row in cursor.fetchall() if row[0]))
-
-            conn.close()
-
-            # Map locations to regions
-            regions = sorted(set(map_location_to_region(location) for location in locations))
-
-            return Response({
-                'description_features': description_features,
-                'general_features': general_features,
-                'property_types': property_types,
-                'locations': locations,
-                'regions': regions
-            }, status=status.HTTP_200_OK)
-        except Exception as e:
-            print("Error:", str(e))
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-
-def map_location_to_region(location):
-    if 'West' in location:
-        return 'West'
-    elif 'East' in location:
-        return 'East'
-    elif 'North' in location:
-        return 'North'
-    elif 'South' in location:
-        return 'South'
-    else:
-        return 'Center'
\ No newline at end of file
+        vocabulary = load_feature_vocabulary()
+        response = Response({
+            'description_features': list(vocabulary['description']),
+            'general_features': list(vocabulary['general']),
+            'property_types': list(vocabulary['type']),
+            'locations': list(vocabulary['location']),
+            'regions': list(vocabulary['region']),
+            'counts': vocabulary,
+        }, status=status.HTTP_200_OK)
+        # Let the browser keep it but revalidate with If-None-Match on every page load
+        patch_cache_control(response, no_cache=True)
+        return response
@@ -1,21 +1,67 @@
-import pandas as pd
+"""
+Train the per-type valuation pipelines.
+
+    python valuation_tool_ML.py                                   # successive halving, all types
+    python valuation_tool_ML.py --search random --time-budget 600  # stop each search after ~10 min
+    python valuation_tool_ML.py --search grid --workers 1          # the old exhaustive GridSearchCV
+    python valuation_tool_ML.py --types Apartment Penthouse
+
+The feature matrix is encoded once for every type and cached on disk next to the data
+file. Types train concurrently in a process pool; each worker gets cpu_count // workers
+threads for the forest and runs its search sequentially, so the two levels of
+parallelism never oversubscribe the machine. Pickles go to real_estate_project/valuation_tool,
+where the model registry picks them up, and a JSON report with wall time, CPU time and
+MAE per type is written alongside.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
 import numpy as np
-import re
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import StandardScaler, PolynomialFeatures
+import pandas as pd
+from scipy.stats import randint
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.pipeline import Pipeline
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
 from sklearn.metrics import mean_absolute_error
-import joblib
-import psycopg2
+from sklearn.model_selection import GridSearchCV, HalvingRandomSearchCV, ParameterSampler, cross_val_score, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+# The encoder is pickled into the pipeline, so it must be importable under the same
+# module path the Django app uses when loading the models
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'real_estate_project'))
+from valuation_tool.features import PropertyFeatureEncoder
+
+PROPERTY_TYPES = ['House / Villa', 'Apartment', 'Penthouse', 'Townhouse / Duplex']
+DEFAULT_DATA = os.path.join(BACKEND_DIR, '..', 'cleaned_properties.csv')
+DEFAULT_OUTPUT = os.path.join(BACKEND_DIR, 'real_estate_project', 'valuation_tool')
+
+# Raw columns consumed by PropertyFeatureEncoder. Surface cleaning, median filling,
+# tokenizing the feature lists, the multi-hot columns, squared surfaces and the
+# pool x beachfront interaction all happen inside the fitted pipeline.
+INPUT_COLUMNS = ['region', 'interior_surface', 'land_surface', 'bedrooms', 'bathrooms', 'toilets', 'aircon', 'general_features', 'description']
+
+# The grid the script always searched exhaustively (108 combinations)
+PARAM_GRID = {
+    'model__n_estimators': [100, 200, 300],
+    'model__max_depth': [None, 10, 20, 30],
+    'model__min_samples_split': [2, 5, 10],
+    'model__min_samples_leaf': [1, 2, 4]
+}
+PARAM_DISTRIBUTIONS = {
+    'model__n_estimators': randint(100, 301),
+    'model__max_depth': [None, 10, 20, 30],
+    'model__min_samples_split': randint(2, 11),
+    'model__min_samples_leaf': randint(1, 5),
+}
+SCORING = 'neg_mean_absolute_error'
 
-def clean_surface_area(value):
-    if isinstance(value, str):
-        value = re.sub(r'[^0-9.]', '', value)  # Remove non-numeric characters
-    try:
-        return float(value)
-    except ValueError:
-        return 0.0
 
 def generate_location_to_region_mapping(data):
     location_to_region = {}
@@ -32,105 +78,181 @@ def generate_location_to_region_mapping(data):
             location_to_region[location] = 'Center'
     return location_to_region
 
-# Load your dataset
-data = pd.read_csv('../cleaned_properties.csv')
-
-# Preprocess your data
-data['land_surface'] = data['land_surface'].apply(clean_surface_area)
-data['interior_surface'] = data['interior_surface'].apply(clean_surface_area)
-
-# Fill missing values for surface areas
-data['land_surface'] = data['land_surface'].fillna(data['land_surface'].median())
-data['interior_surface'] = data['interior_surface'].fillna(data['interior_surface'].median())
-
-# Fill missing values for other columns
-data['bedrooms'] = data['bedrooms'].fillna(data['bedrooms'].median())
-data['bathrooms'] = data['bathrooms'].fillna(data['bathrooms'].median())
-data['toilets'] = data['toilets'].fillna(data['toilets'].median())
-data['aircon'] = data['aircon'].fillna(0)
-
-# Convert 'general_features' and 'description' to strings
-data['general_features'] = data['general_features'].astype(str)
-data['description'] = data['description'].astype(str)
-
-# Generate location-to-region mapping
-location_to_region = generate_location_to_region_mapping(data)
 
-# Map specific locations to regions
-data['region'] = data['location'].map(location_to_region)
-
-# Extract distinct general_features and description_features
-conn = psycopg2.connect(database="real_estate_db", user="root", password="root", host="localhost", port="")
-cursor = conn.cursor()
-
-cursor.execute("SELECT DISTINCT UNNEST(string_to_array(general_features, ', ')) AS general_feature FROM properties_property;")
-general_features = [row[0] for row in cursor.fetchall()]
-
-cursor.execute("SELECT DISTINCT UNNEST(string_to_array(description, ', ')) AS description_feature FROM properties_property;")
-description_features = [row[0] for row in cursor.fetchall()]
-
-conn.close()
-
-# Add binary columns for each general_feature and description_feature
-for feature in general_features:
-    data[f'general_feature_{feature}'] = data['general_features'].apply(lambda x: 1 if feature in x else 0)
-
-for feature in description_features:
-    data[f'description_feature_{feature}'] = data['description'].apply(lambda x: 1 if feature in x else 0)
+def load_data(path):
+    if path.endswith('.parquet'):
+        data = pd.read_parquet(path)
+    else:
+        data = pd.read_csv(path)
+    data = data.dropna(subset=['price', 'location'])
+    data['region'] = data['location'].map(generate_location_to_region_mapping(data))
+    return data
+
+
+def load_feature_matrix(data_path, cache_path=None):
+    """
+    Fit the encoder on every row once and return (encoder, X, prices, types).
+
+    The result is cached keyed on the data file's size and mtime, so retraining a single
+    type or re-running with other search settings skips the encoding entirely.
+    """
+    stat = os.stat(data_path)
+    key = (os.path.abspath(data_path), stat.st_size, stat.st_mtime_ns)
+    if cache_path and os.path.exists(cache_path):
+        cached = joblib.load(cache_path)
+        if cached['key'] == key:
+            return cached['encoder'], cached['X'], cached['y'], cached['types']
+
+    data = load_data(data_path)
+    encoder = PropertyFeatureEncoder().fit(data[INPUT_COLUMNS])
+    X = encoder.transform(data[INPUT_COLUMNS])
+    y = data['price'].to_numpy(dtype=np.float64)
+    types = data['type'].to_numpy(dtype=object)
+    if cache_path:
+        joblib.dump({'key': key, 'encoder': encoder, 'X': X, 'y': y, 'types': types}, cache_path)
+    return encoder, X, y, types
+
+
+def estimator(threads):
+    # Search over everything after the encoder; the matrix is already encoded.
+    # The scaler keeps the matrix sparse.
+    return Pipeline([
+        ('scaler', StandardScaler(with_mean=False)),
+        ('model', RandomForestRegressor(n_jobs=threads, random_state=42))
+    ])
 
-# Add interaction feature for private pool and beachfront
-data['interaction_private_pool_beachfront'] = data.apply(lambda row: 1 if row['description_feature_Private pool'] == 1 and row['description_feature_Beachfront'] == 1 else 0, axis=1)
 
-# Step 2: Add polynomial features for interior and land surface
-data['interior_surface_squared'] = data['interior_surface'] ** 2
-data['land_surface_squared'] = data['land_surface'] ** 2
+def budgeted_random_search(pipeline, X, y, n_iter, budget, random_state):
+    """
+    Randomized search that stops sampling once another candidate would overrun the
+    budget (seconds, search only). At least one candidate is always evaluated.
+    """
+    start = time.perf_counter()
+    best_score, best_params, evaluated = None, None, 0
+    for params in ParameterSampler(PARAM_DISTRIBUTIONS, n_iter, random_state=random_state):
+        elapsed = time.perf_counter() - start
+        if budget and evaluated and elapsed + elapsed / evaluated > budget:
+            break
+        score = cross_val_score(clone(pipeline).set_params(**params), X, y, cv=3, scoring=SCORING).mean()
+        evaluated += 1
+        if best_score is None or score > best_score:
+            best_score, best_params = score, params
+    return clone(pipeline).set_params(**best_params).fit(X, y), best_params, evaluated
+
+
+def search(pipeline, X, y, options):
+    if options['search'] == 'random':
+        return budgeted_random_search(pipeline, X, y, options['n_iter'], options['time_budget'], options['random_state'])
+
+    if options['search'] == 'halving':
+        # Trees are the resource: candidates start with 50 and the survivors grow to 300
+        distributions = {name: values for name, values in PARAM_DISTRIBUTIONS.items() if name != 'model__n_estimators'}
+        cv = HalvingRandomSearchCV(
+            pipeline, distributions, n_candidates=options['n_iter'], resource='model__n_estimators',
+            min_resources=50, max_resources=300, factor=3, cv=3, scoring=SCORING, random_state=options['random_state'],
+        )
+    else:
+        cv = GridSearchCV(pipeline, PARAM_GRID, cv=3, scoring=SCORING)
+    cv.fit(X, y)
+    return cv.best_estimator_, cv.best_params_, len(cv.cv_results_['params'])
+
+
+def train_and_save_model(property_type, encoder, X, y, options):
+    """Search, evaluate and pickle one type. Runs in a worker process."""
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    fitted, best_params, candidates = search(estimator(options['threads']), X_train, y_train, options)
+    mae = mean_absolute_error(y_test, fitted.predict(X_test))
+
+    # The saved pipeline starts from the raw payload: shared encoder + the tuned steps
+    pipeline = Pipeline([('features', encoder)] + fitted.steps)
+    key = property_type.replace('/', '_')
+    for name, value in (
+        (f'valuation_model_{key}.pkl', pipeline),
+        (f'feature_names_{key}.pkl', encoder.get_feature_names_out().tolist()),
+    ):
+        # The registry reloads on mtime, so never let it see a half written file
+        path = os.path.join(options['output'], name)
+        joblib.dump(value, f'{path}.tmp')
+        os.replace(f'{path}.tmp', path)
+
+    return {
+        'type': property_type,
+        'rows': int(X.shape[0]),
+        'candidates': candidates,
+        'best_params': {name: value.item() if isinstance(value, np.generic) else value for name, value in best_params.items()},
+        'mae': float(mae),
+        'wall_seconds': round(time.perf_counter() - wall_start, 2),
+        'cpu_seconds': round(time.process_time() - cpu_start, 2),
+    }
 
-# Function to train and save model for each property type
-def train_and_save_model(property_type):
-    subset = data[data['type'] == property_type]
-    
-    # Select features and target variable
-    features = subset[['region', 'interior_surface', 'land_surface', 'interior_surface_squared', 'land_surface_squared', 'bedrooms', 'bathrooms', 'toilets', 'aircon'] + 
-                      [f'general_feature_{feature}' for feature in general_features] + 
-                      [f'description_feature_{feature}' for feature in description_features] + 
-                      ['interaction_private_pool_beachfront']]
-    target = subset['price']
-
-    # Convert categorical features to numerical
-    features = pd.get_dummies(features, columns=['region'])
-
-    # Split the data into training and testing sets
-    X_train, X_test, y_train, y_test = train_test_split(features, target, test_size=0.2, random_state=42)
-
-    # Create a pipeline
-    pipeline = Pipeline([
-        ('scaler', StandardScaler()),
-        ('model', RandomForestRegressor())
-    ])
 
-    # Train the model with cross-validation
-    param_grid = {
-        'model__n_estimators': [100, 200, 300],
-        'model__max_depth': [None, 10, 20, 30],
-        'model__min_samples_split': [2, 5, 10],
-        'model__min_samples_leaf': [1, 2, 4]
+def main():
+    parser = argparse.ArgumentParser(description='Train the per-type valuation models')
+    parser.add_argument('--data', default=DEFAULT_DATA, help='cleaned_properties.csv or a properties.parquet snapshot')
+    parser.add_argument('--types', nargs='+', default=PROPERTY_TYPES)
+    parser.add_argument('--search', choices=['halving', 'random', 'grid'], default='halving')
+    parser.add_argument('--n-iter', type=int, default=30, help='Candidates sampled by the halving and random searches')
+    parser.add_argument('--time-budget', type=float, default=None, help='Seconds per type for --search random')
+    parser.add_argument('--workers', type=int, default=None, help='Types trained concurrently (default: one per type)')
+    parser.add_argument('--random-state', type=int, default=42)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--cache', default=None, help='Feature matrix cache (default: <data>.features.joblib)')
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--report', default=None, help='JSON report path (default: <output>/training_report.json)')
+    args = parser.parse_args()
+    if args.time_budget and args.search != 'random':
+        parser.error('--time-budget is only enforced by --search random')
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    cache_path = None if args.no_cache else (args.cache or f'{args.data}.features.joblib')
+    encoder, X, y, types = load_feature_matrix(args.data, cache_path)
+    encode_seconds = time.perf_counter() - start
+
+    workers = max(1, min(args.workers or len(args.types), len(args.types)))
+    options = {
+        'search': args.search,
+        'n_iter': args.n_iter,
+        'time_budget': args.time_budget,
+        'random_state': args.random_state,
+        'output': args.output,
+        'threads': max(1, (os.cpu_count() or 1) // workers),
     }
 
-    grid_search = GridSearchCV(pipeline, param_grid, cv=3, n_jobs=-1, verbose=2)
-    grid_search.fit(X_train, y_train)
-
-    # Evaluate the model
-    predictions = grid_search.predict(X_test)
-    print(f'{property_type} - Mean Absolute Error:', mean_absolute_error(y_test, predictions))
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for property_type in args.types:
+            rows = np.flatnonzero(types == property_type)
+            if not len(rows):
+                print(f'{property_type} - no rows, skipped')
+                continue
+            futures[pool.submit(train_and_save_model, property_type, encoder, X[rows], y[rows], options)] = property_type
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"{result['type']} - Mean Absolute Error: {result['mae']:.0f} "
+                  f"({result['candidates']} candidates, {result['wall_seconds']:.0f}s wall, {result['cpu_seconds']:.0f}s CPU)")
+
+    report = {
+        'search': args.search,
+        'workers': workers,
+        'threads_per_worker': options['threads'],
+        'encode_seconds': round(encode_seconds, 2),
+        'wall_seconds': round(time.perf_counter() - start, 2),
+        # Worker CPU is measured inside each process; the parent only encodes and waits
+        'cpu_seconds': round(time.process_time() - cpu_start + sum(result['cpu_seconds'] for result in results), 2),
+        'types': sorted(results, key=lambda result: result['type']),
+    }
+    report_path = args.report or os.path.join(args.output, 'training_report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"Trained {len(results)} models in {report['wall_seconds']:.0f}s, report written to {report_path}")
 
-    # Save the trained model and components to disk
-    joblib.dump(grid_search.best_estimator_, f'valuation_model_{property_type.replace("/", "_")}.pkl')
-    joblib.dump(features.columns.tolist(), f'feature_names_{property_type.replace("/", "_")}.pkl')
 
-# Train and save models for each property type
-property_types = ['House / Villa', 'Apartment', 'Penthouse', 'Townhouse / Duplex']
-for property_type in property_types:
-    train_and_save_model(property_type)
+if __name__ == '__main__':
+    main()
 
 
 # import pandas as pd
@@ -141,7 +141,7 @@ const Dashboard = ({ currency, setCurrency, propertyType, setPropertyType, regio
           <PriceVsAccessibleChart region={region} propertyType={propertyType} minSize={50} maxSize={500} location={location} />
         </Card>
         <SectionTitle>Listings Heat Map</SectionTitle>
-        <Heatmap />
+        <Heatmap propertyType={propertyType} />
       </Content>
     </DashboardContainer>
   );
@@ -15,26 +15,24 @@ const center = {
 // Keep the libraries array as a static variable
 const libraries = ['visualization'];
 
-const Heatmap = () => {
+const Heatmap = ({ propertyType = 'All', sold = 'false', dateFrom, dateTo }) => {
   const [heatmapData, setHeatmapData] = useState([]);
 
   useEffect(() => {
-    axios.get('http://localhost:8000/api/locations/')
-      .then(response => {
-        const data = response.data.map(location => {
-          const lat = parseFloat(location.latitude);
-          const lng = parseFloat(location.longitude);
-          const avgPrice = parseFloat(location.average_price);
-          if (!isNaN(lat) && !isNaN(lng) && !isNaN(avgPrice)) {
-            return { location: new window.google.maps.LatLng(lat, lng), weight: avgPrice };
-          }
-          return null;
-        }).filter(Boolean); // Remove any null values
-        setHeatmapData(data);
-        console.log("Heatmap data:", data); // Log the data to verify it
-      })
-      .catch(error => console.error('Error fetching locations:', error));
-  }, []);
+    // The worker zips the endpoint's parallel lat/lng/weight arrays off the main thread
+    const worker = new Worker(new URL('../worker.js', import.meta.url));
+    worker.onmessage = (event) => setHeatmapData(event.data);
+
+    const params = { property_type: propertyType, sold };
+    if (dateFrom) params.date_from = dateFrom;
+    if (dateTo) params.date_to = dateTo;
+
+    axios.get('http://localhost:8000/api/location_heatmap/', { params })
+      .then(response => worker.postMessage({ heatmap: response.data }))
+      .catch(error => console.error('Error fetching heatmap data:', error));
+
+    return () => worker.terminate();
+  }, [propertyType, sold, dateFrom, dateTo]);
 
   const heatmapOptions = {
     radius: 50, // Increase the radius to make heat points bigger
@@ -52,7 +50,10 @@ const Heatmap = () => {
         center={center}
         zoom={10}
       >
-        <HeatmapLayer data={heatmapData.map(point => ({ location: point.location, weight: point.weight }))} options={heatmapOptions} />
+        <HeatmapLayer
+          data={heatmapData.map(([lat, lng, weight]) => ({ location: new window.google.maps.LatLng(lat, lng), weight }))}
+          options={heatmapOptions}
+        />
       </GoogleMap>
     </LoadScript>
   );
@@ -86,19 +86,15 @@ const SortSelect = styled.select`
   font-size: 16px;
 `;
 
-const LatestPropertiesContainer = styled.div`
-  margin-top: 40px;
-`;
-
-const LatestPropertyItem = styled.div`
-  display: flex;
-  justify-content: space-between;
-  align-items: center;
-  background-color: #fff;
-  border-radius: 8px;
-  padding: 10px;
-  margin-bottom: 10px;
-  box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
+const LoadMoreButton = styled.button`
+  background-color: #eaeaea;
+  color: #333;
+  border: none;
+  padding: 8px 16px;
+  border-radius: 4px;
+  cursor: pointer;
+  font-size: 14px;
+  margin-top: 20px;
 `;
 
 const currencyCodes = {
@@ -122,7 +118,7 @@ const formatCurrency = (amount, currency) => {
 
 const MarketAnalysis = ({ currency, propertyType, region }) => {
   const [priceChanges, setPriceChanges] = useState([]);
-  const [latestProperties, setLatestProperties] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [expandedPropertyId, setExpandedPropertyId] = useState(null);
   const [priceHistory, setPriceHistory] = useState({});
@@ -149,28 +145,33 @@ const MarketAnalysis = ({ currency, propertyType, region }) => {
     return amount * rate;
   };
 
-  useEffect(() => {
-    const fetchData = async () => {
-      try {
-        const response = await axios.get('http://localhost:8000/api/price-changes/', {
-          params: {
-            start_date: '2024-06-01',
-            end_date: '2024-06-30',
-            property_type: propertyType,
-            region: region,
-            sort_by: sortOrder
-          }
-        });
-        setPriceChanges(response.data.price_changes);
-        setLatestProperties(response.data.latest_properties);
-      } catch (error) {
-        console.error('Error fetching data:', error);
-      } finally {
-        setLoading(false);
-      }
-    };
+  // The API pages in sort order; "Load more" follows next_cursor
+  const fetchPriceChanges = async (cursor) => {
+    try {
+      const endDate = new Date();
+      const startDate = new Date(endDate.getTime() - 30 * 24 * 60 * 60 * 1000);
+      const response = await axios.get('http://localhost:8000/api/price-changes/', {
+        params: {
+          start_date: startDate.toISOString().slice(0, 10),
+          end_date: endDate.toISOString().slice(0, 10),
+          property_type: propertyType,
+          region: region,
+          sort_by: sortOrder,
+          cursor: cursor || undefined
+        }
+      });
+      setPriceChanges(previous => (cursor ? [...previous, ...response.data.price_changes] : response.data.price_changes));
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching data:', error);
+    } finally {
+      setLoading(false);
+    }
+  };
 
-    fetchData();
+  useEffect(() => {
+    fetchPriceChanges(null);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [propertyType, region, sortOrder]);
 
   const togglePriceHistory = async (propertyId) => {
@@ -277,6 +278,9 @@ const MarketAnalysis = ({ currency, propertyType, region }) => {
           </PropertyItem>
         ))}
       </PropertyList>
+      {nextCursor && (
+        <LoadMoreButton onClick={() => fetchPriceChanges(nextCursor)}>Load more</LoadMoreButton>
+      )}
     </MarketAnalysisContainer>
   );
 };
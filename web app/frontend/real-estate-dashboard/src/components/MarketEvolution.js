@@ -72,7 +72,7 @@ const MarketEvolution = ({ currency, propertyType, region, locations }) => {
 
         if (response.data && Array.isArray(response.data)) {
           const labels = response.data.map(data => format(new Date(data.truncated_date), 'yyyy-MM-dd'));
-          const dataPoints = response.data.map(data => parseFloat(data.avg_price) || 0);
+          const dataPoints = response.data.map(data => parseFloat(data.rolling_avg_price ?? data.avg_price) || 0);
 
           console.log("Labels:", labels);
           console.log("Data Points:", dataPoints);
@@ -80,7 +80,7 @@ const MarketEvolution = ({ currency, propertyType, region, locations }) => {
           setChartData({
             labels: labels,
             datasets: [{
-              label: 'Average Property Prices',
+              label: 'Average Property Prices (7-day rolling)',
               data: dataPoints,
               fill: false,
               backgroundColor: 'rgb(75, 192, 192)',
@@ -46,6 +46,15 @@ const Select = styled.select`
   font-size: 16px;
 `;
 
+const LoadMoreLink = styled.a`
+  display: inline-block;
+  margin-top: 20px;
+  color: #1890ff;
+  cursor: pointer;
+`;
+
+const PAGE_SIZE = 50;
+
 const currencyCodes = {
   'Rs': 'MUR',
   '€': 'EUR',
@@ -67,6 +76,7 @@ const formatCurrency = (amount, currency) => {
 
 const NewListings = ({ currency = 'Rs', propertyType, region }) => {
   const [latestProperties, setLatestProperties] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [currencyRates, setCurrencyRates] = useState({ Rs: 1, EUR: 0.021, USD: 0.024 });
   const [sortBy, setSortBy] = useState('date_added');
@@ -88,25 +98,30 @@ const NewListings = ({ currency = 'Rs', propertyType, region }) => {
     return amount * currencyRates[currencyCodes[currency]];
   };
 
-  useEffect(() => {
-    const fetchLatestProperties = async () => {
-      try {
-        const response = await axios.get('http://localhost:8000/api/latest-properties/', {
-          params: {
-            property_type: propertyType,
-            region: region,
-            sort_by: sortBy
-          }
-        });
-        setLatestProperties(response.data.latest_properties);
-      } catch (error) {
-        console.error('Error fetching data:', error);
-      } finally {
-        setLoading(false);
-      }
-    };
+  // The API pages in sort order; "Load more" follows next_cursor
+  const fetchLatestProperties = async (cursor) => {
+    try {
+      const response = await axios.get('http://localhost:8000/api/latest-properties/', {
+        params: {
+          property_type: propertyType,
+          region: region,
+          sort_by: sortBy,
+          limit: PAGE_SIZE,
+          cursor: cursor || undefined
+        }
+      });
+      setLatestProperties(previous => (cursor ? [...previous, ...response.data.latest_properties] : response.data.latest_properties));
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching data:', error);
+    } finally {
+      setLoading(false);
+    }
+  };
 
-    fetchLatestProperties();
+  useEffect(() => {
+    fetchLatestProperties(null);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [propertyType, region, sortBy]);
 
   if (loading) {
@@ -125,8 +140,8 @@ const NewListings = ({ currency = 'Rs', propertyType, region }) => {
         {latestProperties.length === 0 ? (
           <p>No new listings found for the selected filters.</p>
         ) : (
-          latestProperties.map((property, index) => (
-            <PropertyCard key={index}>
+          latestProperties.map(property => (
+            <PropertyCard key={property.id}>
               <CardTitle>{property.title}</CardTitle>
               <p>Location: {property.location}</p>
               <p>Price: {formatCurrency(convertCurrency(property.price, currency), currency)}</p>
@@ -136,6 +151,9 @@ const NewListings = ({ currency = 'Rs', propertyType, region }) => {
           ))
         )}
       </PropertiesGrid>
+      {nextCursor && (
+        <LoadMoreLink onClick={() => fetchLatestProperties(nextCursor)}>Load more</LoadMoreLink>
+      )}
     </LatestPropertiesContainer>
   );
 };
@@ -58,29 +58,44 @@ const ExpandedDetails = styled.div`
   border-radius: 4px;
 `;
 
+// Columns shown in the expanded details; the API only returns what is asked for
+const SOLD_FIELDS = [
+  'id', 'title', 'price', 'date_added', 'location', 'description', 'agency_name', 'land_surface',
+  'interior_surface', 'swimming_pool', 'construction_year', 'bedrooms', 'bathrooms', 'toilets',
+  'aircon', 'general_features', 'indoor_features', 'outdoor_features', 'location_description',
+  'type', 'ref',
+].join(',');
+const PAGE_SIZE = 50;
+
 const SoldProperties = ({ currency, propertyType, region }) => {
   const [soldProperties, setSoldProperties] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [expandedPropertyId, setExpandedPropertyId] = useState(null);
 
+  const fetchSoldProperties = async (cursor) => {
+    try {
+      const response = await axios.get('http://localhost:8000/api/sold-properties/', {
+        params: {
+          property_type: propertyType,
+          region: region,
+          fields: SOLD_FIELDS,
+          limit: PAGE_SIZE,
+          cursor: cursor || undefined
+        }
+      });
+      setSoldProperties(previous => (cursor ? [...previous, ...response.data.sold_properties] : response.data.sold_properties));
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching sold properties:', error);
+    } finally {
+      setLoading(false);
+    }
+  };
+
   useEffect(() => {
-    const fetchSoldProperties = async () => {
-      try {
-        const response = await axios.get('http://localhost:8000/api/sold-properties/', {
-          params: {
-            property_type: propertyType,
-            region: region
-          }
-        });
-        setSoldProperties(response.data);
-      } catch (error) {
-        console.error('Error fetching sold properties:', error);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchSoldProperties();
+    fetchSoldProperties(null);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [propertyType, region]);
 
   const toggleExpandedDetails = (propertyId) => {
@@ -130,6 +145,9 @@ const SoldProperties = ({ currency, propertyType, region }) => {
           </PropertyItem>
         ))}
       </PropertyList>
+      {nextCursor && (
+        <DetailLink onClick={() => fetchSoldProperties(nextCursor)}>Load more</DetailLink>
+      )}
     </SoldPropertiesContainer>
   );
 };
@@ -1,5 +1,14 @@
 onmessage = function(event) {
-  const { locations } = event.data;
+  const { locations, heatmap } = event.data;
+
+  // Columnar payload from /api/location_heatmap/: parallel lat, lng and weight arrays
+  // (weights are average prices, already numbers)
+  if (heatmap) {
+    const processedData = heatmap.lat.map((lat, i) => [lat, heatmap.lng[i], heatmap.weight[i]]);
+    postMessage(processedData);
+    return;
+  }
+
   const processedData = locations.map(location => {
     const lat = parseFloat(location.latitude);
     const lng = parseFloat(location.longitude);